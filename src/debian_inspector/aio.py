@@ -0,0 +1,151 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import asyncio
+from collections import deque
+import functools
+import itertools
+
+from debian_inspector import batch
+from debian_inspector import contents
+from debian_inspector import copyright as debcopy
+from debian_inspector import debcon
+
+"""
+Asyncio entry points to read and parse Debian control, copyright and Contents
+files without blocking the event loop.
+
+File I/O, decompression and parsing run in an ``executor``: the default thread
+pool of the event loop if None, or any concurrent.futures executor such as a
+ProcessPoolExecutor. Async iterators keep a bounded number of files or batches
+of paragraphs in flight such that nothing more is read until the consumer
+catches up.
+"""
+
+# Default maximum number of files parsed at the same time.
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Default number of paragraphs parsed at once in a thread.
+DEFAULT_BATCH_SIZE = 256
+
+
+async def run(function, *args, executor=None, **kwargs):
+    """
+    Return the result of calling ``function`` with ``args`` and ``kwargs`` in
+    an ``executor``.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+async def read_text_file(location, executor=None):
+    """
+    Return the decoded text of the file at ``location``. See
+    ``debcon.read_text_file``.
+    """
+    return await run(debcon.read_text_file, location, executor=executor)
+
+
+async def parse_control(location, executor=None):
+    """
+    Return a Debian822 of the control or .dsc file at ``location``.
+    """
+    return await run(batch.parse_control, location, executor=executor)
+
+
+async def parse_copyright(location, executor=None):
+    """
+    Return a DebianCopyright of the copyright file at ``location``.
+    """
+    return await run(debcopy.DebianCopyright.from_file, location, executor=executor)
+
+
+async def parse_contents(location, has_header=True, executor=None):
+    """
+    Return a tuple of ({path: [packages]}, {package: [paths]}) from the Contents
+    file at ``location``. See ``contents.parse_contents``.
+    """
+    return await run(
+        contents.parse_contents,
+        location,
+        has_header=has_header,
+        executor=executor,
+    )
+
+
+async def parse_many(
+    locations,
+    kind='control',
+    max_concurrency=DEFAULT_MAX_CONCURRENCY,
+    executor=None,
+):
+    """
+    Yield a batch.ParseResult for each file of a ``locations`` iterable in the
+    same order, parsing at most ``max_concurrency`` files at the same time.
+    ``kind`` is one of the batch.PARSERS keys or a function that accepts a
+    location and returns a parsed object. A file that cannot be parsed has an
+    error and does not stop the parsing of the other files.
+
+    New files are only parsed when the consumer takes the results of the
+    files already parsed.
+    """
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        raise ValueError('max_concurrency must be a positive integer')
+    parser = batch.PARSERS[kind] if isinstance(kind, str) else kind
+    parse = functools.partial(batch.parse_file, parser=parser)
+    loop = asyncio.get_running_loop()
+
+    locations = iter(locations)
+    pending = deque()
+    try:
+        while True:
+            for location in itertools.islice(locations, max_concurrency - len(pending)):
+                pending.append(loop.run_in_executor(executor, parse, location))
+            if not pending:
+                break
+            yield await pending.popleft()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def iter_paragraphs_data(location, fields=None, batch_size=DEFAULT_BATCH_SIZE, executor=None):
+    """
+    Yield paragraph data mappings from the Debian control file at ``location``
+    such as a Packages file, read and parsed in an ``executor`` by batches of
+    ``batch_size`` paragraphs. The next batch is parsed while the current
+    batch is consumed, and no more. Optionally only return the ``fields``
+    list of field names. The ``executor`` must be a thread pool executor or
+    None as the file is parsed incrementally. The file is closed when the
+    iteration ends, including when the consumer stops early.
+    """
+    loop = asyncio.get_running_loop()
+    paragraphs = debcon.get_paragraphs_data_from_file(location, fields=fields)
+
+    def get_batch():
+        return list(itertools.islice(paragraphs, batch_size))
+
+    next_batch = loop.run_in_executor(executor, get_batch)
+    try:
+        while True:
+            # do not cancel a running batch if this task is cancelled
+            paragraphs_batch = await asyncio.shield(next_batch)
+            if not paragraphs_batch:
+                break
+            next_batch = loop.run_in_executor(executor, get_batch)
+            for data in paragraphs_batch:
+                yield data
+    finally:
+        # a batch running in a thread cannot be cancelled: wait for it to end
+        # before closing the paragraphs generator and its file
+        if not next_batch.done():
+            await asyncio.wait([next_batch])
+        if not next_batch.cancelled():
+            # an error of an unused batch is ignored
+            next_batch.exception()
+        await loop.run_in_executor(executor, paragraphs.close)
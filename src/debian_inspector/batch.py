@@ -0,0 +1,122 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+
+from attr import attrib
+from attr import attrs
+
+from debian_inspector import copyright as debcopy
+from debian_inspector import debcon
+
+"""
+Parse many Debian control, .dsc and copyright files at once in a pool of
+processes.
+
+Files are dispatched to the worker processes in chunks to amortize the cost
+of inter-process communication. Results are returned in the order of the input
+files and a file that cannot be parsed is reported with its error without
+stopping the parsing of the other files.
+"""
+
+# Maximum number of files sent at once to a worker process.
+MAX_CHUNKSIZE = 64
+
+
+@attrs
+class ParseResult(object):
+    """
+    The result of parsing a file.
+    """
+    # location of the parsed file
+    location = attrib()
+    # parsed object or None if there was an error
+    value = attrib(default=None, repr=False)
+    # error message if the file could not be parsed
+    error = attrib(default=None)
+
+
+def parse_control(location):
+    """
+    Return a Debian822 of the control file at ``location``.
+    """
+    return debcon.Debian822.from_file(location)
+
+
+def parse_dsc(location):
+    """
+    Return a Debian822 of the .dsc file at ``location``, ignoring its PGP
+    signature.
+    """
+    return debcon.Debian822.from_file(location, remove_pgp_signature=True)
+
+
+def parse_paragraphs(location):
+    """
+    Return a list of the paragraph data mappings of the control file with
+    many paragraphs at ``location``, such as a Packages or status file.
+    """
+    return list(debcon.get_paragraphs_data_from_file(location))
+
+
+def parse_copyright(location):
+    """
+    Return a DebianCopyright of the copyright file at ``location``.
+    """
+    return debcopy.DebianCopyright.from_file(location)
+
+
+# Mapping of {kind of file: function to parse a file location}.
+PARSERS = {
+    'control': parse_control,
+    'dsc': parse_dsc,
+    'paragraphs': parse_paragraphs,
+    'copyright': parse_copyright,
+}
+
+
+def parse_many(locations, kind='control', jobs=None, chunksize=None):
+    """
+    Yield a ParseResult for each file of a ``locations`` iterable in the same
+    order, parsed in a pool of ``jobs`` processes. ``jobs`` defaults to the
+    number of CPUs and files are parsed serially in the current process if
+    ``jobs`` is 1.
+
+    ``kind`` is one of the PARSERS keys: "control", "dsc", "paragraphs" or
+    "copyright", or a module-level function that accepts a location and
+    returns a parsed object.
+
+    Files are sent to each worker process by chunks of ``chunksize`` files,
+    computed from the number of files and ``jobs`` if not provided.
+    """
+    parser = PARSERS[kind] if isinstance(kind, str) else kind
+    parse = functools.partial(parse_file, parser=parser)
+
+    jobs = jobs or os.cpu_count() or 1
+    locations = list(locations)
+    if jobs == 1 or len(locations) < 2:
+        yield from map(parse, locations)
+        return
+
+    if not chunksize:
+        chunksize = min(MAX_CHUNKSIZE, max(1, len(locations) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(parse, locations, chunksize=chunksize)
+
+
+def parse_file(location, parser):
+    """
+    Return a ParseResult of the file at ``location`` parsed with a ``parser``
+    function, with an error message instead of a value if parsing fails.
+    """
+    try:
+        return ParseResult(location=location, value=parser(location))
+    except Exception as e:
+        return ParseResult(location=location, error=f'{e.__class__.__name__}: {e}')
@@ -0,0 +1,219 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+
+from attr import attrib
+from attr import attrs
+
+"""
+An opt-in on-disk cache of the results of parsing Debian control and copyright
+files, to avoid parsing again files with the same content such as the
+copyright files shared by many container images.
+
+Cached results are keyed by a hash of the content of a parsed file, the
+library version and the parsing options. They are stored as compressed pickles
+in a cache directory, one file per result, and are evicted least recently
+used first when the cache grows larger than a size budget.
+
+The cache directory can be shared by concurrent processes: entries are written
+atomically and an entry that cannot be read is treated as missing. Do not use
+a cache directory that untrusted users can write to, as loading a pickle can
+execute code.
+"""
+
+# Version of the format of cached results, to change when parsed objects
+# change without a new library version.
+CACHE_FORMAT_VERSION = '1'
+
+# Default size budget of a cache directory in bytes.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Size of the chunks read from a file to hash its content.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_library_version():
+    """
+    Return the version string of the installed debian_inspector library or
+    "unknown" if it is not installed, such as when running from a checkout.
+    Cached results are then not invalidated on upgrades: pass an explicit
+    ``version`` to a ParseCache in this case.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python 3.7
+        import importlib_metadata as metadata
+
+    try:
+        return metadata.version('debian_inspector')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+@attrs
+class ParseCache(object):
+    """
+    An on-disk cache of parsing results in a ``location`` directory.
+    """
+    # location of the cache directory, created if needed
+    location = attrib()
+    # size budget of the cache directory in bytes
+    max_size = attrib(default=DEFAULT_MAX_SIZE)
+    # version of the library, part of every key
+    version = attrib(default=None)
+    # approximate size of the cache directory in bytes or None if not known
+    _size = attrib(default=None, repr=False, init=False, eq=False)
+
+    def __attrs_post_init__(self, *args, **kwargs):
+        if self.version is None:
+            self.version = get_library_version()
+        os.makedirs(self.location, exist_ok=True)
+
+    def get_key(self, location, kind, options=()):
+        """
+        Return a cache key string for the file at ``location`` parsed as a
+        ``kind`` of file with an ``options`` tuple of parsing options. The key
+        is a hash of the file content, the library version and these.
+        """
+        hasher = hashlib.blake2b(digest_size=20)
+        header = repr((CACHE_FORMAT_VERSION, self.version, kind, options))
+        hasher.update(header.encode('utf-8'))
+        with open(location, 'rb') as inp:
+            chunk = inp.read(HASH_CHUNK_SIZE)
+            while chunk:
+                hasher.update(chunk)
+                chunk = inp.read(HASH_CHUNK_SIZE)
+        return hasher.hexdigest()
+
+    def get_entry_location(self, key):
+        return os.path.join(self.location, key[:2], key)
+
+    def get(self, key):
+        """
+        Return a tuple of (found, value) for a cache ``key`` where found is
+        True if the value was found in the cache.
+        """
+        entry = self.get_entry_location(key)
+        try:
+            with open(entry, 'rb') as inp:
+                value = pickle.loads(zlib.decompress(inp.read()))
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # a corrupted entry is removed and treated as missing
+            self._remove(entry)
+            return False, None
+
+        try:
+            # keep track of the last use for LRU eviction
+            os.utime(entry)
+        except OSError:
+            pass
+        return True, value
+
+    def set(self, key, value):
+        """
+        Store a ``value`` for a cache ``key``. This is best effort and errors
+        are ignored.
+        """
+        entry = self.get_entry_location(key)
+        try:
+            content = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            # a value that cannot be pickled is not cached
+            return
+        try:
+            entry_dir = os.path.dirname(entry)
+            os.makedirs(entry_dir, exist_ok=True)
+            fd, temp_location = tempfile.mkstemp(prefix='.tmp-', dir=entry_dir)
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(content)
+                # this is atomic: concurrent readers see a whole entry or none
+                os.replace(temp_location, entry)
+            except BaseException:
+                self._remove(temp_location)
+                raise
+        except OSError:
+            return
+
+        if self._size is None:
+            self._size = self.get_size()
+        else:
+            self._size += len(content)
+        if self._size > self.max_size:
+            self.evict()
+
+    def get_or_parse(self, location, kind, parser, options=()):
+        """
+        Return the cached result of parsing the file at ``location`` as a
+        ``kind`` of file with an ``options`` tuple of parsing options, or
+        return the result of calling ``parser(location)`` and cache it.
+        """
+        key = self.get_key(location, kind=kind, options=options)
+        found, value = self.get(key)
+        if not found:
+            value = parser(location)
+            self.set(key, value)
+        return value
+
+    def iter_entries(self):
+        """
+        Yield tuples of (location, size, last use time) for each entry of this
+        cache, including temporary files.
+        """
+        for entry_dir in os.scandir(self.location):
+            if not entry_dir.is_dir():
+                continue
+            for entry in os.scandir(entry_dir.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def get_size(self):
+        """
+        Return the total size in bytes of the entries of this cache.
+        """
+        return sum(size for _, size, _ in self.iter_entries())
+
+    def evict(self):
+        """
+        Remove the least recently used entries of this cache until its size is
+        below three quarters of its size budget.
+        """
+        entries = sorted(self.iter_entries(), key=lambda e: e[2])
+        size = sum(size for _, size, _ in entries)
+        target = self.max_size * 3 // 4
+        for entry, entry_size, _ in entries:
+            if size <= target:
+                break
+            self._remove(entry)
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        """
+        Remove all the entries of this cache.
+        """
+        for entry, _, _ in list(self.iter_entries()):
+            self._remove(entry)
+        self._size = 0
+
+    def _remove(self, location):
+        try:
+            os.remove(location)
+        except OSError:
+            pass
@@ -0,0 +1,282 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
+import mmap
+import os
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import debcon
+
+"""
+Verify the size and checksums of the files listed in the "Files" and
+"Checksums-*" fields of Debian control files such as .dsc files.
+
+Each file is read only once, in large chunks or memory-mapped, and all its
+digests are updated from the same chunk. Several files are verified at the
+same time using a pool of threads: hashlib releases the GIL while hashing.
+"""
+
+# Digest types of a debcon.File in order
+DIGEST_TYPES = ('md5', 'sha1', 'sha256', 'sha512')
+
+# Size of the chunks read from a file to compute its digests.
+CHUNK_SIZE = 1024 * 1024
+
+# Default number of threads used to verify files.
+DEFAULT_MAX_WORKERS = 4
+
+
+@attrs
+class FileVerification(object):
+    """
+    The result of verifying a file against its expected size and digests.
+    """
+    # file name as listed in a control file
+    name = attrib()
+    # location of the verified file
+    location = attrib()
+    # expected and actual size in bytes as integers
+    expected_size = attrib(default=None)
+    size = attrib(default=None)
+    # mappings of {digest type: hex digest} such as {'sha256': '80c4...'}
+    expected_digests = attrib(default=Factory(dict))
+    digests = attrib(default=Factory(dict))
+    # error message if the file could not be read
+    error = attrib(default=None)
+
+    @classmethod
+    def from_file(cls, file, location, digest_types=DIGEST_TYPES):
+        """
+        Return a new FileVerification with the expected size and digests of a
+        debcon.File ``file`` for the file at ``location``. Only keep the
+        expected digests of a ``digest_types`` list.
+        """
+        expected_digests = {
+            digest_type: getattr(file, digest_type)
+            for digest_type in digest_types
+            if getattr(file, digest_type)
+        }
+        expected_size = file.size
+        if isinstance(expected_size, str):
+            expected_size = int(expected_size) if expected_size.isdigit() else None
+
+        return cls(
+            name=file.name,
+            location=location,
+            expected_size=expected_size,
+            expected_digests=expected_digests,
+        )
+
+    @property
+    def mismatches(self):
+        """
+        Return a list of the names of the checks that failed: "size" or a
+        digest type. This is empty if the file is valid.
+        """
+        mismatches = []
+        if self.expected_size is not None and self.size != self.expected_size:
+            mismatches.append('size')
+        for digest_type, expected in self.expected_digests.items():
+            if self.digests.get(digest_type) != expected.lower():
+                mismatches.append(digest_type)
+        return mismatches
+
+    @property
+    def is_valid(self):
+        return not self.error and not self.mismatches
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            location=self.location,
+            expected_size=self.expected_size,
+            size=self.size,
+            expected_digests=dict(self.expected_digests),
+            digests=dict(self.digests),
+            error=self.error,
+            mismatches=self.mismatches,
+        )
+
+
+def compute_digests(location, digest_types=DIGEST_TYPES, use_mmap=False):
+    """
+    Return a tuple of (size, mapping of {digest type: hex digest}) for the
+    file at ``location`` reading it only once for all the ``digest_types``.
+    Memory-map the file instead of reading it in chunks if ``use_mmap`` is
+    True.
+    """
+    hashers = [hashlib.new(digest_type) for digest_type in digest_types]
+    size = 0
+    with open(location, 'rb') as inp:
+        if use_mmap and os.fstat(inp.fileno()).st_size:
+            with mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    size = len(view)
+                    for start in range(0, size, CHUNK_SIZE):
+                        chunk = view[start:start + CHUNK_SIZE]
+                        for hasher in hashers:
+                            hasher.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+        else:
+            chunk = inp.read(CHUNK_SIZE)
+            while chunk:
+                size += len(chunk)
+                for hasher in hashers:
+                    hasher.update(chunk)
+                chunk = inp.read(CHUNK_SIZE)
+
+    digests = {
+        digest_type: hasher.hexdigest()
+        for digest_type, hasher in zip(digest_types, hashers)
+    }
+    return size, digests
+
+
+class DigestingReader(io.RawIOBase):
+    """
+    A raw binary stream that computes the size and digests of the bytes read
+    from a wrapped ``file_object`` as they are read. Wrap it in an
+    io.BufferedReader to parse a file while checking its digests, such that
+    the file is read only once. Call ``drain()`` once done parsing to include
+    any unread remainder in the digests.
+    """
+
+    def __init__(self, file_object, digest_types=DIGEST_TYPES):
+        self.file_object = file_object
+        self.digest_types = tuple(digest_types)
+        self.hashers = [hashlib.new(digest_type) for digest_type in self.digest_types]
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.file_object.readinto(buffer)
+        if count:
+            with memoryview(buffer)[:count] as chunk:
+                for hasher in self.hashers:
+                    hasher.update(chunk)
+            self.size += count
+        return count
+
+    def drain(self):
+        """
+        Read the wrapped file object to its end.
+        """
+        with memoryview(bytearray(CHUNK_SIZE)) as buffer:
+            while self.readinto(buffer):
+                pass
+
+    def get_digests(self):
+        """
+        Return a mapping of {digest type: hex digest} of the bytes read so far.
+        """
+        return {
+            digest_type: hasher.hexdigest()
+            for digest_type, hasher in zip(self.digest_types, self.hashers)
+        }
+
+    def close(self):
+        if not self.closed:
+            self.file_object.close()
+        super().close()
+
+
+def verify_file(file, location, use_mmap=False):
+    """
+    Return a FileVerification for a debcon.File ``file`` checked against the
+    actual file at ``location``. Only the digests with an expected value are
+    computed.
+    """
+    verification = FileVerification.from_file(file=file, location=location)
+    try:
+        verification.size, verification.digests = compute_digests(
+            location=location,
+            digest_types=tuple(verification.expected_digests),
+            use_mmap=use_mmap,
+        )
+    except OSError as e:
+        verification.error = f'Cannot read file: {location}: {e}'
+    return verification
+
+
+def is_plain_file_name(name):
+    """
+    Return True if a file ``name`` listed in a control file is a plain file
+    name that cannot point outside of the directory of the control file: it is
+    not empty, not absolute and has no path separator and no "..".
+    """
+    separators = {'/', '\\', os.sep, os.altsep} - {None}
+    return bool(
+        name
+        and name not in ('.', '..')
+        and not any(sep in name for sep in separators)
+        and not os.path.isabs(name)
+    )
+
+
+def verify_files(files, base_dir, max_workers=DEFAULT_MAX_WORKERS, use_mmap=False):
+    """
+    Return a list of FileVerification, one for each debcon.File of a ``files``
+    iterable, in the same order. The files are found in the ``base_dir``
+    directory and verified in parallel with ``max_workers`` threads. A file
+    whose name is not a plain file name is not read and has an error.
+    """
+    files = list(files)
+
+    def verify(file):
+        if not is_plain_file_name(file.name):
+            verification = FileVerification.from_file(file=file, location=None)
+            verification.error = f'Invalid file name: {file.name!r}'
+            return verification
+        return verify_file(
+            file=file,
+            location=os.path.join(base_dir, file.name),
+            use_mmap=use_mmap,
+        )
+
+    if max_workers and max_workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(verify, files))
+    return [verify(file) for file in files]
+
+
+def verify_dsc(location, base_dir=None, max_workers=DEFAULT_MAX_WORKERS, use_mmap=False):
+    """
+    Return a list of FileVerification for each file listed in the "Files" and
+    "Checksums-*" fields of the .dsc file at ``location``. The files are found
+    in the ``base_dir`` directory, which defaults to the directory of the
+    .dsc file. A file with inconsistent sizes in these fields or not listed in
+    the "Files" field has an error.
+    """
+    data = debcon.get_paragraph_data_from_file(location, remove_pgp_signature=True)
+    files, errors = debcon.collect_files_and_errors(data)
+    if base_dir is None:
+        base_dir = os.path.dirname(location)
+    verifications = verify_files(
+        files=files.values(),
+        base_dir=base_dir,
+        max_workers=max_workers,
+        use_mmap=use_mmap,
+    )
+    for verification in verifications:
+        file_errors = errors.get(verification.name)
+        if file_errors:
+            if verification.error:
+                file_errors = [verification.error] + file_errors
+            verification.error = '; '.join(file_errors)
+    return verifications
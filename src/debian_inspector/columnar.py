@@ -0,0 +1,265 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from array import array
+import csv
+import json
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import debcon
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Build columns of field values from Debian control file paragraphs such as the
+paragraphs of a Packages file, for analytics.
+
+Paragraphs are accumulated directly in one column per field, without keeping a
+list of paragraph data mappings:
+
+- the values of low-cardinality fields such as Architecture or Section are
+  stored as integer codes in an ``array`` of a dictionary of strings shared by
+  all these fields,
+- the values of size fields are stored as integers in an ``array``,
+- the values of other fields are stored as strings in a list.
+
+Columns can be exported to CSV, JSON lines or to a NumPy structured array if
+NumPy is installed.
+"""
+
+# Names of the fields with few distinct values that are stored as codes of a
+# shared dictionary of strings.
+DICTIONARY_FIELDS = frozenset([
+    'architecture',
+    'section',
+    'priority',
+    'maintainer',
+])
+
+# Names of the fields with integer values.
+INTEGER_FIELDS = frozenset([
+    'installed-size',
+    'size',
+])
+
+# Code or integer value of a missing value in an array column.
+MISSING = -1
+
+
+@attrs
+class StringDictionary(object):
+    """
+    A dictionary of strings that encodes each distinct string as an integer
+    code.
+    """
+    # list of strings where the index of a string is its code
+    values = attrib(default=Factory(list))
+    # mapping of {string: code}
+    codes_by_value = attrib(default=Factory(dict), repr=False)
+
+    def encode(self, value):
+        """
+        Return the integer code of a ``value`` string, adding it to this
+        dictionary if needed.
+        """
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = self.codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        """
+        Return the string of an integer ``code`` or None for a MISSING code.
+        """
+        if code == MISSING:
+            return None
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+@attrs
+class ColumnarBuilder(object):
+    """
+    Columns of field values built from Debian control file paragraphs.
+    """
+    # list of the lowercase names of the fields to keep in column order or
+    # None to keep all the fields in the order they are first found
+    fields = attrib(default=None)
+    # mapping of {field name: column} where a column is an array of codes of
+    # the shared dictionary, an array of integers or a list of strings
+    columns = attrib(default=Factory(dict), repr=False)
+    # shared dictionary of the values of the DICTIONARY_FIELDS
+    dictionary = attrib(default=Factory(StringDictionary), repr=False)
+    # number of paragraphs added so far
+    count = attrib(default=0)
+    # mapping of {field name: function to append a value to its column}
+    _appenders = attrib(default=Factory(dict), repr=False, init=False, eq=False)
+
+    def __attrs_post_init__(self, *args, **kwargs):
+        if self.fields is not None:
+            self.fields = [f.lower() for f in self.fields]
+            for name in self.fields:
+                self._add_column(name)
+
+    @classmethod
+    def from_file(cls, location, fields=None):
+        """
+        Return a new ColumnarBuilder from the paragraphs of the control file at
+        ``location`` read one paragraph at a time. Only keep the ``fields``
+        list of field names if provided, skipping the other fields when
+        parsing.
+        """
+        builder = cls(fields=fields)
+        paragraphs = debcon.get_paragraphs_data_from_file(location, fields=fields)
+        builder.add_paragraphs(paragraphs)
+        return builder
+
+    def _add_column(self, name):
+        """
+        Add a new column for the field ``name`` filled with missing values for
+        the paragraphs added so far.
+        """
+        if name in DICTIONARY_FIELDS:
+            column = array('l', [MISSING]) * self.count
+            append = column.append
+            encode = self.dictionary.encode
+
+            def append_value(value):
+                append(MISSING if value is None else encode(value))
+
+        elif name in INTEGER_FIELDS:
+            column = array('q', [MISSING]) * self.count
+            append = column.append
+
+            def append_value(value):
+                # a value that is not an integer is missing
+                append(int(value) if value and value.isdigit() else MISSING)
+
+        else:
+            column = [None] * self.count
+            append_value = column.append
+
+        self.columns[name] = column
+        self._appenders[name] = append_value
+
+    def add(self, data):
+        """
+        Add a paragraph ``data`` mapping of {lowercase field name: value} as
+        returned by ``debcon.get_paragraph_data()``.
+        """
+        if self.fields is None:
+            for name in data:
+                if name not in self.columns:
+                    self._add_column(name)
+
+        get = data.get
+        for name, append_value in self._appenders.items():
+            append_value(get(name))
+        self.count += 1
+
+    def add_paragraphs(self, paragraphs):
+        """
+        Add a ``paragraphs`` iterable of paragraph data mappings.
+        """
+        for data in paragraphs:
+            self.add(data)
+
+    def __len__(self):
+        return self.count
+
+    def names(self):
+        """
+        Return a list of the field names of the columns in order.
+        """
+        return list(self.columns)
+
+    def get_column(self, name):
+        """
+        Return a list of the values of the field ``name`` for each paragraph,
+        with None for missing values.
+        """
+        column = self.columns[name]
+        if name in DICTIONARY_FIELDS:
+            return [self.dictionary.decode(code) for code in column]
+        if name in INTEGER_FIELDS:
+            return [None if value == MISSING else value for value in column]
+        return list(column)
+
+    def iter_rows(self):
+        """
+        Yield a tuple of field values for each paragraph in the order of
+        ``names()``, with None for missing values.
+        """
+        decode = self.dictionary.decode
+        columns = []
+        for name, column in self.columns.items():
+            if name in DICTIONARY_FIELDS:
+                columns.append(decode(code) for code in column)
+            elif name in INTEGER_FIELDS:
+                columns.append(None if value == MISSING else value for value in column)
+            else:
+                columns.append(column)
+        return zip(*columns)
+
+    def to_csv(self, output):
+        """
+        Write the columns to an ``output`` text file object as CSV with a header
+        row of the field names. Missing values are empty.
+        """
+        writer = csv.writer(output)
+        writer.writerow(self.names())
+        for row in self.iter_rows():
+            writer.writerow(row)
+
+    def to_jsonl(self, output):
+        """
+        Write the columns to an ``output`` text file object as JSON lines with
+        one JSON object of the non-missing field values per paragraph.
+        """
+        names = self.names()
+        dumps = json.dumps
+        for row in self.iter_rows():
+            values = {name: value for name, value in zip(names, row) if value is not None}
+            output.write(dumps(values))
+            output.write('\n')
+
+    def to_numpy(self):
+        """
+        Return a NumPy structured array with one record per paragraph and one
+        field per column. Dictionary fields are kept as integer codes of the
+        shared ``dictionary`` values and integer fields as integers, with -1
+        for missing values. Other fields are Python strings or None.
+        """
+        if numpy is None:
+            raise Exception('NumPy is required to export to a NumPy array.')
+
+        dtypes = []
+        for name in self.columns:
+            if name in DICTIONARY_FIELDS:
+                dtypes.append((name, numpy.int32))
+            elif name in INTEGER_FIELDS:
+                dtypes.append((name, numpy.int64))
+            else:
+                dtypes.append((name, object))
+
+        records = numpy.empty(self.count, dtype=dtypes)
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                records[name] = numpy.frombuffer(column, dtype=column.typecode)
+            else:
+                records[name] = column
+        return records
@@ -9,6 +9,8 @@
 from collections import defaultdict
 import gzip
 
+from debian_inspector import debcon
+
 """
 Utilities to parse a Debian Contents index file.
 These are used by apt-file for instance
@@ -28,7 +30,7 @@ def parse_contents(location, has_header=True):
     """
     Return a mapping of {path: [list of packages]} and a mapping of
     {package: [list of paths]} from parsing a Debian Contents file at
-    ``location``.
+    ``location``. ``location`` can also be a binary file object.
     The Contents file are typically gzipped but we also accept plain text files.
 
     If ``has_header`` is True, the file is expected to have a header narrative
@@ -37,59 +39,72 @@ def parse_contents(location, has_header=True):
     See https://wiki.debian.org/DebianRepository/Format#A.22Contents.22_indices
     for format details.
     """
+    if not isinstance(location, str):
+        return parse_contents_lines(debcon.decompressed(location), has_header=has_header)
+
     if location.endswith('.gz'):
         opener, mode = gzip.GzipFile, 'rb'
     else:
         opener, mode = open, 'r'
 
+    with opener(location, mode=mode) as lines:
+        return parse_contents_lines(lines, has_header=has_header)
+
+
+def parse_contents_lines(lines, has_header=True):
+    """
+    Return a mapping of {path: [list of packages]} and a mapping of
+    {package: [list of paths]} from parsing a ``lines`` iterable of text or
+    bytes lines of a Debian Contents file. See ``parse_contents`` for details.
+    """
     packages_by_path = defaultdict(list)
     paths_by_package = defaultdict(list)
-    with opener(location, mode=mode) as lines:
-        if has_header:
-            # keep track if we are now in the table proper
-            # e.g. after the FILE  LOCATION header
-            # this is the case for Ubuntu
-            in_table = False
+
+    if has_header:
+        # keep track if we are now in the table proper
+        # e.g. after the FILE  LOCATION header
+        # this is the case for Ubuntu
+        in_table = False
+    else:
+        # if we have no header (like in Debian) we start right away.
+        in_table = True
+
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        left, _, right = line.strip().rpartition(' ')
+        left = left.strip()
+        right = right.strip()
+        if left == 'FILE' and right == 'LOCATION':
+            if not has_header:
+                raise Exception(
+                    'Invalid Contents file with a FILE/LOCATION header: '
+                    'call with has_header=True.'
+                )
+
+            if not in_table:
+                # The first row of the table SHOULD have the columns "FILE"
+                # and "LOCATION": This is the spec and used to be True for
+                # Debian. But nowadays only Ubuntu older do this.
+                in_table = True
         else:
-            # if we have no header (like in Debian) we start right away.
-            in_table = True
-
-        for line in lines:
-            if isinstance(line, bytes):
-                line = line.decode('utf-8')
-            left, _, right = line.strip().rpartition(' ')
-            left = left.strip()
-            right = right.strip()
-            if left == 'FILE' and right == 'LOCATION':
-                if not has_header:
-                    raise Exception(
-                        'Invalid Contents file with a FILE/LOCATION header: '
-                        'call with has_header=True.'
-                    )
-
-                if not in_table:
-                    # The first row of the table SHOULD have the columns "FILE"
-                    # and "LOCATION": This is the spec and used to be True for
-                    # Debian. But nowadays only Ubuntu older do this.
-                    in_table = True
-            else:
-                if not in_table:
-                    continue
-                path = left
-                packages = right
-                package_names = packages.split(',')
-                for archsec_name in package_names:
-                    # "A list of qualified package names, separated by comma. A
-                    # qualified package name has the form
-                    # [[$AREA/]$SECTION/]$NAME, where $AREA is the archive area,
-                    # $SECTION the package section, and $NAME the name of the
-                    # package."
-
-                    # NOTE: we ignore the arch and section for now
-                    archsec, _, package_name = archsec_name.rpartition('/')
-                    arch, _, section = archsec.rpartition('/')
-                    packages_by_path[path].append(package_name)
-                    paths_by_package[package_name].append(path)
+            if not in_table:
+                continue
+            path = left
+            packages = right
+            package_names = packages.split(',')
+            for archsec_name in package_names:
+                # "A list of qualified package names, separated by comma. A
+                # qualified package name has the form
+                # [[$AREA/]$SECTION/]$NAME, where $AREA is the archive area,
+                # $SECTION the package section, and $NAME the name of the
+                # package."
+
+                # NOTE: we ignore the arch and section for now
+                archsec, _, package_name = archsec_name.rpartition('/')
+                arch, _, section = archsec.rpartition('/')
+                packages_by_path[path].append(package_name)
+                paths_by_package[package_name].append(path)
 
     if not in_table:
         raise Exception('Invalid Content files without FILE/LOCATION header.')
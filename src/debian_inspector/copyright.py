@@ -221,7 +221,7 @@ class BaseParagraph(debcon.FieldMixin):
             if not value and not value.strip():
                 continue
 
-            name = field.name.replace('-', '_')
+            name = debcon.get_field_name(field.name).attribute
 
             # If there are duplicated fields, we keep them all, but rename them
             # with a number suffix; they will go in the extra_data mapping.
@@ -488,7 +488,20 @@ class DebianCopyright(object):
         return cls.from_fields_groups(fields_groups)
 
     @classmethod
-    def from_file(cls, location):
+    def from_file(cls, location, cache=None):
+        """
+        Return a DebianCopyright from the copyright file at ``location``. If a
+        ``cache`` ParseCache is provided, the DebianCopyright is loaded from
+        this cache if available or parsed and cached otherwise.
+        """
+        if cache is not None:
+            return cache.get_or_parse(
+                location=location,
+                kind='copyright',
+                parser=cls.from_file,
+                # subclasses do not share cached results
+                options=(f'{cls.__module__}.{cls.__qualname__}',),
+            )
         fields_groups = deb822.get_paragraphs_as_field_groups_from_file(location)
         return cls.from_fields_groups(fields_groups)
 
@@ -28,11 +28,13 @@ other existing libraries can do these:
   variety of copyright files even if they are not exactly well-formed
 """
 
+from bisect import bisect_left
 import re
 
 import attr
 
-from debian_inspector.debcon import read_text_file
+from debian_inspector.debcon import get_field_name
+from debian_inspector.debcon import read_text_lines
 
 
 def get_paragraphs_as_field_groups(text):
@@ -40,29 +42,140 @@ def get_paragraphs_as_field_groups(text):
     Yield lists of Deb822Field for each paragraph in a ``text`` each separated
     by one or more empty lines. Raise Exceptions on errors.
     """
-    return get_paragraphs_as_field_groups_from_lines(NumberedLine.lines_from_text(text))
+    yield from _get_paragraphs_as_field_groups(text)
+
+
+def _get_paragraphs_as_field_groups(text, start_line=1):
+    """
+    Yield lists of Deb822Field for each paragraph in a ``text`` whose first
+    line is the line number ``start_line`` and return the number of the last
+    line. This is the same as ``get_paragraphs_as_field_groups_from_lines``
+    but classifies the lines with a single regex pass over the ``text``.
+    """
+    fields_group = []
+    current_field = None
+    end_of_text = len(text)
+    number = start_line - 1
+    matches = _line_tokens(text)
+    match = next(matches)
+    # the empty match at the end of the text is not a line
+    while match.start() != end_of_text:
+        next_match = next(matches, None)
+        if next_match is not None and next_match.start() == end_of_text:
+            next_match = None
+        number += 1
+        kind = match.lastgroup
+
+        # See get_paragraphs_as_field_groups_from_lines for details on
+        # these rules.
+        if kind == BLANK:
+            if (
+                current_field
+                and next_match
+                and next_match.lastgroup not in (FIELD, BLANK)
+            ):
+                current_field.lines.append(NumberedLine(number=number, value=''))
+            elif fields_group:
+                yield clean_fields(fields_group)
+                fields_group = []
+                current_field = None
+
+        elif current_field and kind == CONTINUATION:
+            value = match.group(kind).rstrip()
+            current_field.lines.append(NumberedLine(number=number, value=value))
+
+        elif kind == FIELD:
+            name, _colon, value = match.group(kind).partition(':')
+            current_field = Deb822Field(
+                name=clean_field_name(name),
+                lines=[NumberedLine(number=number, value=value.strip())],
+            )
+            fields_group.append(current_field)
+
+        else:
+            if fields_group:
+                yield clean_fields(fields_group)
+
+            line = NumberedLine(number=number, value=match.group(kind))
+            yield [Deb822Field(name='unknown', lines=[line])]
+            fields_group = []
+            current_field = None
+
+        if next_match is None:
+            break
+        match = next_match
+
+    if fields_group:
+        yield clean_fields(fields_group)
+    return number
 
 
 def get_paragraphs_as_field_groups_from_file(location):
     """
     Yield lists of Deb822Field for each paragraph in a control file at
     ``location``. Raise Exceptions on errors.
+
+    The file is read incrementally and is never loaded whole in memory.
     """
     if not location:
         return []
-    return get_paragraphs_as_field_groups(read_text_file(location))
+    return _get_paragraphs_as_field_groups_from_text_lines(read_text_lines(location))
+
+
+def get_paragraphs_as_field_groups_from_file_object(file_object):
+    """
+    Yield lists of Deb822Field for each paragraph read incrementally from a
+    ``file_object`` iterable of text lines such as an opened text file. Raise
+    Exceptions on errors.
+    """
+    return _get_paragraphs_as_field_groups_from_text_lines(file_object)
+
+
+# Approximate size in characters of the blocks of lines parsed at once when
+# reading a file incrementally.
+BLOCK_SIZE = 256 * 1024
+
+
+def _get_paragraphs_as_field_groups_from_text_lines(lines):
+    """
+    Yield lists of Deb822Field for each paragraph of a ``lines`` iterable of
+    text lines ending with a line feed, parsed by blocks of about BLOCK_SIZE
+    characters. A block ends with a blank line before a field declaration
+    line: the paragraph always ends there, so the parsing of a block does not
+    depend on the next block.
+    """
+    block = []
+    block_size = 0
+    previous = None
+    start_line = 1
+    for line in lines:
+        if (
+            block_size >= BLOCK_SIZE
+            and not previous.strip()
+            and is_field_declaration(line)
+        ):
+            start_line = 1 + (yield from _get_paragraphs_as_field_groups(
+                ''.join(block), start_line=start_line))
+            block = []
+            block_size = 0
+        block.append(line)
+        block_size += len(line)
+        previous = line
+
+    if block:
+        yield from _get_paragraphs_as_field_groups(''.join(block), start_line=start_line)
 
 
 def get_paragraphs_as_field_groups_from_lines(numbered_lines):
     """
-    Yield lists of Deb822Field for each paragraph in a ``numbered_lines`` list
-    of NumberedLine. Raise Exceptions on errors.
+    Yield lists of Deb822Field for each paragraph in a ``numbered_lines``
+    iterable of NumberedLine. Raise Exceptions on errors.
+
+    The ``numbered_lines`` are consumed lazily with a single line lookahead.
     """
-    numbered_lines = list(numbered_lines)
-    last_idx = len(numbered_lines) - 1
     fields_group = []
     current_field = None
-    for idx, line in enumerate(numbered_lines):
+    for line, next_line in with_next(numbered_lines):
 
         # blank line: One or more blank line should terminates paragraph (e.g. a
         # fields_group) and starts a new one. There is one exception
@@ -74,9 +187,9 @@ def get_paragraphs_as_field_groups_from_lines(numbered_lines):
             # peek one line ahead if next is a header field...
             if (
                 current_field
-                and idx != last_idx
-                and not numbered_lines[idx + 1].is_field_declaration()
-                and not numbered_lines[idx + 1].is_blank()
+                and next_line
+                and not next_line.is_field_declaration()
+                and not next_line.is_blank()
             ):
                 current_field.add_continuation_line(line)
                 continue
@@ -119,6 +232,28 @@ def get_paragraphs_as_field_groups_from_lines(numbered_lines):
         yield fields_group
 
 
+def with_next(iterable):
+    """
+    Yield tuples of (item, next item) for each item of an ``iterable``. The
+    next item is None for the last item.
+
+    For example:
+
+    >>> list(with_next([1, 2, 3]))
+    [(1, 2), (2, 3), (3, None)]
+    >>> list(with_next([]))
+    []
+    """
+    iterator = iter(iterable)
+    current = next(iterator, None)
+    if current is None:
+        return
+    for following in iterator:
+        yield current, following
+        current = following
+    yield current, None
+
+
 def clean_fields(fields):
     """
     Clean and return a ``fields`` list of Deb822Field.
@@ -209,6 +344,22 @@ class NumberedLine:
             for number, value in enumerate(text.splitlines(False), 1)
         ]
 
+    @classmethod
+    def lines_from_iterable(cls, lines, start_line=1):
+        """
+        Yield Line from a ``lines`` iterable of text lines such as a file
+        object. Lines are split and numbered exactly as ``lines_from_text``
+        would do with the joined text of all ``lines``. Numbering starts at
+        ``start_line``.
+        """
+        number = start_line - 1
+        for line in lines:
+            # a file object splits lines only on line feeds, but str.splitlines
+            # also splits on form feeds and other separators.
+            for value in line.splitlines(False):
+                number += 1
+                yield cls(number=number, value=value)
+
     def to_dict(self):
         return attr.asdict(self)
 
@@ -264,20 +415,333 @@ class Deb822Field:
             return
 
         name, _colon, value = line.value.partition(':')
-        name = name.strip().lower()
+        name = clean_field_name(name)
         if not name:
             return
 
-        # There are some cases where Debian copyright files spells the
-        # license field of a paragraph as "licence". We must correct this
-        # otherwise the license information will be stored under "licence"
-        # instead of "license".
-        if name == 'licence':
-            name = 'license'
-
         value = value.strip()
         first_line = NumberedLine(number=line.number, value=value)
         return cls(name=name, lines=[first_line])
 
     def to_dict(self):
         return attr.asdict(self)
+
+
+def clean_field_name(name):
+    """
+    Return a field ``name`` string normalized as stripped and lowercase.
+    """
+    name = get_field_name(name).name
+    # There are some cases where Debian copyright files spells the
+    # license field of a paragraph as "licence". We must correct this
+    # otherwise the license information will be stored under "licence"
+    # instead of "license".
+    if name == 'licence':
+        name = 'license'
+    return name
+
+
+@attr.s(slots=True)
+class Deb822FieldSpan:
+    """
+    A compact equivalent of a Deb822Field that does not keep its lines. It
+    only tracks the start and end offsets of the field in a ``source`` text
+    shared by all the fields of that text, and the number of its first line.
+    The text and end line are computed on demand.
+    """
+    # field name, normalized as stripped and lowercase
+    name = attr.ib()
+
+    source = attr.ib(repr=False, eq=False)
+
+    # offset of the start of the field declaration line
+    start_offset = attr.ib()
+
+    # offset of the end of the last non-blank line of the field, excluding the
+    # line terminator
+    end_offset = attr.ib()
+
+    start_line = attr.ib()
+
+    # True for a synthetic "unknown" field crafted for a line that is neither
+    # a field declaration nor a continuation
+    is_synthetic = attr.ib(default=False)
+
+    @property
+    def end_line(self):
+        return self.start_line + len(self.get_raw_lines()) - 1
+
+    @property
+    def text(self):
+        return '\n'.join(self.get_values())
+
+    def get_raw_lines(self):
+        """
+        Return a list of the source text lines of this field.
+        """
+        return self.source[self.start_offset:self.end_offset].splitlines(False)
+
+    def get_values(self):
+        """
+        Return a list of line values of this field, cleaned the same way as
+        the values of the NumberedLine of a Deb822Field.
+        """
+        lines = self.get_raw_lines()
+        if self.is_synthetic:
+            return lines
+        _name, _colon, first = lines[0].partition(':')
+        values = [first.strip()]
+        values.extend(line.rstrip() for line in lines[1:])
+        return values
+
+    def to_field(self):
+        """
+        Return a Deb822Field built from this field span.
+        """
+        lines = [
+            NumberedLine(number=number, value=value)
+            for number, value in enumerate(self.get_values(), self.start_line)
+        ]
+        return Deb822Field(name=self.name, lines=lines).rstrip()
+
+
+def get_paragraphs_as_field_spans(text, start_offset=0, start_line=1):
+    """
+    Yield lists of Deb822FieldSpan for each paragraph in a ``text`` each
+    separated by one or more empty lines.
+
+    This applies the same rules as ``get_paragraphs_as_field_groups`` and the
+    spans of each group can be converted to the same Deb822Field with their
+    ``to_field()`` method. But this does not keep any object per line and
+    allocates only one small object per field.
+
+    Optionally start parsing at the ``start_offset`` of the ``text`` which is
+    the start of the line number ``start_line``.
+    """
+    fields_group = []
+    current_field = None
+    tokens = iter_line_tokens(text, start_offset=start_offset, start_line=start_line)
+    for (number, kind, start, end), next_token in with_next(tokens):
+
+        # See get_paragraphs_as_field_groups_from_lines for details on
+        # these rules.
+        if kind == BLANK:
+            if (
+                current_field
+                and next_token
+                and next_token[1] not in (FIELD, BLANK)
+            ):
+                # A blank continuation line: we never extend a field to a blank
+                # line, only to the next non-blank line if any. Trailing blank
+                # lines are therefore stripped by construction.
+                continue
+
+            if fields_group:
+                yield fields_group
+                fields_group = []
+                current_field = None
+
+        elif current_field and kind == CONTINUATION:
+            current_field.end_offset = end
+
+        elif kind == FIELD:
+            name, _colon, _value = text[start:end].partition(':')
+            current_field = Deb822FieldSpan(
+                name=clean_field_name(name),
+                source=text,
+                start_offset=start,
+                end_offset=end,
+                start_line=number,
+            )
+            fields_group.append(current_field)
+
+        else:
+            if fields_group:
+                yield fields_group
+
+            yield [
+                Deb822FieldSpan(
+                    name='unknown',
+                    source=text,
+                    start_offset=start,
+                    end_offset=end,
+                    start_line=number,
+                    is_synthetic=True,
+                )
+            ]
+            fields_group = []
+            current_field = None
+
+    if fields_group:
+        yield fields_group
+
+
+# Line token kinds, named after the groups of the _line_tokens regex
+BLANK = 'blank'
+FIELD = 'field'
+CONTINUATION = 'continuation'
+OTHER = 'other'
+
+# A single-pass tokenizer for the lines of a deb822 text: each match is one
+# line and the name of the matched group is the line kind. Lines are split on
+# the same line terminators as str.splitlines(). The classification is the
+# same as with the NumberedLine.is_blank(), is_field_declaration() and
+# is_field_continuation() methods.
+_line_tokens = re.compile(
+    r"""
+    (?:
+        (?P<field>[a-z]+[a-z0-9\-]*:[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*)
+      | (?P<continuation>[ \t]+\S[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*)
+      | (?P<blank>[^\S\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*)
+      | (?P<other>[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]+)
+    )
+    (?:\r\n|[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]|\Z)
+    """,
+    re.VERBOSE | re.IGNORECASE,
+).finditer
+
+
+def iter_line_tokens(text, start_offset=0, start_line=1):
+    """
+    Yield a (line number, kind, start offset, end offset) tuple for each line
+    of a ``text``, where kind is one of BLANK, FIELD, CONTINUATION or OTHER.
+    The end offset excludes the line terminator.
+
+    Optionally start at the ``start_offset`` of the ``text`` which is the start
+    of the line number ``start_line``.
+    """
+    end_of_text = len(text)
+    for number, match in enumerate(_line_tokens(text, start_offset), start_line):
+        start = match.start()
+        # the empty match at the end of the text is not a line
+        if start == end_of_text:
+            break
+        kind = match.lastgroup
+        yield number, kind, start, match.end(kind)
+
+
+_line_ends = re.compile(r'\r\n|[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')
+
+
+def get_line_offset(text, line, start_offset=0, start_line=1):
+    """
+    Return the offset of the start of the line number ``line`` in a ``text``
+    scanning forward from ``start_offset`` which is the start of the line
+    number ``start_line``. Return the length of the text if there is no such
+    line.
+    """
+    offset = start_offset
+    for _ in range(line - start_line):
+        line_end = _line_ends.search(text, offset)
+        if not line_end:
+            return len(text)
+        offset = line_end.end()
+    return offset
+
+
+@attr.s
+class Deb822Document:
+    """
+    A deb822 ``text`` and its ``paragraphs`` as lists of Deb822FieldSpan that
+    can be updated incrementally when the text is edited.
+
+    For example:
+
+    >>> doc = Deb822Document.from_text('Files: *\\nLicense: foo\\n\\nLicense: bar\\n')
+    >>> [[f.name for f in p] for p in doc.paragraphs]
+    [['files', 'license'], ['license']]
+    >>> doc = doc.edit(2, 2, 'Copyright: me\\n\\nLicense: foo')
+    >>> [[(f.name, f.start_line) for f in p] for p in doc.paragraphs]
+    [[('files', 1), ('copyright', 2)], [('license', 4)], [('license', 6)]]
+    """
+    text = attr.ib()
+    paragraphs = attr.ib(default=attr.Factory(list), repr=False)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(text=text, paragraphs=list(get_paragraphs_as_field_spans(text)))
+
+    def get_field_groups(self):
+        """
+        Return a list of lists of Deb822Field for each paragraph as returned
+        by ``get_paragraphs_as_field_groups``.
+        """
+        return [[span.to_field() for span in spans] for spans in self.paragraphs]
+
+    def edit(self, start_line, end_line, replacement):
+        """
+        Replace the lines from ``start_line`` to ``end_line`` included with the
+        lines of a ``replacement`` text and update the text and paragraphs of
+        this document. Line numbers start at 1. Use an ``end_line`` of
+        ``start_line - 1`` to insert lines before ``start_line``. Return self.
+
+        Only the paragraphs affected by the edit are parsed again: the parse
+        restarts at the last paragraph that starts before ``start_line`` and
+        stops as soon as it reaches the start of an unchanged paragraph after
+        the edit. The following paragraphs are kept and only their offsets and
+        line numbers are shifted.
+        """
+        text = self.text
+        paragraphs = self.paragraphs
+
+        # the parsing state is always reset at the start of a paragraph. We
+        # restart before the paragraph at start_line, if any, since the end of
+        # a paragraph depends on the next line.
+        starts = [spans[0].start_line for spans in paragraphs]
+        restart_index = bisect_left(starts, start_line) - 1
+        if restart_index >= 0:
+            restart_offset = paragraphs[restart_index][0].start_offset
+            restart_line = starts[restart_index]
+        else:
+            restart_index = 0
+            restart_offset = 0
+            restart_line = 1
+
+        edit_start = get_line_offset(text, start_line, restart_offset, restart_line)
+        edit_end = get_line_offset(text, end_line + 1, edit_start, start_line)
+        old_lines = text[edit_start:edit_end]
+
+        new_lines = ''.join(f'{line}\n' for line in replacement.splitlines(False))
+        if new_lines:
+            if edit_start and edit_start == len(text) and not _line_ends.match(text[-1]):
+                # insert after a last line without terminator
+                new_lines = '\n' + new_lines[:-1]
+            elif edit_end == len(text) and old_lines and not _line_ends.match(text[-1]):
+                # replace a last line without terminator
+                new_lines = new_lines[:-1]
+
+        text = text[:edit_start] + new_lines + text[edit_end:]
+        offset_delta = len(new_lines) - len(old_lines)
+        line_delta = len(_line_ends.findall(new_lines)) - len(_line_ends.findall(old_lines))
+        new_lines_end = edit_start + len(new_lines)
+
+        # the paragraphs that start after the edit, keyed by their new start
+        resumable_index_by_start = {
+            spans[0].start_offset + offset_delta: index
+            for index, spans in enumerate(paragraphs[restart_index:], restart_index)
+            if spans[0].start_offset >= edit_end
+        }
+
+        updated = paragraphs[:restart_index]
+        resume_index = len(paragraphs)
+        for spans in get_paragraphs_as_field_spans(text, restart_offset, restart_line):
+            start = spans[0].start_offset
+            if start >= new_lines_end and start in resumable_index_by_start:
+                resume_index = resumable_index_by_start[start]
+                break
+            updated.append(spans)
+
+        for spans in paragraphs[resume_index:]:
+            for span in spans:
+                span.start_offset += offset_delta
+                span.end_offset += offset_delta
+                span.start_line += line_delta
+            updated.append(spans)
+
+        for spans in updated:
+            for span in spans:
+                span.source = text
+
+        self.text = text
+        self.paragraphs = updated
+        return self
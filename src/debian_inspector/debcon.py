@@ -8,13 +8,22 @@
 # Author: Peter Odding <peter@peterodding.com>
 # URL: https://github.com/xolox/python-deb-pkg-tools
 
+import bz2
+import codecs
 from collections.abc import Mapping
 from collections.abc import MutableMapping
 from collections.abc import Sequence
-import email
+from email import utils as email_utils
+import functools
+import gzip
 import io
+import itertools
+import lzma
+import os
 import re
+import sys
 import textwrap
+import threading
 
 from attr import attrs
 from attr import attrib
@@ -321,29 +330,49 @@ def collect_files(data):
     Return a mapping of {name: File} from a Debian data mapping.
 
     Note: the Files and Checksums-* fields have the same structure and
-    contain redundant data.
+    contain redundant data. Inconsistencies between these fields are ignored:
+    use ``collect_files_and_errors`` to report them.
     """
-    files = {}
-    for name, size, md5 in collect_file(data.get('files', [])):
-        f = File(md5, size , name)
-        files[name] = f
+    files, _errors = collect_files_and_errors(data)
+    return files
 
-    for name, size, sha1 in collect_file(data.get('checksums-sha1', [])):
-        f = files[name]
-        assert f.size == size
-        f.sha1 = sha1
 
-    for name, size, sha256 in collect_file(data.get('checksums-sha256', [])):
-        f = files[name]
-        assert f.size == size
-        f.sha256 = sha256
+# Mapping of {lowercase field name: File digest attribute} of the fields of
+# collect_files_and_errors() after the "Files" field.
+CHECKSUMS_FIELDS = {
+    'checksums-sha1': 'sha1',
+    'checksums-sha256': 'sha256',
+    'checksums-sha512': 'sha512',
+}
 
-    for name, size, sha512 in collect_file(data.get('checksums-v', [])):
-        f = files[name]
-        assert f.size == size
-        f.sha512 = sha512
 
-    return files
+def collect_files_and_errors(data):
+    """
+    Return a tuple of (mapping of {name: File}, mapping of {name: [list of
+    error messages]}) from a Debian data mapping. A file listed in a
+    Checksums-* field with a different size than in the Files field keeps the
+    size of the Files field and has an error. A file listed in a Checksums-*
+    field and not in the Files field is collected and has an error.
+    """
+    files = {}
+    errors = {}
+    for name, size, md5 in collect_file(data.get('files', [])):
+        files[name] = File(name=name, size=size, md5=md5)
+
+    for field_name, digest_type in CHECKSUMS_FIELDS.items():
+        normalized = normalize_control_field_name(field_name)
+        for name, size, digest in collect_file(data.get(field_name, [])):
+            f = files.get(name)
+            if f is None:
+                f = files[name] = File(name=name, size=size)
+                errors.setdefault(name, []).append(
+                    f'File listed in {normalized} but not in Files')
+            elif f.size != size:
+                errors.setdefault(name, []).append(
+                    f'Size {size} in {normalized} differs from size {f.size} in Files')
+            setattr(f, digest_type, digest)
+
+    return files, errors
 
 
 def collect_file(value):
@@ -370,7 +399,7 @@ class MaintainerField(FieldMixin):
         name = email_address = None
         if value:
             value = value.strip()
-            name, email_address = email.utils.parseaddr(value)  # NOQA
+            name, email_address = email_utils.parseaddr(value)
             if not name:
                 name = value
                 email_address = None
@@ -383,15 +412,281 @@ class MaintainerField(FieldMixin):
         return name.strip()
 
 
-def get_paragraphs_data_from_file(location):
+def get_paragraphs_data_from_file(location, fields=None, cache=None):
     """
     Yield paragraph data mappings from the Debian control file at `location`
     that contains multiple paragraphs (e.g. Package, status, copyright file,
     etc.).
+
+    `location` is either a file path or a file object opened in binary or text
+    mode. Files with a .gz, .xz or .bz2 extension and binary file objects with
+    a gzip, xz or bzip2 content are decompressed on the fly. The file is read
+    by chunks and parsed one paragraph at a time and is never loaded whole in
+    memory.
+
+    If `fields` is provided as a list of field names, only these fields are
+    returned, as in ``get_paragraph_data``.
+
+    If a `cache` ParseCache is provided, the paragraphs of a file path are
+    loaded from this cache if available or parsed at once and cached otherwise.
     """
     if not location:
         return []
-    return get_paragraphs_data(read_text_file(location))
+    if hasattr(location, 'read'):
+        return get_paragraphs_data_from_file_object(decompressed(location), fields=fields)
+    if cache is not None:
+        paragraphs = cache.get_or_parse(
+            location=location,
+            kind='paragraphs',
+            parser=lambda loc: list(_get_paragraphs_data_from_path(loc, fields=fields)),
+            options=(get_cache_options(fields),),
+        )
+        return iter(paragraphs)
+    return _get_paragraphs_data_from_path(location, fields=fields)
+
+
+def _get_paragraphs_data_from_path(location, fields=None):
+    with open_control_file(location) as file_object:
+        yield from get_paragraphs_data_from_file_object(file_object, fields=fields)
+
+
+def get_paragraphs_data_from_file_object(file_object, fields=None):
+    """
+    Yield paragraph data mappings from a `file_object` opened in binary or text
+    mode. Each paragraph of a binary file is decoded on its own, as UTF-8 or
+    else using a detected encoding. Optionally only return the `fields` list of
+    field names.
+    """
+    fields = get_field_names_set(fields)
+    for paragraph in read_paragraphs(file_object):
+        if isinstance(paragraph, bytes):
+            paragraph = decode_text(paragraph)
+        yield get_paragraph_data(paragraph, fields=fields)
+
+
+# Size of the chunks read from a file to split it in paragraphs.
+CHUNK_SIZE = 64 * 1024
+
+_text_paragraph_patterns = (
+    '\n', '\r', ' \t\n',
+    re.compile(r'\n\n(?:[ \t]*\n)*').split,
+    re.compile(r'(?:[ \t]*\n)*').match,
+)
+
+_bytes_paragraph_patterns = (
+    b'\n', b'\r', b' \t\n',
+    re.compile(br'\n\n(?:[ \t]*\n)*').split,
+    re.compile(br'(?:[ \t]*\n)*').match,
+)
+
+
+def read_paragraphs(file_object, chunk_size=CHUNK_SIZE):
+    """
+    Yield paragraphs read by chunks of ``chunk_size`` from a ``file_object``
+    opened in binary or text mode. Each paragraph is a bytes or text string
+    with "\\n" line terminators. Only one chunk and the current paragraph are
+    kept in memory.
+
+    Paragraphs are split the same way as in ``split_in_paragraphs``, after
+    translating "\\r\\n" and "\\r" line terminators to "\\n" as in
+    universal newlines mode. Leading and trailing blank lines are skipped.
+    """
+    chunk = file_object.read(chunk_size)
+    if not chunk:
+        return
+
+    if isinstance(chunk, bytes):
+        patterns = _bytes_paragraph_patterns
+    else:
+        patterns = _text_paragraph_patterns
+    lf, cr, blanks, split_paragraphs, match_blank_lines = patterns
+
+    pending = chunk[:0]
+    after_separator = True
+    while True:
+        if chunk:
+            pending += chunk
+            # split only complete lines: a "\r" at the end may be the start
+            # of a "\r\n" in the next chunk
+            end = max(pending.rfind(lf), pending.rfind(cr, 0, -1)) + 1
+        else:
+            end = len(pending)
+
+        lines = pending[:end]
+        pending = pending[end:]
+        if cr in lines:
+            lines = lines.replace(cr + lf, lf).replace(cr, lf)
+        if after_separator:
+            lines = lines[match_blank_lines(lines).end():]
+
+        paragraphs = split_paragraphs(lines)
+        # the last paragraph may continue in the next chunk
+        last = paragraphs.pop()
+        for paragraph in paragraphs:
+            if paragraph:
+                yield paragraph
+
+        if last or paragraphs:
+            after_separator = not last
+        pending = last + pending
+
+        if not chunk:
+            # skip trailing blank lines
+            if pending.strip(blanks):
+                yield pending
+            return
+
+        chunk = file_object.read(chunk_size)
+
+
+# Mapping of {file extension: (magic bytes, opener)} for compressed files.
+_compressions = {
+    '.gz': (b'\x1f\x8b', gzip.open),
+    '.xz': (b'\xfd7zXZ\x00', lzma.open),
+    '.bz2': (b'BZh', bz2.open),
+}
+
+
+def open_control_file(location):
+    """
+    Return a binary file object opened for reading from the file at
+    `location`. The file is decompressed if it has a .gz, .xz or .bz2
+    extension.
+    """
+    _base, extension = os.path.splitext(location)
+    _magic, opener = _compressions.get(extension.lower(), (None, open))
+    return opener(location, 'rb')
+
+
+def decompressed(file_object):
+    """
+    Return a file object that decompresses a `file_object` binary file object
+    if its content is compressed with gzip, xz or bzip2 or return the
+    `file_object` as-is otherwise. Only file objects that can peek at their
+    content without consuming it, such as buffered binary files, are checked
+    for compression.
+    """
+    peek = getattr(file_object, 'peek', None)
+    if not peek:
+        return file_object
+    start = peek(8)
+    if not isinstance(start, bytes):
+        return file_object
+    for magic, opener in _compressions.values():
+        if start.startswith(magic):
+            return opener(file_object, 'rb')
+    return file_object
+
+
+# Lowercase names of the fields whose values are a list of lines that start on
+# the line after the field name, such as the "Files" of a Sources file.
+LINE_LIST_FIELDS = frozenset([
+    'checksums-sha1',
+    'checksums-sha256',
+    'checksums-sha512',
+    'files',
+    'package-list',
+])
+
+# Size of the text buffered before writing to a file.
+WRITE_BUFFER_SIZE = 256 * 1024
+
+
+def _get_continuation_lines(value):
+    """
+    Return a multi-line field ``value`` with its continuation lines indented
+    and its empty lines replaced by a " ." line such that they are not read
+    as the end of a paragraph.
+    """
+    first, *lines = value.rstrip().split('\n')
+    lines = [
+        ' .' if not line.strip() else line if line[0] in ' \t' else ' ' + line
+        for line in lines
+    ]
+    return '\n'.join([first] + lines)
+
+
+def write_paragraphs(output, paragraphs, field_order=()):
+    """
+    Write a ``paragraphs`` iterable of paragraph data mappings to ``output``
+    in the deb822 format and return the number of paragraphs written.
+
+    ``output`` is either the location of a file to create that is compressed
+    with gzip, xz or bzip2 if it has a .gz, .xz or .bz2 extension, or a text
+    or binary file object where text is written as UTF-8.
+
+    Fields are written in the order of a ``field_order`` list of field names
+    first and then in their paragraph order. Field names are written with
+    their conventional capitalization.
+    """
+    if isinstance(output, str):
+        _base, extension = os.path.splitext(output)
+        _magic, opener = _compressions.get(extension.lower(), (None, open))
+        with opener(output, 'wb') as file_object:
+            return write_paragraphs(file_object, paragraphs, field_order=field_order)
+
+    if isinstance(output, io.TextIOBase):
+        write = output.write
+    else:
+        def write(text):
+            output.write(text.encode('utf-8'))
+
+    field_order = [name.lower() for name in field_order]
+    ordered_names = frozenset(field_order)
+
+    # mapping of {field name: ("Name:" prefix, is a list of lines)} computed
+    # once for each name
+    prefixes = {}
+
+    def get_prefix(name):
+        prefix = prefixes[name] = (
+            normalize_control_field_name(name) + ':',
+            name.lower() in LINE_LIST_FIELDS,
+        )
+        return prefix
+
+    buffer = []
+    buffered = 0
+    count = 0
+    for data in paragraphs:
+        if count:
+            buffer.append('\n')
+        count += 1
+
+        names = list(data)
+        if field_order:
+            # keys can have any case: match them on their lowercase names
+            names_by_lower = {name.lower(): name for name in names}
+            names = (
+                [names_by_lower[name] for name in field_order if name in names_by_lower]
+                + [name for name in names if name.lower() not in ordered_names]
+            )
+        for name in names:
+            value = data[name]
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                value = str(value)
+            prefix, is_line_list = prefixes.get(name) or get_prefix(name)
+            if is_line_list:
+                lines = (v.strip() for v in value.splitlines())
+                line = prefix + ''.join('\n ' + v for v in lines if v)
+            elif '\n' in value:
+                line = prefix + ' ' + _get_continuation_lines(value)
+            else:
+                line = prefix + ' ' + value
+            buffer.append(line)
+            buffer.append('\n')
+            buffered += len(line)
+
+        if buffered >= WRITE_BUFFER_SIZE:
+            write(''.join(buffer))
+            buffer = []
+            buffered = 0
+
+    if buffer:
+        write(''.join(buffer))
+    return count
 
 
 def split_in_paragraphs(text):
@@ -404,32 +699,101 @@ def split_in_paragraphs(text):
             yield p
 
 
-def get_paragraphs_data(text):
+def iter_paragraph_lines(lines):
+    """
+    Yield tuples of (offset, line number, list of lines) for each paragraph in
+    a ``lines`` iterable of text or bytes lines with their line terminators,
+    such as a file object. The offset is the offset of the first line of a
+    paragraph from the start of ``lines``, in bytes for bytes lines, and the
+    line number of this first line starts at 1.
+
+    Paragraphs are separated by an empty line followed by any number of lines
+    with only spaces or tabs, the same way as in ``split_in_paragraphs``.
+    """
+    eol = blank = None
+    offset = 0
+    paragraph = []
+    paragraph_offset = paragraph_line = None
+    in_separator = True
+    for number, line in enumerate(lines, 1):
+        if eol is None:
+            if isinstance(line, bytes):
+                eol, blank = b'\r\n', b' \t'
+            else:
+                eol, blank = '\r\n', ' \t'
+
+        content = line.rstrip(eol)
+        if not content:
+            if paragraph:
+                yield paragraph_offset, paragraph_line, paragraph
+                paragraph = []
+            in_separator = True
+
+        elif not (in_separator and not content.strip(blank)):
+            if not paragraph:
+                paragraph_offset = offset
+                paragraph_line = number
+            paragraph.append(line)
+            in_separator = False
+
+        offset += len(line)
+
+    if paragraph:
+        yield paragraph_offset, paragraph_line, paragraph
+
+
+def get_paragraphs_data(text, fields=None):
     """
     Yield paragraph data mappings from the Debian control `text` string that
     contains multiple paragraphs (e.g. Package, status, copyright file, etc.).
+
+    If `fields` is provided as a list of field names, only these fields are
+    returned, as in ``get_paragraph_data``.
     """
+    fields = get_field_names_set(fields)
     for para in split_in_paragraphs(text or ''):
-        yield get_paragraph_data(para)
+        yield get_paragraph_data(para, fields=fields)
 
 
-def get_paragraph_data_from_file(location, remove_pgp_signature=False):
+def get_paragraph_data_from_file(location, remove_pgp_signature=False, fields=None):
     """
     Return paragraph data from the Debian control file at `location` that
     contains a single paragraph (e.g. a dsc file).
 
     Optionally remove a wrapping PGP signature if `remove_pgp_signature` is
-    True.
+    True. Optionally only return the `fields` list of field names.
     """
     if not location:
         return []
     return get_paragraph_data(
         read_text_file(location),
         remove_pgp_signature=remove_pgp_signature,
+        fields=fields,
     )
 
 
-def get_paragraph_data(text, remove_pgp_signature=False):
+def get_cache_options(fields):
+    """
+    Return a sorted tuple of lowercase field names from a `fields` list of field
+    names, suitable to use as a ParseCache option, or None.
+    """
+    fields = get_field_names_set(fields)
+    return tuple(sorted(fields)) if fields else None
+
+
+def get_field_names_set(fields):
+    """
+    Return a frozenset of normalized lowercase field names from a `fields`
+    iterable of field names or None if `fields` is empty.
+    """
+    if not fields:
+        return
+    if isinstance(fields, str):
+        fields = [fields]
+    return frozenset(get_field_name(name).name for name in fields)
+
+
+def get_paragraph_data(text, remove_pgp_signature=False, fields=None):
     """
     Return paragraph data from the Debian control `text`. The paragraph data is
     an ordered mapping of {name: value} fields. If there is data that is not
@@ -442,6 +806,10 @@ def get_paragraph_data(text, remove_pgp_signature=False):
 
     Optionally remove a wrapping PGP signature if `remove_pgp_signature` is
     True.
+
+    If `fields` is provided as a list of field names, only return the fields
+    with these case-insensitive names and the "unknown" field, if any. The
+    other fields are skipped without building their values.
     """
     if not text:
         return {'unknown': text}
@@ -449,20 +817,19 @@ def get_paragraph_data(text, remove_pgp_signature=False):
     if remove_pgp_signature:
         text = unsign.remove_signature(text)
 
-    try:
-        mls = email.message_from_string(text)
-    except UnicodeEncodeError:
-        t = text.encode('utf-8')
-        mls = email.message_from_string(t)
-
-    items = list(mls.items())
+    fields = get_field_names_set(fields)
+    parsed = _parse_paragraph(text, fields=fields)
+    if not parsed:
+        return {'unknown': text}
 
-    if not items or mls.defects:
+    items, payload, has_fields = parsed
+    # a paragraph without any field is not valid, but a paragraph without any
+    # of the requested fields is
+    if not has_fields:
         return {'unknown': text}
 
     # in a header-only email we should not have a payload. Yet when this happens
     # we should no ignore it either, so let's treat this as "unknown"
-    payload = mls.get_payload()
     if payload:
         items.append(('unknown', payload))
 
@@ -470,7 +837,7 @@ def get_paragraph_data(text, remove_pgp_signature=False):
     for name, value in items:
         # we do not preserve case: debian field names are case-insensitive AND
         # we use a normalized lowercase version throughout.
-        name = name.lower().strip()
+        name = get_field_name(name).name
         value = value.strip()
         if name in data:
             existing_values = data.get(name, '').splitlines()
@@ -481,6 +848,132 @@ def get_paragraph_data(text, remove_pgp_signature=False):
     return data
 
 
+# A header field line with its name and a value that spans its continuation
+# lines, if any, up to and including the terminator of its last line.
+_header_field = re.compile(
+    r'([\041-\071\073-\176]*):'
+    r'([^\r\n]*(?:(?:\r\n|\r|\n)[ \t][^\r\n]*)*)'
+    r'(?:\r\n|\r|\n)?'
+).match
+
+# A text with only "\n"-terminated header fields, the common case.
+_header_fields_only = re.compile(
+    r'(?:[\041-\071\073-\176]+:.*(?:\n[ \t].*)*\n)*'
+    r'[\041-\071\073-\176]+:.*(?:\n[ \t].*)*\n?'
+).fullmatch
+
+_header_fields = re.compile(
+    r'([\041-\071\073-\176]+):[ \t]*(.*(?:\n[ \t].*)*)'
+).findall
+
+
+@functools.lru_cache(maxsize=32)
+def _get_header_fields_finder(fields):
+    """
+    Return a callable that finds the items of a text with only "\\n"-terminated
+    header fields, restricted to the case-insensitive field names of a
+    ``fields`` frozenset. The text of the other fields is skipped by the regex
+    engine without building strings.
+    """
+    names = '|'.join(re.escape(name) for name in sorted(fields))
+    return re.compile(
+        r'^(' + names + r'):[ \t]*(.*(?:\n[ \t].*)*)',
+        re.MULTILINE | re.IGNORECASE | re.ASCII,
+    ).findall
+
+
+_line_end = re.compile(r'\r\n|\r|\n').search
+
+
+def parse_paragraph(text, fields=None):
+    """
+    Return a tuple of (list of (name, value) items, payload string) parsed
+    from a Debian control paragraph ``text``, or None if the ``text`` is not a
+    valid paragraph. If ``fields`` is provided as a set of lowercase field
+    names, only the items with one of these names are returned.
+
+    This is a fast replacement for parsing the ``text`` as an email message
+    with headers and a body using ``email.message_from_string()``: the items
+    are the same as the message headers and the payload is the same as the
+    message body. And the ``text`` is not valid if the message would have
+    any defect. Names and values are not normalized. MIME headers such as
+    "Content-Type" have no special meaning.
+    """
+    parsed = _parse_paragraph(text, fields=fields)
+    if parsed:
+        items, payload, _has_fields = parsed
+        return items, payload
+
+
+def _parse_paragraph(text, fields=None):
+    """
+    Return a tuple of (items, payload, has fields) as in ``parse_paragraph``
+    where has fields is True if the ``text`` has any field, even if none of
+    the ``fields``, or None if the ``text`` is not a valid paragraph.
+    """
+    if '\r' not in text and _header_fields_only(text):
+        # this matches at least one field
+        if fields:
+            return _get_header_fields_finder(frozenset(fields))(text), '', True
+        return _header_fields(text), '', True
+
+    items = []
+    has_fields = False
+    pos = 0
+    end = len(text)
+    is_first_line = True
+    while pos < end:
+        char = text[pos]
+
+        if char in '\r\n':
+            # an empty line is the separator between headers and the body
+            pos += 2 if text.startswith('\r\n', pos) else 1
+            return items, text[pos:], has_fields
+
+        field = _header_field(text, pos)
+        if field:
+            name = field.group(1)
+            if not name:
+                # invalid header without a name
+                return
+            if not fields or name.lower() in fields:
+                items.append((name, field.group(2).lstrip(' \t')))
+            has_fields = True
+            pos = field.end()
+            is_first_line = False
+            continue
+
+        if char in ' \t':
+            # a continuation line without a preceding header
+            return
+
+        if not text.startswith('From ', pos):
+            # missing header/body separator
+            return
+
+        line_end = _line_end(text, pos)
+        next_pos = line_end.end() if line_end else end
+        if is_first_line:
+            # ignore an envelope "From " first line
+            pos = next_pos
+            is_first_line = False
+            continue
+
+        if next_pos == end:
+            return items, text[pos:], has_fields
+
+        if text[next_pos] in '\r\n':
+            # an envelope last header line is the start of the body, before
+            # the text after the separator
+            body_pos = next_pos + (2 if text.startswith('\r\n', next_pos) else 1)
+            return items, text[pos:next_pos] + text[body_pos:], has_fields
+
+        # a misplaced envelope line, or a missing header/body separator
+        return
+
+    return items, '', has_fields
+
+
 def line_separated(value):
     """
     Return a list of values from a `value` string using line as list delimiters.
@@ -521,17 +1014,200 @@ def space_separated(value):
 def read_text_file(location):
     """
     Return the content of the file at `location` as text or None.
+    Raise a UnicodeDecodeError that names the `location` if the content cannot
+    be decoded.
     """
     if not location:
         return
+
+    encoding = get_cached_encoding(location)
+    if not encoding:
+        try:
+            with io.open(location, 'r', encoding='utf-8') as tc:
+                return tc.read()
+        except UnicodeDecodeError:
+            pass
+
+    with open(location, 'rb') as tc:
+        content = tc.read()
+    if encoding:
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+
+    encoding = detect_encoding(content, location=location)
+    if encoding != 'utf-8':
+        cache_encoding(location, encoding)
+    return content.decode(encoding)
+
+
+def decode_text(content):
+    """
+    Return a text decoded from a `content` bytes string, trying UTF-8 first
+    and a detected encoding otherwise.
+    """
     try:
-        with io.open(location, 'r', encoding='utf-8') as tc:
-            return tc.read()
+        return content.decode('utf-8')
     except UnicodeDecodeError:
-        with open(location, 'rb') as tc:
-            content = tc.read()
-        enc = chardet.detect(content)['encoding']
-        return content.decode(enc)
+        return content.decode(detect_encoding(content))
+
+
+def read_text_lines(location):
+    """
+    Yield text lines from the file at `location` without reading the whole
+    file in memory. Lines are yielded with their trailing newline, if any.
+    Raise a UnicodeDecodeError that names the `location` if the content cannot
+    be decoded.
+    """
+    if not location:
+        return
+
+    encodings = [get_cached_encoding(location) or 'utf-8']
+    is_detected = False
+    yielded = 0
+    while True:
+        encoding = encodings.pop(0)
+        try:
+            with io.open(location, 'r', encoding=encoding) as lines:
+                # skip the lines we already yielded: these were decoded
+                # correctly with a previous encoding
+                for line in itertools.islice(lines, yielded, None):
+                    yield line
+                    yielded += 1
+            if encoding != 'utf-8':
+                cache_encoding(location, encoding)
+            return
+
+        except UnicodeDecodeError as e:
+            error = e
+
+        if not is_detected:
+            # restart with the encodings detected from a sample of the start
+            # of the file and of the lines after the last line decoded
+            with open(location, 'rb') as tc:
+                sample = tc.read(ENCODING_SAMPLE_SIZE)
+                tc.seek(0)
+                for _ in itertools.islice(tc, yielded):
+                    pass
+                sample += tc.read(ENCODING_SAMPLE_SIZE)
+            encodings = [e for e in get_encodings(sample) if e != encoding]
+            is_detected = True
+
+        if not encodings:
+            raise_decoding_error(error, location)
+
+
+# Size of the samples of a content used to detect its encoding.
+ENCODING_SAMPLE_SIZE = 16 * 1024
+
+# Encodings to try in sequence after UTF-8 and a detected encoding. latin-1
+# can decode any content and must be last.
+FALLBACK_ENCODINGS = ('cp1252', 'latin-1')
+
+
+def detect_encoding(content, location=None):
+    """
+    Return the name of an encoding that can decode a `content` bytes string.
+    This is "utf-8" or else the first encoding that works among an encoding
+    detected from a sample of `content` and the FALLBACK_ENCODINGS. Raise a
+    UnicodeDecodeError that names the optional `location` otherwise.
+
+    The sample is made of the start of `content` and of a window around the
+    first invalid UTF-8 byte, such that the detection time does not depend
+    on the size of the `content`.
+    """
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        error = e
+
+    size = ENCODING_SAMPLE_SIZE
+    window_start = max(size, error.start - size // 2)
+    sample = content[:size] + content[window_start:window_start + size]
+    for encoding in get_encodings(sample):
+        try:
+            content.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            error = e
+
+    raise_decoding_error(error, location)
+
+
+def get_encodings(sample):
+    """
+    Return a list of candidate encoding names for a content that is not valid
+    UTF-8 given a `sample` bytes string of this content: an encoding detected
+    in the `sample` first, if any, and then the FALLBACK_ENCODINGS.
+    """
+    encodings = []
+    detected = chardet.detect(sample)['encoding']
+    for encoding in (detected,) + FALLBACK_ENCODINGS:
+        if not encoding:
+            continue
+        try:
+            encoding = codecs.lookup(encoding).name
+        except LookupError:
+            continue
+        if encoding != 'utf-8' and encoding not in encodings:
+            encodings.append(encoding)
+    return encodings
+
+
+def raise_decoding_error(error, location=None):
+    """
+    Raise a UnicodeDecodeError from a UnicodeDecodeError `error` with a reason
+    that names the optional `location` of the decoded file.
+    """
+    reason = error.reason
+    if location:
+        reason = '{} in file: {}'.format(reason, location)
+    raise UnicodeDecodeError(
+        error.encoding, error.object, error.start, error.end, reason
+    ) from error
+
+
+# Cache of {(location, size, mtime): encoding} for files that are not UTF-8.
+_encodings_by_file = {}
+
+# Lock to update the encodings cache from many threads.
+_encodings_lock = threading.Lock()
+
+_ENCODINGS_CACHE_SIZE = 1024
+
+
+def _get_encoding_cache_key(location):
+    try:
+        stat = os.stat(location)
+    except OSError:
+        return
+    return location, stat.st_size, stat.st_mtime_ns
+
+
+def get_cached_encoding(location):
+    """
+    Return the encoding previously detected for the file at `location` or
+    None if the file was not decoded yet, is UTF-8 or changed since.
+    """
+    key = _get_encoding_cache_key(location)
+    if key:
+        return _encodings_by_file.get(key)
+
+
+def cache_encoding(location, encoding):
+    """
+    Cache the detected `encoding` of the file at `location`.
+    """
+    key = _get_encoding_cache_key(location)
+    if not key:
+        return
+    with _encodings_lock:
+        if len(_encodings_by_file) >= _ENCODINGS_CACHE_SIZE:
+            # evict the oldest entry
+            del _encodings_by_file[next(iter(_encodings_by_file))]
+        _encodings_by_file[key] = encoding
 
 
 class Debian822(MutableMapping):
@@ -540,12 +1216,14 @@ class Debian822(MutableMapping):
     whole .dsc file.
     """
 
-    def __init__(self, data=None):
+    def __init__(self, data=None, fields=None):
         """
         Build a new instance from `data` that is either a file-like object with
         a read() method, a text, a sequence of (key/values) or a mapping. Note
-        that the keys are always lowercased.
+        that the keys are always lowercased. If `fields` is provided as a list
+        of field names, only keep these fields and the "unknown" field.
         """
+        fields = get_field_names_set(fields)
         if data:
             text = None
             if isinstance(data, Mapping):
@@ -576,7 +1254,17 @@ class Debian822(MutableMapping):
                     'instead:'.format(type(data)))
             if text:
                 # we parse in a sequence of items
-                paragraph = get_paragraph_data(text, remove_pgp_signature=True)
+                paragraph = get_paragraph_data(
+                    text,
+                    remove_pgp_signature=True,
+                    fields=fields,
+                )
+
+            elif fields:
+                paragraph = {
+                    k: v for k, v in paragraph.items()
+                    if k in fields or k == 'unknown'
+                }
 
             self.data = paragraph
         else:
@@ -598,16 +1286,35 @@ class Debian822(MutableMapping):
         return self.data.__len__()
 
     @classmethod
-    def from_file(cls, location, remove_pgp_signature=True):
-        data = get_paragraph_data_from_file(
-            location=location, remove_pgp_signature=remove_pgp_signature)
+    def from_file(cls, location, remove_pgp_signature=True, fields=None, cache=None):
+        """
+        Return a new instance from the control file at ``location``. If a
+        ``cache`` ParseCache is provided, the paragraph data is loaded from
+        this cache if available or parsed and cached otherwise.
+        """
+        def get_data(loc):
+            return get_paragraph_data_from_file(
+                location=loc,
+                remove_pgp_signature=remove_pgp_signature,
+                fields=fields,
+            )
+
+        if cache is not None:
+            data = cache.get_or_parse(
+                location=location,
+                kind='paragraph',
+                parser=get_data,
+                options=(remove_pgp_signature, get_cache_options(fields)),
+            )
+        else:
+            data = get_data(location)
         if not data:
             raise ValueError('Location has no parsable data: {}'.format(location))
-        return Debian822(data)
+        return cls(data)
 
     @classmethod
-    def from_string(cls, text):
-        return Debian822(textwrap.dedent(text).strip())
+    def from_string(cls, text, fields=None):
+        return cls(textwrap.dedent(text).strip(), fields=fields)
 
     def to_dict(self, normalize_names=False):
         if normalize_names:
@@ -625,7 +1332,7 @@ class Debian822(MutableMapping):
         meant to be a high fidelity rendering and not meant to be used as-is in
         control files.
         """
-        items = self.items()
+        items = self.data.items()
 
         lines = []
         for key, value in items:
@@ -642,6 +1349,158 @@ class Debian822(MutableMapping):
             return text
 
 
+class FieldShape(object):
+    """
+    The ordered lowercase field names of a paragraph, shared by all the
+    CompactDebian822 paragraphs with the same fields in the same order.
+    """
+    __slots__ = ('names', 'positions', 'table')
+
+    def __init__(self, names, table):
+        # tuple of interned field names in paragraph order
+        self.names = names
+        # mapping of {field name: position}
+        self.positions = {name: position for position, name in enumerate(names)}
+        # FieldTable of this shape, used to get other shapes on updates
+        self.table = table
+
+
+# Default maximum number of shapes in a FieldTable: paragraphs with many
+# distinct sets of fields should not grow it forever.
+MAX_FIELD_SHAPES = 4 * 1024
+
+
+class FieldTable(object):
+    """
+    A table of FieldShape shared by many CompactDebian822 paragraphs. Past
+    ``max_shapes`` shapes, new shapes are still created but no longer shared.
+    """
+    __slots__ = ('shapes', 'max_shapes')
+
+    def __init__(self, max_shapes=MAX_FIELD_SHAPES):
+        # mapping of {tuple of field names: FieldShape}
+        self.shapes = {}
+        self.max_shapes = max_shapes
+
+    def get_shape(self, names):
+        """
+        Return a FieldShape for a ``names`` tuple of lowercase field names.
+        """
+        shape = self.shapes.get(names)
+        if shape is None:
+            shape = FieldShape(tuple(sys.intern(name) for name in names), table=self)
+            if len(self.shapes) < self.max_shapes:
+                self.shapes[shape.names] = shape
+        return shape
+
+    def __len__(self):
+        return len(self.shapes)
+
+
+# Default table of field shapes shared by the CompactDebian822 built without
+# a table.
+DEFAULT_FIELD_TABLE = FieldTable()
+
+
+class CompactDebian822(MutableMapping):
+    """
+    A compact mapping for a single deb822 paragraph with the same behavior as
+    a Debian822, designed to keep many paragraphs in memory. Each paragraph
+    only stores a list of values and a FieldShape of its field names in order,
+    shared through a FieldTable by all paragraphs with the same fields.
+    """
+    __slots__ = ('shape', 'values')
+
+    def __init__(self, data=None, fields=None, table=None):
+        """
+        Build a new instance from ``data`` that is any of the argument types
+        accepted by Debian822 using an optional shared FieldTable ``table``.
+        """
+        table = DEFAULT_FIELD_TABLE if table is None else table
+        if not data:
+            data = {}
+        elif fields or not isinstance(data, Mapping):
+            data = Debian822(data, fields=fields).data
+        data = {key.lower(): value for key, value in data.items()}
+        self.shape = table.get_shape(tuple(data))
+        self.values = list(data.values())
+
+    @property
+    def table(self):
+        return self.shape.table
+
+    def __getitem__(self, key):
+        position = self.shape.positions.get(key.lower())
+        if position is None:
+            raise KeyError(key)
+        return self.values[position]
+
+    def __setitem__(self, key, value):
+        name = key.lower()
+        shape = self.shape
+        position = shape.positions.get(name)
+        if position is None:
+            self.shape = shape.table.get_shape(shape.names + (name,))
+            self.values.append(value)
+        else:
+            self.values[position] = value
+
+    def __delitem__(self, key):
+        shape = self.shape
+        position = shape.positions.get(key.lower())
+        if position is None:
+            raise KeyError(key)
+        names = shape.names[:position] + shape.names[position + 1:]
+        self.shape = shape.table.get_shape(names)
+        del self.values[position]
+
+    def __iter__(self):
+        return iter(self.shape.names)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def data(self):
+        """
+        Return a new mapping of {lowercase name: value} of this paragraph.
+        """
+        return dict(zip(self.shape.names, self.values))
+
+    @classmethod
+    def from_file(cls, location, remove_pgp_signature=True, fields=None, table=None):
+        data = get_paragraph_data_from_file(
+            location=location,
+            remove_pgp_signature=remove_pgp_signature,
+            fields=fields,
+        )
+        if not data:
+            raise ValueError('Location has no parsable data: {}'.format(location))
+        return cls(data, table=table)
+
+    @classmethod
+    def from_string(cls, text, fields=None, table=None):
+        return cls(textwrap.dedent(text).strip(), fields=fields, table=table)
+
+    to_dict = Debian822.to_dict
+    dumps = Debian822.dumps
+    dump = Debian822.dump
+    __repr__ = Debian822.__repr__
+
+
+def get_compact_paragraphs_from_file(location, fields=None, table=None):
+    """
+    Yield CompactDebian822 for each paragraph of the control file at
+    ``location`` read one paragraph at a time and sharing a FieldTable
+    ``table`` or a new table for this file if None. Optionally only keep the
+    ``fields`` list of field names.
+    """
+    if table is None:
+        table = FieldTable()
+    for data in get_paragraphs_data_from_file(location, fields=fields):
+        yield CompactDebian822(data, table=table)
+
+
 DEFAULT_CONTROL_FIELDS = {
     'Architecture': 'all',
     'Priority': 'optional',
@@ -649,15 +1508,16 @@ DEFAULT_CONTROL_FIELDS = {
 }
 
 
-def load_control_file(control_file):
+def load_control_file(control_file, lazy=False):
     """
     Load a control file and return the parsed control fields.
 
     :param control_file: The filename of the control file to load (a string).
+    :param lazy: If True, convert the field values on first access.
     :returns: A dictionary created by :func:`parse_control_fields()`.
     """
     with open(control_file) as inp:
-        return parse_control_fields(Debian822(inp))
+        return parse_control_fields(Debian822(inp), lazy=lazy)
 
 
 DEPS_FIELDS = frozenset([
@@ -683,7 +1543,58 @@ DEPS_FIELDS = frozenset([
 ])
 
 
-def parse_control_fields(input_fields, deps_fields=DEPS_FIELDS):
+class LazyDebian822(Debian822):
+    """
+    A Debian822 whose values are converted to native types on first access
+    and then memoized: the values of dependency fields are parsed into
+    relationship objects and the value of "Installed-Size" into an integer,
+    as in ``parse_control_fields``. Fields that are never accessed are never
+    converted. Keys are case-insensitive and iterated with their normalized
+    names as in ``parse_control_fields`` such that ``dict()`` of a
+    LazyDebian822 is the same as the ``parse_control_fields`` result.
+    ``to_dict()`` and ``dumps()`` return the original lowercase names and
+    string values.
+    """
+
+    def __init__(self, data=None, fields=None, deps_fields=DEPS_FIELDS):
+        super().__init__(data=data, fields=fields)
+        self.deps_fields = deps_fields
+        # mapping of {lowercase name: converted value}
+        self.converted = {}
+
+    def __getitem__(self, key):
+        key = key.lower()
+        try:
+            return self.converted[key]
+        except KeyError:
+            pass
+        value = convert_control_field(
+            name=normalize_control_field_name(key),
+            value=self.data[key],
+            deps_fields=self.deps_fields,
+        )
+        self.converted[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        key = key.lower()
+        self.converted.pop(key, None)
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        key = key.lower()
+        self.converted.pop(key, None)
+        del self.data[key]
+
+    def __contains__(self, key):
+        # do not convert a value to check if a field exists
+        return key.lower() in self.data
+
+    def __iter__(self):
+        return (normalize_control_field_name(name) for name in self.data)
+
+
+def parse_control_fields(input_fields, deps_fields=DEPS_FIELDS, lazy=False):
     """
     Return an ordered mapping from parsing an`input_fields` mapping of Debian
     control file fields. This applies a few conversions such as:
@@ -693,21 +1604,89 @@ def parse_control_fields(input_fields, deps_fields=DEPS_FIELDS):
 
     - The value of some fields such as `Installed-Size` from a string to a
       native type (here an integer).
+
+    If `lazy` is True, return instead a LazyDebian822 that applies these
+    conversions only to the fields that are accessed, on first access. It has
+    the same normalized keys and converted values, but its keys are also
+    case-insensitive and its `to_dict()` returns the lowercase names and
+    original string values.
     """
-    from debian_inspector import deps
+    if lazy:
+        return LazyDebian822(input_fields, deps_fields=deps_fields)
+
     output_fields = {}
     for name, unparsed_value in input_fields.items():
         name = normalize_control_field_name(name)
-        if name in deps_fields:
-            parsed_value = deps.parse_depends(unparsed_value)
-        elif name == 'Installed-Size':
-            parsed_value = int(unparsed_value)
-        else:
-            parsed_value = unparsed_value
-        output_fields[name] = parsed_value
+        output_fields[name] = convert_control_field(name, unparsed_value, deps_fields)
     return output_fields
 
 
+def convert_control_field(name, value, deps_fields=DEPS_FIELDS):
+    """
+    Return a converted `value` for a field with a normalized `name`: parsed
+    relationships for a dependency field in `deps_fields`, an integer for
+    "Installed-Size" or the `value` unchanged otherwise.
+    """
+    if name in deps_fields:
+        from debian_inspector import deps
+        return deps.parse_depends(value)
+    elif name == 'Installed-Size':
+        return int(value)
+    return value
+
+
+# Mapping of {lowercase word: word} of field name words that are not simply
+# capitalized.
+FIELD_NAME_SPECIAL_CASES = dict(
+    md5sum='MD5sum',
+    sha1='SHA1',
+    sha256='SHA256',
+    sha512='SHA512',
+)
+
+
+@attrs(slots=True, frozen=True)
+class FieldName(object):
+    """
+    The interned forms of a field name.
+    """
+    # stripped lowercase name used as a key in paragraph data such as
+    # "checksums-sha256"
+    name = attrib()
+    # conventionally capitalized name such as "Checksums-SHA256"
+    normalized = attrib()
+    # lowercase name usable as a Python attribute name such as
+    # "checksums_sha256"
+    attribute = attrib()
+
+
+# Process-wide mapping of {field name as found: FieldName}
+_field_names = {}
+
+# Maximum number of field names in the process-wide table: a file with many
+# junk field names should not grow it forever.
+MAX_FIELD_NAMES = 16 * 1024
+
+
+def get_field_name(name):
+    """
+    Return a FieldName for a field ``name`` string as found in a file. All the
+    forms of a distinct name are computed only once per process and shared by
+    all the paragraphs of all the files.
+    """
+    field_name = _field_names.get(name)
+    if field_name is None:
+        lowercase = sys.intern(name.strip().lower())
+        field_name = FieldName(
+            name=lowercase,
+            normalized=sys.intern(_normalize_control_field_name(name.strip())),
+            attribute=sys.intern(lowercase.replace('-', '_')),
+        )
+        if len(_field_names) < MAX_FIELD_NAMES:
+            _field_names[name] = field_name
+    return field_name
+
+
 def normalize_control_field_name(name):
     """
     Return a case-normalized field name string.
@@ -722,8 +1701,11 @@ def normalize_control_field_name(name):
 
     http://www.debian.org/doc/debian-policy/ch-controlfields.html#s-controlsyntax
     """
-    special_cases = dict(md5sum='MD5sum', sha1='SHA1', sha256='SHA256')
-    return '-'.join(special_cases.get(
-        w.lower(), w.capitalize())
+    return get_field_name(name).normalized
+
+
+def _normalize_control_field_name(name):
+    return '-'.join(
+        FIELD_NAME_SPECIAL_CASES.get(w.lower(), w.capitalize())
         for w in name.split('-')
     )
@@ -0,0 +1,359 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import debcon
+
+"""
+Read the dpkg database of the packages installed on a Debian system or in a
+container image root filesystem, such as found in /var/lib/dpkg.
+
+The "status" file is read one paragraph at a time. The lists of installed
+files and their checksums in the "info/<package>.list" and
+"info/<package>.md5sums" files are loaded lazily on first access, or all at
+once using a pool of threads.
+
+The "status.d" directory of distroless images with one file per package and
+their "status.d/<package>.md5sums" files are supported too.
+"""
+
+# Default number of threads used to read the info files of packages.
+DEFAULT_MAX_WORKERS = 8
+
+# Status values of the packages considered as installed.
+INSTALLED_STATUSES = frozenset(['installed'])
+
+# Extensions of the files of a "status.d" directory that are not package
+# paragraphs.
+INFO_EXTENSIONS = ('.list', '.md5sums')
+
+
+@attrs
+class InstalledPackage(object):
+    """
+    A package installed in a dpkg database.
+    """
+    name = attrib()
+    version = attrib(default=None)
+    architecture = attrib(default=None)
+    # the package status, the third word of a "Status" field such as
+    # "installed"
+    status = attrib(default=None)
+    # the full paragraph data mapping of this package
+    data = attrib(default=Factory(dict), repr=False)
+    # list of installed paths or None if not loaded yet
+    files = attrib(default=None, repr=False)
+    # mapping of {path: md5 digest} or None if not loaded yet
+    md5sums = attrib(default=None, repr=False)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Return a new InstalledPackage built from a paragraph ``data`` mapping
+        as returned by ``debcon.get_paragraph_data()`` or None if the
+        paragraph has no package name.
+        """
+        name = data.get('package')
+        if not name:
+            return
+        # a status is made of three words: "want flag status"
+        _want, _, flag_and_status = (data.get('status') or '').partition(' ')
+        _flag, _, status = flag_and_status.partition(' ')
+        return cls(
+            name=name,
+            version=data.get('version'),
+            architecture=data.get('architecture'),
+            status=status or None,
+            data=data,
+        )
+
+    @property
+    def key(self):
+        """
+        Return the unique key of this package in a dpkg database, which is
+        also the base name of its info files: this is "name:architecture" for
+        "Multi-Arch: same" packages that can be installed for several
+        architectures at once and the "name" otherwise.
+        """
+        if self.architecture and self.data.get('multi-arch') == 'same':
+            return f'{self.name}:{self.architecture}'
+        return self.name
+
+    @property
+    def is_installed(self):
+        return self.status in INSTALLED_STATUSES
+
+
+@attrs
+class DpkgDatabase(object):
+    """
+    The packages of a dpkg database directory such as /var/lib/dpkg.
+    """
+    # location of the dpkg database directory
+    location = attrib()
+    # mapping of {package key: InstalledPackage}
+    packages = attrib(default=Factory(dict), repr=False)
+    # mapping of {path: [list of InstalledPackage]} or None if not built yet
+    _owners_by_path = attrib(default=None, repr=False, init=False, eq=False)
+
+    @classmethod
+    def from_location(
+        cls,
+        location,
+        installed_only=True,
+        load_files=False,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """
+        Return a new DpkgDatabase from the dpkg database directory at
+        ``location``. Only keep the packages that are installed if
+        ``installed_only`` is True. If ``load_files`` is True, also load the
+        files and checksums of all packages with ``max_workers`` threads.
+        Otherwise, these are loaded lazily on first access.
+        """
+        database = cls(location=location)
+        status = os.path.join(location, 'status')
+        if os.path.exists(status):
+            database.add_packages(
+                packages=iter_packages(status),
+                installed_only=installed_only,
+            )
+
+        status_d = os.path.join(location, 'status.d')
+        if os.path.isdir(status_d):
+            database.add_packages(
+                packages=get_status_d_packages(status_d, max_workers=max_workers),
+                installed_only=installed_only,
+            )
+
+        if load_files:
+            database.load_files(max_workers=max_workers)
+        return database
+
+    def add_packages(self, packages, installed_only=True):
+        """
+        Add a ``packages`` iterable of InstalledPackage to this database. Only
+        add the packages that are installed if ``installed_only`` is True.
+        """
+        for package in packages:
+            if installed_only and not package.is_installed:
+                continue
+            self.packages[package.key] = package
+        self._owners_by_path = None
+
+    def get(self, name):
+        """
+        Return a list of the InstalledPackage with a ``name``. There can be
+        more than one for packages installed for several architectures.
+        """
+        package = self.packages.get(name)
+        if package:
+            return [package]
+        return [p for p in self.packages.values() if p.name == name]
+
+    def get_info_file(self, package, extension):
+        """
+        Return the location of the info file with an ``extension`` of a
+        ``package`` such as "list" or "md5sums" or None if it does not exist.
+        Info files are in the "info" directory or in the "status.d" directory
+        of a distroless image.
+        """
+        for info_dir in ('info', 'status.d'):
+            info_dir = os.path.join(self.location, info_dir)
+            for base_name in (package.key, package.name):
+                location = os.path.join(info_dir, f'{base_name}.{extension}')
+                if os.path.exists(location):
+                    return location
+
+    def get_files(self, package):
+        """
+        Return the list of the paths installed by a ``package``, loaded from its
+        "info/<package>.list" file on first access. If there is no such file,
+        as in distroless images, use instead the paths of its md5sums file.
+        """
+        if package.files is None:
+            list_file = self.get_info_file(package, 'list')
+            if list_file:
+                package.files = read_list_file(list_file)
+            else:
+                package.files = list(self.get_md5sums(package))
+        return package.files
+
+    def get_md5sums(self, package):
+        """
+        Return a mapping of {path: md5} of the files installed by a
+        ``package``, loaded from its "info/<package>.md5sums" file on first
+        access. Paths are absolute like in the list of files.
+        """
+        if package.md5sums is None:
+            package.md5sums = read_md5sums_file(self.get_info_file(package, 'md5sums'))
+        return package.md5sums
+
+    def load_files(self, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Load the files and checksums of all the packages that are not loaded
+        yet, reading their info files with a pool of ``max_workers`` threads.
+        """
+        def load(package):
+            self.get_files(package)
+            self.get_md5sums(package)
+
+        packages = [
+            p for p in self.packages.values()
+            if p.files is None or p.md5sums is None
+        ]
+        if max_workers and max_workers > 1 and len(packages) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # consume the results to raise exceptions, if any
+                for _ in executor.map(load, packages):
+                    pass
+        else:
+            for package in packages:
+                load(package)
+
+    def get_owners_by_path(self, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Return a mapping of {path: [list of InstalledPackage]} of the packages
+        that own a path, loading the files of all packages if needed. A
+        directory is typically owned by several packages.
+        """
+        if self._owners_by_path is None:
+            self.load_files(max_workers=max_workers)
+            owners_by_path = {}
+            for package in self.packages.values():
+                for path in package.files:
+                    owners = owners_by_path.get(path)
+                    if owners is None:
+                        owners_by_path[path] = [package]
+                    else:
+                        owners.append(package)
+            self._owners_by_path = owners_by_path
+        return self._owners_by_path
+
+    def get_owners(self, path):
+        """
+        Return a list of the InstalledPackage that own a ``path``.
+        """
+        return self.get_owners_by_path().get(path, [])
+
+
+def iter_packages(location):
+    """
+    Yield InstalledPackage from the dpkg status file at ``location``, read one
+    paragraph at a time.
+    """
+    for data in debcon.get_paragraphs_data_from_file(location):
+        package = InstalledPackage.from_data(data)
+        if package:
+            yield package
+
+
+def get_status_d_packages(location, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Return a list of InstalledPackage from the "status.d" directory at
+    ``location`` of a distroless image where each package paragraph is in its
+    own file. The files are read with a single read each using a pool of
+    ``max_workers`` threads, and then parsed. Packages are returned in file
+    name order. A package without a "Status" field is considered as installed.
+    """
+    file_names = sorted(
+        entry.name for entry in os.scandir(location)
+        if entry.is_file() and not entry.name.endswith(INFO_EXTENSIONS)
+    )
+    locations = [os.path.join(location, name) for name in file_names]
+    if max_workers and max_workers > 1 and len(locations) > 1:
+        # only the I/O is done in threads as parsing holds the GIL. Files are
+        # read in batches as one task per small file costs more than a read.
+        batch_size = -(-len(locations) // (max_workers * 4))
+        batches = [
+            locations[start:start + batch_size]
+            for start in range(0, len(locations), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = [
+                content
+                for batch in executor.map(read_all_bytes, batches)
+                for content in batch
+            ]
+    else:
+        contents = read_all_bytes(locations)
+
+    packages = []
+    for content in contents:
+        packages.extend(get_status_d_file_packages(content))
+    return packages
+
+
+def read_all_bytes(locations):
+    """
+    Return a list of the content bytes of each file of a ``locations`` list.
+    """
+    contents = []
+    for location in locations:
+        with open(location, 'rb') as inp:
+            contents.append(inp.read())
+    return contents
+
+
+def get_status_d_file_packages(content):
+    """
+    Return a list of InstalledPackage from the ``content`` bytes of a
+    "status.d" file.
+    """
+    packages = []
+    for data in debcon.get_paragraphs_data(debcon.decode_text(content)):
+        package = InstalledPackage.from_data(data)
+        if package:
+            if 'status' not in data:
+                package.status = 'installed'
+            packages.append(package)
+    return packages
+
+
+def read_info_lines(location):
+    """
+    Return a list of the lines of the info file at ``location`` or
+    an empty list if there is no such file. Undecodable bytes in file paths
+    are kept as surrogate escapes, as in ``os.fsdecode()``.
+    """
+    if not location:
+        return []
+    with open(location, 'rb') as info:
+        content = info.read()
+    return content.decode('utf-8', 'surrogateescape').splitlines()
+
+
+def read_list_file(location):
+    """
+    Return a list of the paths listed in the dpkg info "<package>.list" file at
+    ``location`` or an empty list if there is no such file.
+    """
+    return [line for line in read_info_lines(location) if line]
+
+
+def read_md5sums_file(location):
+    """
+    Return a mapping of {absolute path: md5} of the paths listed in the dpkg
+    info "<package>.md5sums" file at ``location`` or an empty mapping if there
+    is no such file.
+    """
+    md5sums = {}
+    for line in read_info_lines(location):
+        md5, _, path = line.partition(' ')
+        path = path.lstrip(' ')
+        if md5 and path:
+            if not path.startswith('/'):
+                path = '/' + path
+            md5sums[path] = md5
+    return md5sums
@@ -0,0 +1,538 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import json
+
+from attr import asdict
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import debcon
+from debian_inspector.version import Version
+
+"""
+In-memory indexes of the packages of Debian repository index files such as
+Packages and Sources files, keyed by package name.
+
+An index can be saved to and loaded from a JSON file, which is much faster
+than parsing the original index file again.
+"""
+
+PACKAGES_INDEX_FORMAT = 'debian_inspector-packages-index-v1'
+
+# Mapping of {lowercase Packages field name: PackageRecord checksums key}
+CHECKSUM_FIELDS = {
+    'md5sum': 'md5',
+    'sha1': 'sha1',
+    'sha256': 'sha256',
+    'sha512': 'sha512',
+}
+
+# The only fields parsed from a Packages paragraph to build a PackageRecord
+PACKAGE_RECORD_FIELDS = frozenset([
+    'package',
+    'version',
+    'architecture',
+    'filename',
+    'size',
+] + list(CHECKSUM_FIELDS))
+
+
+@attrs(slots=True, eq=False)
+class PackageRecord(object):
+    """
+    A compact record of a binary package paragraph of a Packages file.
+    """
+    name = attrib()
+    # a Version or a tuple of (epoch, upstream, revision) for a record loaded
+    # from an index file, converted to a Version on first access
+    _version = attrib()
+    architecture = attrib(default=None)
+    # path of the .deb archive relative to the repository root
+    filename = attrib(default=None)
+    # size in bytes of the .deb archive as an integer
+    size = attrib(default=None)
+    # mapping of {checksum type: hex digest} such as {'sha256': '0fa3...'}
+    checksums = attrib(default=Factory(dict))
+    # byte offset and length of the paragraph in the uncompressed index file
+    offset = attrib(default=None)
+    length = attrib(default=None)
+
+    @property
+    def version(self):
+        version = self._version
+        if not isinstance(version, Version):
+            epoch, upstream, revision = version
+            version = self._version = Version(epoch=epoch, upstream=upstream, revision=revision)
+        return version
+
+    @version.setter
+    def version(self, version):
+        self._version = version
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_row() == other.to_row()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    @classmethod
+    def from_data(cls, data, offset=None, length=None):
+        """
+        Return a new PackageRecord built from a paragraph ``data`` mapping as
+        returned by ``debcon.get_paragraph_data()`` or None if the paragraph
+        has no package name or version.
+        """
+        name = data.get('package')
+        version = data.get('version')
+        if not name or not version:
+            return
+
+        size = data.get('size')
+        checksums = {}
+        for field_name, checksum_type in CHECKSUM_FIELDS.items():
+            value = data.get(field_name)
+            if value:
+                checksums[checksum_type] = value
+
+        return cls(
+            name=name,
+            version=Version.from_string(version),
+            architecture=data.get('architecture') or None,
+            filename=data.get('filename') or None,
+            size=int(size) if size and size.isdigit() else None,
+            checksums=checksums,
+            offset=offset,
+            length=length,
+        )
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            version=str(self.version),
+            architecture=self.architecture,
+            filename=self.filename,
+            size=self.size,
+            checksums=dict(self.checksums),
+            offset=self.offset,
+            length=self.length,
+        )
+
+    def to_row(self):
+        """
+        Return a list of the values of this record as saved in an index file.
+        """
+        version = self._version
+        epoch, upstream, revision = (
+            version.tuple() if isinstance(version, Version) else version
+        )
+        return [
+            self.name,
+            epoch,
+            upstream,
+            revision,
+            self.architecture,
+            self.filename,
+            self.size,
+            self.checksums,
+            self.offset,
+            self.length,
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Return a new PackageRecord from a ``row`` list of values as returned by
+        ``to_row()``. Its Version is only built on first access.
+        """
+        (name, epoch, upstream, revision, architecture, filename, size,
+         checksums, offset, length) = row
+        return cls(
+            name=name,
+            version=(epoch, upstream, revision),
+            architecture=architecture,
+            filename=filename,
+            size=size,
+            checksums=checksums,
+            offset=offset,
+            length=length,
+        )
+
+
+@attrs
+class PackagesIndex(object):
+    """
+    An index of the binary packages of a Packages file keyed by package name.
+    The records of a package name are sorted by version, oldest first.
+    """
+    # location of the indexed Packages file
+    location = attrib(default=None)
+    # mapping of {package name: [list of PackageRecord sorted by version]}
+    records_by_name = attrib(default=Factory(dict), repr=False)
+
+    @classmethod
+    def from_file(cls, location, file_object=None):
+        """
+        Return a new PackagesIndex built from the Packages file at
+        ``location``. The file is read one paragraph at a time and can be
+        compressed with gzip, xz or bzip2. Only the fields needed for a
+        PackageRecord are parsed. If provided, read the content of this file
+        from a ``file_object`` binary file object instead, such as a stream
+        that checks its digests while reading.
+        """
+        index = cls(location=location)
+        paragraphs = get_paragraphs_data_with_offsets(
+            location=file_object or location,
+            fields=PACKAGE_RECORD_FIELDS,
+        )
+        for data, offset, length in paragraphs:
+            record = PackageRecord.from_data(data=data, offset=offset, length=length)
+            if record:
+                index.records_by_name.setdefault(record.name, []).append(record)
+
+        for records in index.records_by_name.values():
+            sort_by_version(records)
+        return index
+
+    def add(self, record):
+        """
+        Add a PackageRecord ``record`` to this index, keeping the records of a
+        name sorted by version.
+        """
+        records = self.records_by_name.setdefault(record.name, [])
+        records.append(record)
+        sort_by_version(records)
+
+    def get(self, name):
+        """
+        Return a list of PackageRecord for a package ``name`` sorted by version,
+        oldest first.
+        """
+        return self.records_by_name.get(name, [])
+
+    def get_latest(self, name):
+        """
+        Return the PackageRecord with the highest version for a package
+        ``name`` or None.
+        """
+        records = self.records_by_name.get(name)
+        if records:
+            return records[-1]
+
+    def names(self):
+        return self.records_by_name.keys()
+
+    def records(self):
+        """
+        Yield all the PackageRecord of this index.
+        """
+        for records in self.records_by_name.values():
+            yield from records
+
+    def __contains__(self, name):
+        return name in self.records_by_name
+
+    def __len__(self):
+        return len(self.records_by_name)
+
+    def get_paragraph_data(self, record):
+        """
+        Return the full paragraph data mapping of a ``record`` read from the
+        indexed Packages file, as returned by ``debcon.get_paragraph_data()``.
+        """
+        return read_paragraph_data(self.location, record.offset, record.length)
+
+    def dump(self, location):
+        """
+        Save this index as JSON to the file at ``location``.
+        """
+        rows = [record.to_row() for record in self.records()]
+        data = dict(
+            format=PACKAGES_INDEX_FORMAT,
+            location=self.location,
+            records=rows,
+        )
+        with open(location, 'w', encoding='utf-8') as out:
+            json.dump(data, out, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, location):
+        """
+        Return a new PackagesIndex loaded from the JSON file at ``location``
+        saved with ``dump()``. Raise a ValueError if this is not a saved
+        PackagesIndex.
+        """
+        with open(location, encoding='utf-8') as inp:
+            data = json.load(inp)
+
+        if not isinstance(data, dict) or data.get('format') != PACKAGES_INDEX_FORMAT:
+            raise ValueError(f'Not a saved PackagesIndex: {location}')
+
+        records_by_name = {}
+        from_row = PackageRecord.from_row
+        for row in data['records']:
+            record = from_row(row)
+            records = records_by_name.get(record.name)
+            if records is None:
+                records_by_name[record.name] = [record]
+            else:
+                # records are saved sorted by version
+                records.append(record)
+
+        return cls(location=data['location'], records_by_name=records_by_name)
+
+
+# The only fields parsed from a Sources paragraph to build a SourceRecord
+SOURCE_RECORD_FIELDS = frozenset([
+    'package',
+    'version',
+    'binary',
+    'directory',
+    'files',
+    'checksums-sha1',
+    'checksums-sha256',
+    'checksums-sha512',
+])
+
+
+@attrs(slots=True)
+class SourceRecord(object):
+    """
+    A compact record of a source package paragraph of a Sources file.
+    """
+    name = attrib()
+    version = attrib()
+    # tuple of the names of the binary packages built from this source
+    binaries = attrib(default=())
+    # directory of the source files relative to the repository root
+    directory = attrib(default=None)
+    # mapping of {file name: debcon.File} of the source files
+    files = attrib(default=Factory(dict))
+    # byte offset and length of the paragraph in the uncompressed index file
+    offset = attrib(default=None)
+    length = attrib(default=None)
+    # mapping of {file name: [list of error messages]} for the inconsistent
+    # Files and Checksums-* entries of the paragraph, or None
+    errors = attrib(default=None)
+
+    @classmethod
+    def from_data(cls, data, offset=None, length=None):
+        """
+        Return a new SourceRecord built from a paragraph ``data`` mapping as
+        returned by ``debcon.get_paragraph_data()`` or None if the paragraph
+        has no package name or version. Inconsistent Files and Checksums-*
+        entries are reported in ``errors``.
+        """
+        name = data.get('package')
+        version = data.get('version')
+        if not name or not version:
+            return
+
+        files, errors = debcon.collect_files_and_errors(data)
+        return cls(
+            name=name,
+            version=Version.from_string(version),
+            binaries=tuple(debcon.comma_separated(data.get('binary'))),
+            directory=data.get('directory') or None,
+            files=files,
+            offset=offset,
+            length=length,
+            errors=errors or None,
+        )
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            version=str(self.version),
+            binaries=list(self.binaries),
+            directory=self.directory,
+            files=[asdict(f) for f in self.files.values()],
+            offset=self.offset,
+            length=self.length,
+            errors=dict(self.errors or {}),
+        )
+
+
+@attrs
+class SourcesIndex(object):
+    """
+    An index of the source packages of a Sources file keyed by source package
+    name and by the names of the binary packages they build. The records of a
+    name are sorted by version, oldest first.
+    """
+    # location of the indexed Sources file
+    location = attrib(default=None)
+    # mapping of {source name: [list of SourceRecord sorted by version]}
+    records_by_name = attrib(default=Factory(dict), repr=False)
+
+    def __attrs_post_init__(self, *args, **kwargs):
+        # mapping of {binary name: [list of SourceRecord sorted by version]}
+        self.records_by_binary = {}
+        # mapping of {source name: tuple of binary names of all versions}
+        self.binaries_by_name = {}
+        for records in self.records_by_name.values():
+            sort_by_version(records)
+            for record in records:
+                self._index_binaries(record)
+        for records in self.records_by_binary.values():
+            sort_by_version(records)
+
+    def _index_binaries(self, record):
+        records_by_binary = self.records_by_binary
+        for binary in record.binaries:
+            records = records_by_binary.get(binary)
+            if records is None:
+                records_by_binary[binary] = [record]
+            else:
+                records.append(record)
+
+        binaries = self.binaries_by_name.get(record.name, ())
+        new_binaries = [b for b in record.binaries if b not in binaries]
+        if new_binaries:
+            self.binaries_by_name[record.name] = binaries + tuple(new_binaries)
+
+    @classmethod
+    def from_file(cls, location, file_object=None):
+        """
+        Return a new SourcesIndex built from the Sources file at ``location``.
+        The file is read one paragraph at a time and can be compressed with
+        gzip, xz or bzip2. Only the fields needed for a SourceRecord are
+        parsed. If provided, read the content of this file from a
+        ``file_object`` binary file object instead.
+        """
+        records_by_name = {}
+        paragraphs = get_paragraphs_data_with_offsets(
+            location=file_object or location,
+            fields=SOURCE_RECORD_FIELDS,
+        )
+        for data, offset, length in paragraphs:
+            record = SourceRecord.from_data(data=data, offset=offset, length=length)
+            if record:
+                records_by_name.setdefault(record.name, []).append(record)
+        return cls(location=location, records_by_name=records_by_name)
+
+    def add(self, record):
+        """
+        Add a SourceRecord ``record`` to this index, keeping the records of a
+        name sorted by version.
+        """
+        records = self.records_by_name.setdefault(record.name, [])
+        records.append(record)
+        sort_by_version(records)
+        self._index_binaries(record)
+        for binary in record.binaries:
+            sort_by_version(self.records_by_binary[binary])
+
+    def get(self, name):
+        """
+        Return a list of SourceRecord for a source package ``name`` sorted by
+        version, oldest first.
+        """
+        return self.records_by_name.get(name, [])
+
+    def get_latest(self, name):
+        """
+        Return the SourceRecord with the highest version for a source package
+        ``name`` or None.
+        """
+        records = self.records_by_name.get(name)
+        if records:
+            return records[-1]
+
+    def get_sources(self, binary):
+        """
+        Return a list of the SourceRecord that build a ``binary`` package name
+        sorted by version, oldest first.
+        """
+        return self.records_by_binary.get(binary, [])
+
+    def get_source(self, binary):
+        """
+        Return the SourceRecord with the highest version that builds a
+        ``binary`` package name or None.
+        """
+        records = self.records_by_binary.get(binary)
+        if records:
+            return records[-1]
+
+    def get_binaries(self, name):
+        """
+        Return a tuple of the binary package names built by any version of a
+        source package ``name``.
+        """
+        return self.binaries_by_name.get(name, ())
+
+    def get_paragraph_data(self, record):
+        """
+        Return the full paragraph data mapping of a ``record`` read from the
+        indexed Sources file, as returned by ``debcon.get_paragraph_data()``.
+        """
+        return read_paragraph_data(self.location, record.offset, record.length)
+
+    def names(self):
+        return self.records_by_name.keys()
+
+    def records(self):
+        """
+        Yield all the SourceRecord of this index.
+        """
+        for records in self.records_by_name.values():
+            yield from records
+
+    def __contains__(self, name):
+        return name in self.records_by_name
+
+    def __len__(self):
+        return len(self.records_by_name)
+
+
+def get_paragraphs_data_with_offsets(location, fields=None):
+    """
+    Yield tuples of (paragraph data mapping, offset, length) for each paragraph
+    of the control file at ``location``, read one paragraph at a time. The
+    file can be compressed with gzip, xz or bzip2. ``location`` can also be a
+    binary file object. The offset and length of a paragraph are in bytes in
+    the uncompressed file. Only return the ``fields`` set of field names if
+    provided.
+    """
+    if isinstance(location, str):
+        with debcon.open_control_file(location) as lines:
+            yield from _get_paragraphs_data_with_offsets(lines, fields)
+    else:
+        yield from _get_paragraphs_data_with_offsets(debcon.decompressed(location), fields)
+
+
+def _get_paragraphs_data_with_offsets(lines, fields=None):
+    for offset, _line, paragraph in debcon.iter_paragraph_lines(lines):
+        text = debcon.decode_text(b''.join(paragraph))
+        data = debcon.get_paragraph_data(text, fields=fields)
+        length = sum(len(line) for line in paragraph)
+        yield data, offset, length
+
+
+def read_paragraph_data(location, offset, length):
+    """
+    Return a paragraph data mapping read at ``offset`` for ``length`` bytes
+    from the control file at ``location`` that can be compressed with gzip,
+    xz or bzip2.
+    """
+    with debcon.open_control_file(location) as indexed:
+        indexed.seek(offset)
+        text = debcon.decode_text(indexed.read(length))
+    return debcon.get_paragraph_data(text)
+
+
+def sort_by_version(records):
+    """
+    Sort in place a ``records`` list of objects with a version attribute.
+    """
+    if len(records) > 1:
+        records.sort(key=lambda r: r.version)
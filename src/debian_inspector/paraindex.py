@@ -0,0 +1,255 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import os
+import tempfile
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import deb822
+from debian_inspector import debcon
+
+"""
+A random-access index of the paragraphs of large Debian control files such as
+Packages, Sources or dpkg status files.
+
+The index records the byte offset, length, first line number and the value of
+a key field (such as "Package") of each paragraph. It can be saved in a small
+sidecar text file next to the indexed file. The paragraphs of a given key are
+then read by seeking to their offset and parsing only these paragraphs.
+
+Paragraphs are split the same way as with ``debcon.get_paragraphs_data()``.
+Only plain, uncompressed files can be indexed.
+"""
+
+SIDECAR_EXTENSION = '.paraidx'
+
+SIDECAR_HEADER = 'debian_inspector-paragraph-index-v2'
+
+
+@attrs(slots=True)
+class ParagraphOffset(object):
+    """
+    The location of a paragraph in a file.
+    """
+    # byte offset of the first line of the paragraph
+    offset = attrib()
+    # length in bytes of the paragraph including the terminator of its last
+    # line
+    length = attrib()
+    # line number of the first line of the paragraph. Numbers start at 1.
+    start_line = attrib()
+    # value of the key field of the paragraph, or None if it has no key field.
+    key = attrib(default=None)
+
+
+@attrs
+class ParagraphIndex(object):
+    """
+    An index of the paragraphs of a Debian control file at ``location`` keyed
+    by the value of their ``key_field`` field.
+    """
+    location = attrib()
+    # lowercase name of the field used as a key
+    key_field = attrib(default='package')
+    # list of ParagraphOffset in file order
+    paragraphs = attrib(default=Factory(list), repr=False)
+    # size and modification time of the indexed file, used to detect
+    # outdated sidecar files
+    size = attrib(default=None)
+    mtime = attrib(default=None)
+
+    def __attrs_post_init__(self, *args, **kwargs):
+        self.paragraphs_by_key = paragraphs_by_key = {}
+        for paragraph in self.paragraphs:
+            if paragraph.key is not None:
+                paragraphs_by_key.setdefault(paragraph.key, []).append(paragraph)
+
+    @classmethod
+    def from_file(cls, location, key_field='package'):
+        """
+        Return a new ParagraphIndex built from the control file at
+        ``location`` using the ``key_field`` field as a key.
+        """
+        key_field = key_field.lower()
+        prefix = f'{key_field}:'.encode('utf-8')
+        prefix_len = len(prefix)
+
+        paragraphs = []
+        with open(location, 'rb') as lines:
+            for offset, start_line, para_lines in debcon.iter_paragraph_lines(lines):
+                key = None
+                for line in para_lines:
+                    if line[:prefix_len].lower() == prefix:
+                        key = line[prefix_len:].strip().decode('utf-8', 'replace')
+                        break
+                paragraphs.append(ParagraphOffset(
+                    offset=offset,
+                    length=sum(len(line) for line in para_lines),
+                    start_line=start_line,
+                    key=key,
+                ))
+
+        size, mtime = get_size_and_mtime(location)
+        return cls(
+            location=location,
+            key_field=key_field,
+            paragraphs=paragraphs,
+            size=size,
+            mtime=mtime,
+        )
+
+    @classmethod
+    def get_or_build(cls, location, key_field='package', sidecar=None):
+        """
+        Return a ParagraphIndex for the control file at ``location``, loaded
+        from a ``sidecar`` index file if it is up to date, or built otherwise
+        and then saved to ``sidecar``. ``sidecar`` defaults to the location
+        with an added ".paraidx" extension. The sidecar is only a cache: the
+        index is returned even if the sidecar cannot be saved, such as in a
+        read-only directory.
+        """
+        index = cls.load(location, sidecar=sidecar)
+        if not index or index.key_field != key_field.lower():
+            index = cls.from_file(location, key_field=key_field)
+            try:
+                index.dump(sidecar=sidecar)
+            except OSError:
+                pass
+        return index
+
+    def dump(self, sidecar=None):
+        """
+        Save this index to a ``sidecar`` file. ``sidecar`` defaults to the
+        location with an added ".paraidx" extension.
+        """
+        sidecar = sidecar or self.location + SIDECAR_EXTENSION
+        fd, temp_location = tempfile.mkstemp(
+            prefix='.tmp-',
+            dir=os.path.dirname(os.path.abspath(sidecar)),
+        )
+        try:
+            with open(fd, 'w', encoding='utf-8') as out:
+                out.write(
+                    f'{SIDECAR_HEADER}\t{self.key_field}\t{self.size}\t{self.mtime}'
+                    f'\t{len(self.paragraphs)}\n'
+                )
+                for para in self.paragraphs:
+                    key = '' if para.key is None else para.key
+                    out.write(f'{para.offset}\t{para.length}\t{para.start_line}\t{key}\n')
+            # this is atomic: a sidecar is either the previous or the new one
+            os.replace(temp_location, sidecar)
+        except BaseException:
+            try:
+                os.remove(temp_location)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, location, sidecar=None):
+        """
+        Return a ParagraphIndex for the control file at ``location`` loaded
+        from a ``sidecar`` file or None if the sidecar does not exist, is
+        outdated or cannot be read. ``sidecar`` defaults to the location with
+        an added ".paraidx" extension.
+        """
+        sidecar = sidecar or location + SIDECAR_EXTENSION
+        if not os.path.exists(sidecar):
+            return
+
+        try:
+            with open(sidecar, encoding='utf-8') as lines:
+                header, key_field, size, mtime, count = next(lines).rstrip('\n').split('\t')
+                if header != SIDECAR_HEADER:
+                    return
+                if (int(size), int(mtime)) != get_size_and_mtime(location):
+                    return
+
+                paragraphs = []
+                for line in lines:
+                    if not line.endswith('\n'):
+                        # a truncated sidecar is outdated
+                        return
+                    offset, length, start_line, key = line.rstrip('\n').split('\t', 3)
+                    paragraphs.append(ParagraphOffset(
+                        offset=int(offset),
+                        length=int(length),
+                        start_line=int(start_line),
+                        key=key or None,
+                    ))
+        except (StopIteration, ValueError, UnicodeDecodeError, OSError):
+            # an empty or malformed sidecar is outdated
+            return
+
+        if len(paragraphs) != int(count):
+            # a truncated sidecar is outdated
+            return
+
+        return cls(
+            location=location,
+            key_field=key_field,
+            paragraphs=paragraphs,
+            size=int(size),
+            mtime=int(mtime),
+        )
+
+    def get(self, key):
+        """
+        Return a list of ParagraphOffset for a ``key``.
+        """
+        return self.paragraphs_by_key.get(key, [])
+
+    def keys(self):
+        return self.paragraphs_by_key.keys()
+
+    def iter_paragraph_texts(self, paragraphs):
+        """
+        Yield tuples of (ParagraphOffset, text) reading the text of each of a
+        ``paragraphs`` list of ParagraphOffset from the indexed file.
+        """
+        with open(self.location, 'rb') as indexed:
+            for para in paragraphs:
+                indexed.seek(para.offset)
+                yield para, debcon.decode_text(indexed.read(para.length))
+
+    def get_paragraphs_data(self, key):
+        """
+        Return a list of paragraph data mappings for a ``key`` as returned by
+        ``debcon.get_paragraph_data()``.
+        """
+        return [
+            debcon.get_paragraph_data(text)
+            for _para, text in self.iter_paragraph_texts(self.get(key))
+        ]
+
+    def get_paragraphs_as_field_groups(self, key):
+        """
+        Return a list of lists of Deb822Field for a ``key`` as returned by
+        ``deb822.get_paragraphs_as_field_groups()``. Line numbers are line
+        numbers in the whole indexed file.
+        """
+        groups = []
+        for para, text in self.iter_paragraph_texts(self.get(key)):
+            lines = deb822.NumberedLine.lines_from_iterable(
+                text.splitlines(True),
+                start_line=para.start_line,
+            )
+            groups.extend(deb822.get_paragraphs_as_field_groups_from_lines(lines))
+        return groups
+
+
+def get_size_and_mtime(location):
+    """
+    Return a tuple of (size in bytes, modification time in nanoseconds) for the
+    file at ``location``.
+    """
+    stat = os.stat(location)
+    return stat.st_size, stat.st_mtime_ns
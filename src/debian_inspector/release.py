@@ -0,0 +1,228 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import io
+import os
+import posixpath
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import checksums
+from debian_inspector import contents
+from debian_inspector import debcon
+from debian_inspector import indexes
+
+"""
+Parse the Release and InRelease files of a Debian repository and verify the
+index files they list, such as Packages, Sources and Contents files.
+
+An index file is verified while it is parsed: its digests are computed from
+the same bytes that are read for parsing such that each index file is read
+only once.
+
+See https://wiki.debian.org/DebianRepository/Format#A.22Release.22_files
+"""
+
+# Mapping of {Release field name: debcon.File digest type} of the tables of
+# index files of a Release file.
+RELEASE_DIGEST_FIELDS = {
+    'md5sum': 'md5',
+    'sha1': 'sha1',
+    'sha256': 'sha256',
+    'sha512': 'sha512',
+}
+
+# Digest types from the strongest to the weakest.
+STRONGEST_DIGEST_TYPES = ('sha512', 'sha256', 'sha1', 'md5')
+
+
+@attrs
+class ReleaseFile(object):
+    """
+    A Debian repository Release or InRelease file.
+    """
+    # location of the Release file
+    location = attrib(default=None)
+    # mapping of the fields of the Release file other than the digest tables
+    data = attrib(default=Factory(dict), repr=False)
+    # mapping of {path: debcon.File} of the index files listed in the digest
+    # tables, where path is relative to the directory of the Release file
+    files_by_path = attrib(default=Factory(dict), repr=False)
+
+    @classmethod
+    def from_file(cls, location):
+        """
+        Return a new ReleaseFile from the Release or InRelease file at
+        ``location``. The PGP signature of an InRelease file is ignored and
+        not checked.
+        """
+        text = debcon.read_text_file(location)
+        return cls.from_string(text, location=location)
+
+    @classmethod
+    def from_string(cls, text, location=None):
+        """
+        Return a new ReleaseFile from a Release file ``text`` string.
+        """
+        data = debcon.get_paragraph_data(text, remove_pgp_signature=True)
+        files_by_path = {}
+        for field_name, digest_type in RELEASE_DIGEST_FIELDS.items():
+            for path, size, digest in debcon.collect_file(data.pop(field_name, None)):
+                release_file = files_by_path.get(path)
+                if not release_file:
+                    release_file = files_by_path[path] = debcon.File(name=path, size=size)
+                setattr(release_file, digest_type, digest)
+        return cls(location=location, data=data, files_by_path=files_by_path)
+
+    @property
+    def suite(self):
+        return self.data.get('suite')
+
+    @property
+    def codename(self):
+        return self.data.get('codename')
+
+    @property
+    def architectures(self):
+        return debcon.space_separated(self.data.get('architectures'))
+
+    @property
+    def components(self):
+        return debcon.space_separated(self.data.get('components'))
+
+    def get(self, path):
+        """
+        Return the debcon.File listed for a ``path`` relative to the directory
+        of the Release file such as "main/binary-amd64/Packages.xz" or None.
+        """
+        return self.files_by_path.get(path)
+
+    def paths(self):
+        return list(self.files_by_path)
+
+    def get_path(self, location):
+        """
+        Return the path relative to the directory of this Release file of an
+        index file at ``location``, as listed in the Release file.
+        """
+        path = os.path.relpath(location, os.path.dirname(self.location or ''))
+        return posixpath.join(*path.split(os.sep))
+
+    def open_index(self, location, path=None, all_digests=False):
+        """
+        Return an IndexReader to read and verify the index file at ``location``
+        listed with a ``path`` in this Release file. The ``path`` defaults to
+        the path of ``location`` relative to the directory of the Release file.
+        Only the strongest listed digest is checked unless ``all_digests`` is
+        True.
+        """
+        if path is None:
+            path = self.get_path(location)
+        return IndexReader(
+            location=location,
+            path=path,
+            release_file=self.get(path),
+            all_digests=all_digests,
+        )
+
+    def verify_index(self, location, path=None, all_digests=False):
+        """
+        Return a checksums.FileVerification of the index file at ``location``
+        listed with a ``path`` in this Release file.
+        """
+        with self.open_index(location, path=path, all_digests=all_digests) as reader:
+            return reader.get_verification()
+
+    def get_packages_index(self, location, path=None, all_digests=False):
+        """
+        Return a tuple of (indexes.PackagesIndex, checksums.FileVerification)
+        for the Packages file at ``location`` verified while it is parsed.
+        """
+        with self.open_index(location, path=path, all_digests=all_digests) as reader:
+            index = indexes.PackagesIndex.from_file(location, file_object=reader.stream)
+            return index, reader.get_verification()
+
+    def get_sources_index(self, location, path=None, all_digests=False):
+        """
+        Return a tuple of (indexes.SourcesIndex, checksums.FileVerification)
+        for the Sources file at ``location`` verified while it is parsed.
+        """
+        with self.open_index(location, path=path, all_digests=all_digests) as reader:
+            index = indexes.SourcesIndex.from_file(location, file_object=reader.stream)
+            return index, reader.get_verification()
+
+    def get_contents(self, location, path=None, has_header=False, all_digests=False):
+        """
+        Return a tuple of ({path: [list of packages]}, {package: [list of
+        paths]}, checksums.FileVerification) for the Contents file at
+        ``location`` verified while it is parsed. See
+        ``contents.parse_contents`` for details.
+        """
+        with self.open_index(location, path=path, all_digests=all_digests) as reader:
+            packages_by_path, paths_by_package = contents.parse_contents(
+                reader.stream,
+                has_header=has_header,
+            )
+            return packages_by_path, paths_by_package, reader.get_verification()
+
+
+class IndexReader(object):
+    """
+    A context manager to read an index file at ``location`` listed with a
+    ``path`` in a Release file and verify it against its ``release_file``
+    debcon.File while it is read. Parse the ``stream`` buffered binary file
+    object, then call ``get_verification()``.
+    """
+
+    def __init__(self, location, path, release_file=None, all_digests=False):
+        self.location = location
+        self.path = path
+        self.release_file = release_file
+
+        digest_types = []
+        if release_file:
+            digest_types = [dt for dt in STRONGEST_DIGEST_TYPES if getattr(release_file, dt)]
+            if not all_digests:
+                digest_types = digest_types[:1]
+        self.digest_types = digest_types
+
+        self.reader = checksums.DigestingReader(
+            file_object=open(location, 'rb', buffering=0),
+            digest_types=digest_types,
+        )
+        self.stream = io.BufferedReader(self.reader, buffer_size=checksums.CHUNK_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stream.close()
+
+    def get_verification(self):
+        """
+        Return a checksums.FileVerification of the index file, reading the rest
+        of the file that was not read yet, if any.
+        """
+        self.reader.drain()
+        if not self.release_file:
+            return checksums.FileVerification(
+                name=self.path,
+                location=self.location,
+                size=self.reader.size,
+                error=f'File not listed in Release file: {self.path}',
+            )
+        verification = checksums.FileVerification.from_file(
+            file=self.release_file,
+            location=self.location,
+            digest_types=self.digest_types,
+        )
+        verification.size = self.reader.size
+        verification.digests = self.reader.get_digests()
+        return verification
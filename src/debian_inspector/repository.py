@@ -0,0 +1,402 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import contents
+from debian_inspector import debcon
+from debian_inspector import indexes
+from debian_inspector.release import ReleaseFile
+from debian_inspector.translation import TranslationIndex
+
+"""
+Load at once the index files of a Debian repository snapshot such as a mirror
+"dists/<suite>" directory, a mirror "dists" directory with several suites or
+an apt "/var/lib/apt/lists" directory.
+
+The index files are discovered from the Release and InRelease files, parsed
+concurrently in a pool of threads or processes and exposed with unified
+lookups across all the suites, components and architectures.
+"""
+
+# Default number of threads or processes used to parse index files.
+DEFAULT_MAX_WORKERS = 4
+
+# Kinds of index files that can be loaded.
+INDEX_KINDS = ('packages', 'sources', 'contents', 'translation')
+
+# Compression extensions of index files in order of preference, from the
+# fastest to decompress to the slowest.
+INDEX_EXTENSIONS = ('', '.gz', '.xz', '.bz2')
+
+# Names of Release files in order of preference.
+RELEASE_NAMES = ('InRelease', 'Release')
+
+
+def get_index_kind(path):
+    """
+    Return the kind of index file of a ``path`` listed in a Release file such
+    as "main/binary-amd64/Packages.xz", one of "packages", "sources",
+    "contents" or "translation", or None for other files.
+    """
+    name = path.rpartition('/')[-1]
+    base_name, _, extension = name.rpartition('.')
+    if not base_name or '.' + extension not in INDEX_EXTENSIONS:
+        base_name = name
+    if base_name == 'Packages':
+        return 'packages'
+    if base_name == 'Sources':
+        return 'sources'
+    if base_name.startswith('Contents-'):
+        return 'contents'
+    if base_name.startswith('Translation-'):
+        return 'translation'
+
+
+@attrs
+class IndexFile(object):
+    """
+    An index file listed in a Release file and found in a snapshot.
+    """
+    # one of the INDEX_KINDS
+    kind = attrib()
+    # path listed in the Release file such as "main/binary-amd64/Packages.xz"
+    path = attrib()
+    # location of the local file
+    location = attrib()
+    # the ReleaseFile that lists this index file
+    release_file = attrib(default=None, repr=False)
+
+
+@attrs
+class RepositorySnapshot(object):
+    """
+    The index files of a Debian repository snapshot.
+    """
+    # location of the snapshot directory
+    location = attrib()
+    # list of ReleaseFile
+    release_files = attrib(default=Factory(list), repr=False)
+    # list of IndexFile found from the Release files
+    index_files = attrib(default=Factory(list), repr=False)
+    # mapping of {index file location: indexes.PackagesIndex}
+    packages_indexes = attrib(default=Factory(dict), repr=False)
+    # mapping of {index file location: indexes.SourcesIndex}
+    sources_indexes = attrib(default=Factory(dict), repr=False)
+    # mapping of {index file location: ({path: [packages]}, {package: [paths]})}
+    contents = attrib(default=Factory(dict), repr=False)
+    # mapping of {index file location: translation.TranslationIndex}
+    translations = attrib(default=Factory(dict), repr=False)
+    # mapping of {index file location: checksums.FileVerification} if verified
+    verifications = attrib(default=Factory(dict), repr=False)
+    # mapping of {stage: duration in seconds}
+    timings = attrib(default=Factory(dict))
+
+    @classmethod
+    def from_location(
+        cls,
+        location,
+        kinds=INDEX_KINDS,
+        verify=False,
+        max_workers=DEFAULT_MAX_WORKERS,
+        use_processes=False,
+    ):
+        """
+        Return a new RepositorySnapshot from the directory at ``location``,
+        loading the index files of a ``kinds`` list of INDEX_KINDS. Verify the
+        index files against their Release file while parsing them if
+        ``verify`` is True.
+
+        Index files are parsed concurrently with ``max_workers`` threads, or
+        processes if ``use_processes`` is True, as parsing is CPU-bound.
+
+        The ``timings`` of the returned snapshot have the wall clock duration
+        in seconds of the "discover" and "parse" stages and of the whole
+        "load", and the cumulated parsing duration of each kind of index file.
+        """
+        start = time.perf_counter()
+        snapshot = cls(location=location)
+        snapshot.release_files = find_release_files(location)
+        for release_file in snapshot.release_files:
+            snapshot.index_files.extend(find_index_files(release_file, kinds=kinds))
+        discovered = time.perf_counter()
+        snapshot.timings['discover'] = discovered - start
+
+        for kind in kinds:
+            snapshot.timings[kind] = 0.0
+        if max_workers and max_workers > 1 and len(snapshot.index_files) > 1:
+            executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            # parse the largest files first to balance the workers load
+            index_files = sorted(
+                snapshot.index_files,
+                key=lambda i: os.path.getsize(i.location),
+                reverse=True,
+            )
+            with executor_class(max_workers=max_workers) as executor:
+                loaded = executor.map(load_index_file, index_files, [verify] * len(index_files))
+                for index_file, (result, verification, duration) in zip(index_files, loaded):
+                    snapshot.add(index_file, result, verification, duration)
+        else:
+            for index_file in snapshot.index_files:
+                result, verification, duration = load_index_file(index_file, verify)
+                snapshot.add(index_file, result, verification, duration)
+
+        end = time.perf_counter()
+        snapshot.timings['parse'] = end - discovered
+        snapshot.timings['load'] = end - start
+        return snapshot
+
+    def add(self, index_file, result, verification=None, duration=0.0):
+        """
+        Add the ``result`` of loading an ``index_file`` IndexFile with an
+        optional ``verification`` and parsing ``duration``.
+        """
+        location = index_file.location
+        if index_file.kind == 'packages':
+            self.packages_indexes[location] = result
+        elif index_file.kind == 'sources':
+            self.sources_indexes[location] = result
+        elif index_file.kind == 'contents':
+            self.contents[location] = result
+        elif index_file.kind == 'translation':
+            self.translations[location] = result
+        if verification:
+            self.verifications[location] = verification
+        self.timings[index_file.kind] = self.timings.get(index_file.kind, 0.0) + duration
+
+    def get_packages(self, name):
+        """
+        Return a list of (PackagesIndex, PackageRecord) for a binary package
+        ``name`` across all the Packages files.
+        """
+        return [
+            (index, record)
+            for index in self.packages_indexes.values()
+            for record in index.get(name)
+        ]
+
+    def get_sources(self, name):
+        """
+        Return a list of (SourcesIndex, SourceRecord) for a source package
+        ``name`` across all the Sources files.
+        """
+        return [
+            (index, record)
+            for index in self.sources_indexes.values()
+            for record in index.get(name)
+        ]
+
+    def get_source_names(self, binary):
+        """
+        Return a sorted list of the names of the source packages that build a
+        ``binary`` package name across all the Sources files.
+        """
+        return sorted(set(
+            record.name
+            for index in self.sources_indexes.values()
+            for record in index.get_sources(binary)
+        ))
+
+    def get_owners(self, path):
+        """
+        Return a sorted list of the names of the packages that provide a
+        ``path`` across all the Contents files.
+        """
+        return sorted(set(
+            package
+            for packages_by_path, _paths_by_package in self.contents.values()
+            for package in packages_by_path.get(path, [])
+        ))
+
+    def get_description(self, data, language='en'):
+        """
+        Return a DescriptionField for a Packages file paragraph ``data``
+        mapping, using the full description of its "Description-md5" from the
+        Translation files of a ``language`` if available or else its
+        "Description".
+        """
+        md5 = data.get('description-md5')
+        if md5:
+            for translation in self.translations.values():
+                if translation.language == language and md5 in translation:
+                    return translation.get_description(data)
+        return debcon.DescriptionField.from_value(data.get('description'))
+
+    def close(self):
+        """
+        Release the memory-mapped Translation files.
+        """
+        for translation in self.translations.values():
+            translation.close()
+
+    def get_invalid_verifications(self):
+        """
+        Return a list of the checksums.FileVerification that failed.
+        """
+        return [v for v in self.verifications.values() if not v.is_valid]
+
+
+def find_release_files(location):
+    """
+    Return a list of ReleaseFile found in the directory at ``location`` that
+    is either a "dists/<suite>" directory, a "dists" directory with suite
+    subdirectories or an apt lists directory with "<prefix>_InRelease" files.
+    An InRelease file is preferred over a Release file of the same suite.
+    """
+    release_file = find_release_file(location)
+    if release_file:
+        return [release_file]
+
+    release_files = []
+    names = sorted(os.listdir(location))
+    for name in names:
+        subdir = os.path.join(location, name)
+        if os.path.isdir(subdir):
+            release_file = find_release_file(subdir)
+            if release_file:
+                release_files.append(release_file)
+
+    # apt lists have one Release file for each "<prefix>_" of the file names
+    for name in names:
+        prefix, _, release_name = name.rpartition('_')
+        if not prefix or release_name not in RELEASE_NAMES:
+            continue
+        if release_name == 'Release' and prefix + '_InRelease' in names:
+            continue
+        release_files.append(ReleaseFile.from_file(os.path.join(location, name)))
+
+    return release_files
+
+
+def find_release_file(directory):
+    """
+    Return a ReleaseFile for the InRelease or Release file in a ``directory``
+    or None.
+    """
+    for name in RELEASE_NAMES:
+        location = os.path.join(directory, name)
+        if os.path.isfile(location):
+            return ReleaseFile.from_file(location)
+
+
+def get_index_location(release_file, path):
+    """
+    Return the location of the local file for a ``path`` listed in a
+    ``release_file`` ReleaseFile. In an apt lists directory, the path of an
+    index file is flattened with "_" and prefixed like its Release file name.
+    """
+    directory, release_name = os.path.split(release_file.location)
+    prefix, underscore, _ = release_name.rpartition('_')
+    if underscore:
+        return os.path.join(directory, prefix + '_' + path.replace('/', '_'))
+    return os.path.join(directory, *path.split('/'))
+
+
+def find_index_files(release_file, kinds=INDEX_KINDS):
+    """
+    Return a list of IndexFile of a ``kinds`` list of INDEX_KINDS listed in a
+    ``release_file`` ReleaseFile that exist locally. Only one of the
+    compressed variants of an index file is returned, the fastest to
+    decompress.
+    """
+    index_files = {}
+    for path in release_file.paths():
+        kind = get_index_kind(path)
+        if kind not in kinds:
+            continue
+        # the variants of an index file have the same base path
+        base_path, extension = os.path.splitext(path)
+        if extension not in INDEX_EXTENSIONS:
+            base_path, extension = path, ''
+        existing = index_files.get(base_path)
+        if existing and INDEX_EXTENSIONS.index(existing[0]) < INDEX_EXTENSIONS.index(extension):
+            continue
+        location = get_index_location(release_file, path)
+        if os.path.isfile(location):
+            index_file = IndexFile(
+                kind=kind,
+                path=path,
+                location=location,
+                release_file=release_file,
+            )
+            index_files[base_path] = extension, index_file
+
+    return [index_file for _, index_file in index_files.values()]
+
+
+def load_index_file(index_file, verify=False):
+    """
+    Return a tuple of (parsed index, checksums.FileVerification or None,
+    parsing duration in seconds) for an ``index_file`` IndexFile. Verify it
+    while parsing if ``verify`` is True.
+    """
+    start = time.perf_counter()
+    release_file = index_file.release_file
+    location = index_file.location
+    verification = None
+
+    if index_file.kind == 'packages':
+        if verify:
+            result, verification = release_file.get_packages_index(location, index_file.path)
+        else:
+            result = indexes.PackagesIndex.from_file(location)
+
+    elif index_file.kind == 'sources':
+        if verify:
+            result, verification = release_file.get_sources_index(location, index_file.path)
+        else:
+            result = indexes.SourcesIndex.from_file(location)
+
+    elif index_file.kind == 'contents':
+        result, verification = load_contents(index_file, verify=verify)
+
+    elif index_file.kind == 'translation':
+        if verify:
+            verification = release_file.verify_index(location, index_file.path)
+        result = TranslationIndex.from_file(location)
+
+    else:
+        raise Exception(f'Unsupported kind of index file: {index_file.kind}')
+
+    return result, verification, time.perf_counter() - start
+
+
+def load_contents(index_file, verify=False):
+    """
+    Return a tuple of (({path: [packages]}, {package: [paths]}),
+    checksums.FileVerification or None) for a Contents ``index_file``. Older
+    Contents files with a header are supported.
+    """
+    release_file = index_file.release_file
+    location = index_file.location
+    for has_header in (False, True):
+        try:
+            if verify:
+                packages_by_path, paths_by_package, verification = release_file.get_contents(
+                    location,
+                    index_file.path,
+                    has_header=has_header,
+                )
+            else:
+                verification = None
+                with open(location, 'rb') as stream:
+                    packages_by_path, paths_by_package = contents.parse_contents(
+                        stream,
+                        has_header=has_header,
+                    )
+            return (dict(packages_by_path), dict(paths_by_package)), verification
+        except Exception:
+            if has_header:
+                raise
@@ -0,0 +1,202 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import mmap
+import os
+import re
+import shutil
+import tempfile
+
+from attr import attrib
+from attr import attrs
+from attr import Factory
+
+from debian_inspector import debcon
+
+"""
+Index the long descriptions of the Translation-<language> files of a Debian
+repository by their "Description-md5" to join them with the paragraphs of a
+Packages file.
+
+A Packages file paragraph only has a short "Description" and the md5 of its
+full description in "Description-md5". The full descriptions are in the
+Translation files, which are large and rarely needed: only the offsets of
+their paragraphs are indexed and a description is read and parsed on access
+from a memory-mapped file. A compressed Translation file is decompressed once
+to an anonymous temporary file.
+
+See https://wiki.debian.org/DebianRepository/Format#A.22Translation.22_indices
+"""
+
+# A "Description-md5" field line of a translation paragraph. This field is
+# never the first of a paragraph, which always starts with "Package".
+_description_md5 = re.compile(br'\n[Dd]escription-[Mm][Dd]5:[ \t]*([0-9a-f]+)').finditer
+
+
+def get_language(location):
+    """
+    Return the language code of a Translation file at ``location`` such as
+    "en" for "Translation-en.bz2" or None.
+    """
+    name = os.path.basename(location)
+    _, _, language = name.partition('Translation-')
+    language, _, _extension = language.partition('.')
+    return language or None
+
+
+@attrs
+class TranslationIndex(object):
+    """
+    An index of the descriptions of a Translation file by their md5.
+    """
+    # location of the Translation file
+    location = attrib()
+    # language code such as "en"
+    language = attrib(default=None)
+    # mapping of {description md5: (offset, length)} of translation paragraphs
+    # in the uncompressed file
+    offsets_by_md5 = attrib(default=Factory(dict), repr=False)
+    # memory-mapped uncompressed file content and its file object
+    _mapped = attrib(default=None, repr=False, init=False, eq=False)
+    _file = attrib(default=None, repr=False, init=False, eq=False)
+
+    @classmethod
+    def from_file(cls, location, language=None):
+        """
+        Return a new TranslationIndex for the Translation file at ``location``
+        that can be compressed with gzip, xz or bzip2. The file is scanned once
+        for the "Description-md5" of its paragraphs.
+        """
+        index = cls(location=location, language=language or get_language(location))
+        index.offsets_by_md5 = get_offsets_by_md5(index.get_mapped())
+        return index
+
+    def get_mapped(self):
+        """
+        Return the memory-mapped uncompressed content of the Translation file,
+        mapping it on first use.
+        """
+        if self._mapped is None:
+            self._file = open(self.location, 'rb')
+            uncompressed = debcon.decompressed(self._file)
+            if uncompressed is not self._file:
+                compressed, self._file = self._file, tempfile.TemporaryFile()
+                with compressed, uncompressed:
+                    shutil.copyfileobj(uncompressed, self._file, debcon.CHUNK_SIZE)
+                self._file.flush()
+
+            if os.fstat(self._file.fileno()).st_size:
+                self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # an empty file cannot be memory-mapped
+                self._mapped = b''
+        return self._mapped
+
+    def close(self):
+        """
+        Release the memory-mapped file. It is mapped again if needed.
+        """
+        if isinstance(self._mapped, mmap.mmap):
+            self._mapped.close()
+        if self._file:
+            self._file.close()
+        self._mapped = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def __getstate__(self):
+        # a memory-mapped file cannot be pickled: it is mapped again on use
+        state = dict(self.__dict__)
+        state['_mapped'] = state['_file'] = None
+        return state
+
+    def __contains__(self, md5):
+        return md5 in self.offsets_by_md5
+
+    def __len__(self):
+        return len(self.offsets_by_md5)
+
+    def get_paragraph_data(self, md5):
+        """
+        Return the translation paragraph data mapping with a description
+        ``md5`` or None.
+        """
+        offsets = self.offsets_by_md5.get(md5)
+        if not offsets:
+            return
+        offset, length = offsets
+        paragraph = self.get_mapped()[offset:offset + length]
+        return debcon.get_paragraph_data(debcon.decode_text(paragraph))
+
+    def get(self, md5):
+        """
+        Return the full description text with a description ``md5`` or None.
+        """
+        data = self.get_paragraph_data(md5)
+        if not data:
+            return
+        if self.language:
+            description = data.get(f'description-{self.language}')
+            if description is not None:
+                return description
+        for name, value in data.items():
+            if name.startswith('description-') and name != 'description-md5':
+                return value
+
+    def get_description_field(self, md5):
+        """
+        Return a DescriptionField for a description ``md5`` or None.
+        """
+        description = self.get(md5)
+        if description is not None:
+            return debcon.DescriptionField.from_value(description)
+
+    def get_description(self, data):
+        """
+        Return a DescriptionField for a Packages file paragraph ``data``
+        mapping, using the translated description of its "Description-md5" if
+        available or else its "Description".
+        """
+        md5 = data.get('description-md5')
+        if md5:
+            description = self.get_description_field(md5)
+            if description:
+                return description
+        return debcon.DescriptionField.from_value(data.get('description'))
+
+
+def get_offsets_by_md5(content):
+    """
+    Return a mapping of {description md5: (offset, length)} for each paragraph
+    with a "Description-md5" field in a Translation file ``content`` bytes or
+    memory-mapped file.
+    """
+    offsets_by_md5 = {}
+    # start of the next paragraph after the end of the previous one
+    next_start = 0
+    size = len(content)
+    for match in _description_md5(content):
+        position = match.start()
+        if position < next_start:
+            # a duplicated field in the same paragraph
+            continue
+        # skip any extra empty line between paragraphs
+        start = content.rfind(b'\n\n', next_start, position)
+        start = next_start if start == -1 else start + 2
+        end = content.find(b'\n\n', position)
+        if end == -1:
+            end = next_start = size
+        else:
+            next_start = end + 2
+            end += 1
+        offsets_by_md5[match.group(1).decode('ascii')] = start, end - start
+    return offsets_by_md5
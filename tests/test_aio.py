@@ -0,0 +1,122 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from os import path
+from unittest import mock
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import aio
+from debian_inspector import contents
+from debian_inspector import debcon
+from debian_inspector.copyright import DebianCopyright
+
+
+async def collect(async_iterable):
+    return [item async for item in async_iterable]
+
+
+class TestAio(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def test_read_text_file(self):
+        test_file = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        result = asyncio.run(aio.read_text_file(test_file))
+        assert result == debcon.read_text_file(test_file)
+
+    def test_parse_control_and_copyright(self):
+        dsc = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        assert asyncio.run(aio.parse_control(dsc)) == debcon.Debian822.from_file(dsc)
+
+        test_file = self.get_test_loc('copyright/dropbear.copyright')
+        result = asyncio.run(aio.parse_copyright(test_file))
+        assert result.to_dict() == DebianCopyright.from_file(test_file).to_dict()
+
+    def test_parse_contents_gzipped(self):
+        test_file = self.get_test_loc('contents/debian_Contents-amd64.gz')
+        result = asyncio.run(aio.parse_contents(test_file, has_header=False))
+        assert result == contents.parse_contents(test_file, has_header=False)
+
+    def test_parse_many_in_order_with_bounded_concurrency(self):
+        names = ['dep5-rpm.copyright', 'dropbear.copyright', 'dep5-b43-fwcutter.copyright']
+        locations = [self.get_test_loc('copyright/' + name) for name in names]
+        missing = path.join(self.get_temp_dir(), 'missing')
+        locations.insert(1, missing)
+
+        consumed = []
+
+        def get_locations():
+            for location in locations:
+                consumed.append(location)
+                yield location
+
+        async def check():
+            results = aio.parse_many(get_locations(), kind='copyright', max_concurrency=2)
+            first = await results.__anext__()
+            # back-pressure: only two files were taken before the first result
+            assert consumed == locations[:2]
+            return [first] + await collect(results)
+
+        results = asyncio.run(check())
+        assert [r.location for r in results] == locations
+        assert results[1].error.startswith('FileNotFoundError: ')
+        for result in results[:1] + results[2:]:
+            assert not result.error
+            expected = DebianCopyright.from_file(result.location)
+            assert result.value.to_dict() == expected.to_dict()
+
+    def test_parse_many_fails_without_a_positive_max_concurrency(self):
+        dsc = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        for max_concurrency in (0, -1, None):
+            results = aio.parse_many([dsc], kind='dsc', max_concurrency=max_concurrency)
+            with self.assertRaises(ValueError) as error:
+                asyncio.run(collect(results))
+            assert str(error.exception) == 'max_concurrency must be a positive integer'
+
+    def test_parse_many_with_a_process_executor(self):
+        dsc = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = aio.parse_many([dsc, dsc], kind='dsc', executor=executor)
+            results = asyncio.run(collect(results))
+        expected = debcon.Debian822.from_file(dsc)
+        assert [r.value for r in results] == [expected, expected]
+
+    def test_iter_paragraphs_data_by_batches(self):
+        packages = self.get_test_loc('debcon/packages/simple_packages')
+        expected = list(debcon.get_paragraphs_data_from_file(packages, fields=['package']))
+        for batch_size in (1, 2, 1000):
+            paragraphs = aio.iter_paragraphs_data(
+                packages, fields=['package'], batch_size=batch_size)
+            assert asyncio.run(collect(paragraphs)) == expected
+
+    def test_iter_paragraphs_data_closes_the_file_when_stopped_early(self):
+        packages = self.get_test_loc('debcon/packages/simple_packages')
+        closed = []
+        get_paragraphs = debcon.get_paragraphs_data_from_file
+
+        def get_paragraphs_data_from_file(location, fields=None):
+            try:
+                yield from get_paragraphs(location, fields=fields)
+            finally:
+                closed.append(location)
+
+        async def check():
+            paragraphs = aio.iter_paragraphs_data(packages, batch_size=2)
+            results = [await paragraphs.__anext__() for _ in range(3)]
+            await paragraphs.aclose()
+            # closed before the async generator is garbage collected
+            assert closed == [packages]
+            return results
+
+        patched = mock.patch.object(
+            debcon, 'get_paragraphs_data_from_file', get_paragraphs_data_from_file)
+        with patched:
+            results = asyncio.run(check())
+        assert results == list(get_paragraphs(packages))[:3]
@@ -0,0 +1,49 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import batch
+from debian_inspector import debcon
+from debian_inspector.copyright import DebianCopyright
+
+
+class TestBatch(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def test_parse_many_copyright_files_in_order(self):
+        names = ['dep5-rpm.copyright', 'dropbear.copyright', 'dep5-b43-fwcutter.copyright']
+        locations = [self.get_test_loc('copyright/' + name) for name in names]
+        for jobs in (1, 2):
+            results = list(batch.parse_many(locations, kind='copyright', jobs=jobs, chunksize=2))
+            assert [r.location for r in results] == locations
+            for result, location in zip(results, locations):
+                assert not result.error
+                expected = DebianCopyright.from_file(location)
+                assert result.value.to_dict() == expected.to_dict()
+
+    def test_parse_many_reports_errors_and_continues(self):
+        dsc = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        missing = path.join(self.get_temp_dir(), 'missing.dsc')
+        locations = [missing, dsc, missing]
+        for jobs in (1, 2):
+            results = list(batch.parse_many(locations, kind='dsc', jobs=jobs))
+            assert [r.location for r in results] == locations
+            assert results[0].error.startswith('FileNotFoundError: ')
+            assert results[0].value is None
+            assert not results[1].error
+            assert results[1].value == debcon.Debian822.from_file(dsc)
+            assert results[2].error
+
+    def test_parse_many_paragraphs_with_a_function(self):
+        packages = self.get_test_loc('debcon/packages/simple_packages')
+        results = list(batch.parse_many([packages, packages], kind=batch.parse_paragraphs, jobs=2))
+        expected = list(debcon.get_paragraphs_data_from_file(packages))
+        assert [r.value for r in results] == [expected, expected]
@@ -0,0 +1,116 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import os
+from os import path
+import shutil
+from unittest import mock
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import debcon
+from debian_inspector.cache import get_library_version
+from debian_inspector.cache import ParseCache
+from debian_inspector.copyright import DebianCopyright
+
+
+class OtherCopyright(DebianCopyright):
+    pass
+
+
+class TestParseCache(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_cache(self, **kwargs):
+        return ParseCache(location=self.get_temp_dir(), version='1.0', **kwargs)
+
+    def test_ParseCache_get_or_parse_parses_once_by_content(self):
+        cache = self.get_cache()
+        test_file = self.get_test_loc('copyright/dropbear.copyright')
+        copy = path.join(self.get_temp_dir(), 'copyright')
+        shutil.copy(test_file, copy)
+        calls = []
+
+        def parser(location):
+            calls.append(location)
+            return DebianCopyright.from_file(location)
+
+        first = cache.get_or_parse(test_file, kind='copyright', parser=parser)
+        second = cache.get_or_parse(copy, kind='copyright', parser=parser)
+        assert calls == [test_file]
+        assert first.to_dict() == second.to_dict()
+
+    def test_ParseCache_get_key_depends_on_version_kind_and_options(self):
+        cache = self.get_cache()
+        test_file = self.get_test_loc('copyright/dropbear.copyright')
+        key = cache.get_key(test_file, kind='copyright')
+        assert key == cache.get_key(test_file, kind='copyright')
+        assert key != cache.get_key(test_file, kind='paragraphs')
+        assert key != cache.get_key(test_file, kind='copyright', options=(True,))
+        other = ParseCache(location=cache.location, version='2.0')
+        assert key != other.get_key(test_file, kind='copyright')
+
+    def test_ParseCache_ignores_corrupted_entries(self):
+        cache = self.get_cache()
+        cache.set('abcdef', {'foo': 'bar'})
+        assert cache.get('abcdef') == (True, {'foo': 'bar'})
+        with open(cache.get_entry_location('abcdef'), 'wb') as out:
+            out.write(b'junk')
+        assert cache.get('abcdef') == (False, None)
+        assert not path.exists(cache.get_entry_location('abcdef'))
+
+    def test_ParseCache_evicts_least_recently_used_entries(self):
+        cache = self.get_cache(max_size=3000)
+        value = os.urandom(900)
+        for i, key in enumerate(['aa1', 'bb2', 'cc3']):
+            cache.set(key, value)
+            os.utime(cache.get_entry_location(key), (i, i))
+        # aa1 is now the most recently used
+        assert cache.get('aa1')[0]
+        cache.set('dd4', value)
+        assert cache.get_size() <= 3000 * 3 // 4
+        assert cache.get('aa1')[0]
+        assert cache.get('dd4')[0]
+        assert not cache.get('bb2')[0]
+        assert not cache.get('cc3')[0]
+
+    def test_get_paragraphs_data_from_file_with_cache(self):
+        cache = self.get_cache()
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        for _ in range(2):
+            results = list(debcon.get_paragraphs_data_from_file(test_file, cache=cache))
+            assert results == expected
+        results = debcon.get_paragraphs_data_from_file(test_file, fields=['Package'], cache=cache)
+        results = list(results)
+        assert results == [{'package': p['package']} for p in expected]
+        assert len(list(cache.iter_entries())) == 2
+
+    def test_Debian822_and_DebianCopyright_from_file_with_cache(self):
+        cache = self.get_cache()
+        dsc = self.get_test_loc('debcon/dsc/zlib_1.2.11.dfsg-1.dsc')
+        copyright_file = self.get_test_loc('copyright/dep5-rpm.copyright')
+        for _ in range(2):
+            assert debcon.Debian822.from_file(dsc, cache=cache) == debcon.Debian822.from_file(dsc)
+            results = DebianCopyright.from_file(copyright_file, cache=cache)
+            assert results.to_dict() == DebianCopyright.from_file(copyright_file).to_dict()
+        assert len(list(cache.iter_entries())) == 2
+
+    def test_DebianCopyright_subclasses_do_not_share_cached_results(self):
+        cache = self.get_cache()
+        copyright_file = self.get_test_loc('copyright/dep5-rpm.copyright')
+        for _ in range(2):
+            assert type(DebianCopyright.from_file(copyright_file, cache=cache)) is DebianCopyright
+            assert type(OtherCopyright.from_file(copyright_file, cache=cache)) is OtherCopyright
+        assert len(list(cache.iter_entries())) == 2
+
+    def test_get_library_version_is_unknown_if_not_installed(self):
+        from importlib import metadata
+        not_found = metadata.PackageNotFoundError('debian_inspector')
+        with mock.patch.object(metadata, 'version', side_effect=not_found):
+            assert get_library_version() == 'unknown'
@@ -0,0 +1,168 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import hashlib
+import io
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import checksums
+from debian_inspector import debcon
+
+
+class TestChecksums(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def create_dsc(self, contents, corrupted=()):
+        """
+        Return the location of a .dsc file listing files with ``contents``, a
+        mapping of {name: bytes}, in a new temp directory. The listed digests
+        of the ``corrupted`` file names are wrong.
+        """
+        location = self.get_temp_dir()
+        fields = {'Files': [], 'Checksums-Sha1': [], 'Checksums-Sha256': [], 'Checksums-Sha512': []}
+        for name, content in contents.items():
+            with open(path.join(location, name), 'wb') as out:
+                out.write(content)
+            if name in corrupted:
+                content += b'x'
+            size = len(content)
+            fields['Files'].append(f' {hashlib.md5(content).hexdigest()} {size} {name}')
+            fields['Checksums-Sha1'].append(f' {hashlib.sha1(content).hexdigest()} {size} {name}')
+            sha256 = hashlib.sha256(content).hexdigest()
+            fields['Checksums-Sha256'].append(f' {sha256} {size} {name}')
+            sha512 = hashlib.sha512(content).hexdigest()
+            fields['Checksums-Sha512'].append(f' {sha512} {size} {name}')
+
+        dsc = path.join(location, 'foo_1.0-1.dsc')
+        with open(dsc, 'w') as out:
+            out.write('Format: 3.0 (quilt)\nSource: foo\nVersion: 1.0-1\n')
+            for name, values in fields.items():
+                out.write(name + ':\n' + '\n'.join(values) + '\n')
+        return dsc
+
+    def test_collect_files_collects_sha512(self):
+        dsc = self.create_dsc({'foo_1.0.orig.tar.gz': b'foo'})
+        data = debcon.get_paragraph_data_from_file(dsc)
+        files = debcon.collect_files(data)
+        assert files['foo_1.0.orig.tar.gz'].sha512 == hashlib.sha512(b'foo').hexdigest()
+
+    def test_compute_digests(self):
+        location = self.get_temp_file()
+        content = b'foo' * (checksums.CHUNK_SIZE // 2)
+        with open(location, 'wb') as out:
+            out.write(content)
+        expected = {
+            'md5': hashlib.md5(content).hexdigest(),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+        for use_mmap in (False, True):
+            size, digests = checksums.compute_digests(
+                location, digest_types=('md5', 'sha256'), use_mmap=use_mmap)
+            assert size == len(content)
+            assert digests == expected
+
+    def test_compute_digests_of_empty_file(self):
+        location = self.get_temp_file()
+        with open(location, 'wb'):
+            pass
+        for use_mmap in (False, True):
+            size, digests = checksums.compute_digests(
+                location, digest_types=('sha1',), use_mmap=use_mmap)
+            assert size == 0
+            assert digests == {'sha1': hashlib.sha1(b'').hexdigest()}
+
+    def test_verify_dsc_with_valid_files(self):
+        dsc = self.create_dsc({
+            'foo_1.0.orig.tar.gz': b'foo',
+            'foo_1.0-1.debian.tar.xz': b'debian',
+        })
+        for use_mmap in (False, True):
+            results = checksums.verify_dsc(dsc, use_mmap=use_mmap)
+            assert [r.name for r in results] == ['foo_1.0.orig.tar.gz', 'foo_1.0-1.debian.tar.xz']
+            assert all(r.is_valid for r in results)
+            assert results[0].size == 3
+            assert sorted(results[0].digests) == ['md5', 'sha1', 'sha256', 'sha512']
+
+    def test_verify_dsc_reports_mismatches(self):
+        dsc = self.create_dsc(
+            contents={
+                'foo_1.0.orig.tar.gz': b'foo',
+                'foo_1.0-1.debian.tar.xz': b'debian',
+            },
+            corrupted=['foo_1.0-1.debian.tar.xz'],
+        )
+        results = checksums.verify_dsc(dsc, max_workers=1)
+        assert results[0].is_valid
+        assert not results[1].is_valid
+        assert results[1].mismatches == ['size', 'md5', 'sha1', 'sha256', 'sha512']
+
+    def test_verify_dsc_reports_inconsistent_sizes(self):
+        dsc = self.create_dsc({'foo_1.0.orig.tar.gz': b'foo'})
+        with open(dsc) as inp:
+            text = inp.read()
+        sha256 = hashlib.sha256(b'foo').hexdigest()
+        text = text.replace(f'{sha256} 3 ', f'{sha256} 4 ')
+        with open(dsc, 'w') as out:
+            out.write(text)
+
+        result, = checksums.verify_dsc(dsc)
+        assert not result.is_valid
+        assert result.mismatches == []
+        assert result.error == 'Size 4 in Checksums-SHA256 differs from size 3 in Files'
+
+    def test_verify_dsc_reports_files_missing_from_files_field(self):
+        dsc = self.create_dsc({'foo_1.0.orig.tar.gz': b'foo'})
+        sha256 = hashlib.sha256(b'g').hexdigest()
+        with open(dsc) as inp:
+            text = inp.read()
+        text = text.replace('Checksums-Sha256:\n', f'Checksums-Sha256:\n {sha256} 1 g.tar.gz\n')
+        with open(dsc, 'w') as out:
+            out.write(text)
+
+        results = checksums.verify_dsc(dsc)
+        assert [r.name for r in results] == ['foo_1.0.orig.tar.gz', 'g.tar.gz']
+        assert results[0].is_valid
+        assert not results[1].is_valid
+        assert results[1].error.startswith('Cannot read file:')
+        assert results[1].error.endswith('; File listed in Checksums-SHA256 but not in Files')
+
+    def test_verify_files_reports_missing_files(self):
+        location = self.get_temp_dir()
+        file = debcon.File(name='missing.tar.gz', size='3', md5=hashlib.md5(b'foo').hexdigest())
+        result, = checksums.verify_files([file], base_dir=location)
+        assert not result.is_valid
+        assert result.error.startswith('Cannot read file:')
+        assert result.to_dict()['mismatches'] == ['size', 'md5']
+
+    def test_verify_files_rejects_names_outside_of_base_dir(self):
+        base_dir = self.get_temp_dir()
+        outside = self.get_temp_file()
+        with open(outside, 'wb') as out:
+            out.write(b'foo')
+        names = ['../' + path.basename(outside), outside, 'sub/foo', '..', '']
+        files = [debcon.File(name=name, size='3') for name in names]
+        results = checksums.verify_files(files, base_dir=base_dir, max_workers=1)
+        for name, result in zip(names, results):
+            assert not result.is_valid
+            assert result.error == f'Invalid file name: {name!r}'
+            assert result.location is None
+            assert result.size is None
+
+    def test_DigestingReader_computes_digests_of_bytes_read(self):
+        location = self.get_temp_file()
+        content = b'foo\nbar\n' * 1000
+        with open(location, 'wb') as out:
+            out.write(content)
+        reader = checksums.DigestingReader(open(location, 'rb', buffering=0), ['sha256'])
+        with io.BufferedReader(reader) as stream:
+            assert stream.readline() == b'foo\n'
+            reader.drain()
+            assert reader.size == len(content)
+            assert reader.get_digests() == {'sha256': hashlib.sha256(content).hexdigest()}
@@ -0,0 +1,103 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import csv
+import io
+import json
+from os import path
+import unittest
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import columnar
+from debian_inspector import debcon
+from debian_inspector.columnar import ColumnarBuilder
+
+
+class TestColumnarBuilder(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_builder(self):
+        builder = ColumnarBuilder()
+        builder.add_paragraphs([
+            {'package': 'foo', 'architecture': 'amd64', 'installed-size': '12'},
+            {'package': 'bar', 'architecture': 'all', 'section': 'libs'},
+            {'package': 'baz', 'architecture': 'amd64', 'installed-size': 'NaN'},
+        ])
+        return builder
+
+    def test_ColumnarBuilder_add_builds_columns(self):
+        builder = self.get_builder()
+        assert len(builder) == 3
+        assert builder.names() == ['package', 'architecture', 'installed-size', 'section']
+        assert builder.get_column('package') == ['foo', 'bar', 'baz']
+        assert builder.get_column('architecture') == ['amd64', 'all', 'amd64']
+        assert builder.get_column('installed-size') == [12, None, None]
+        assert builder.get_column('section') == [None, 'libs', None]
+        assert list(builder.columns['architecture']) == [0, 1, 0]
+        assert list(builder.columns['section']) == [-1, 2, -1]
+        assert builder.dictionary.values == ['amd64', 'all', 'libs']
+
+    def test_ColumnarBuilder_iter_rows(self):
+        builder = self.get_builder()
+        assert list(builder.iter_rows()) == [
+            ('foo', 'amd64', 12, None),
+            ('bar', 'all', None, 'libs'),
+            ('baz', 'amd64', None, None),
+        ]
+
+    def test_ColumnarBuilder_with_fields(self):
+        builder = ColumnarBuilder(fields=['Package', 'Section'])
+        builder.add({'package': 'foo', 'architecture': 'amd64'})
+        assert builder.names() == ['package', 'section']
+        assert list(builder.iter_rows()) == [('foo', None)]
+
+    def test_ColumnarBuilder_from_file_is_same_as_paragraphs(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        fields = ['package', 'version', 'architecture', 'maintainer', 'installed-size']
+        builder = ColumnarBuilder.from_file(test_file, fields=fields)
+        paragraphs = list(debcon.get_paragraphs_data_from_file(test_file))
+        assert len(builder) == len(paragraphs)
+        assert builder.get_column('package') == [p.get('package') for p in paragraphs]
+        assert builder.get_column('maintainer') == [p.get('maintainer') for p in paragraphs]
+
+    def test_ColumnarBuilder_to_csv(self):
+        output = io.StringIO()
+        self.get_builder().to_csv(output)
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        assert rows == [
+            ['package', 'architecture', 'installed-size', 'section'],
+            ['foo', 'amd64', '12', ''],
+            ['bar', 'all', '', 'libs'],
+            ['baz', 'amd64', '', ''],
+        ]
+
+    def test_ColumnarBuilder_to_jsonl(self):
+        output = io.StringIO()
+        self.get_builder().to_jsonl(output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert lines == [
+            {'package': 'foo', 'architecture': 'amd64', 'installed-size': 12},
+            {'package': 'bar', 'architecture': 'all', 'section': 'libs'},
+            {'package': 'baz', 'architecture': 'amd64'},
+        ]
+
+    @unittest.skipIf(columnar.numpy is None, 'NumPy is not installed')
+    def test_ColumnarBuilder_to_numpy(self):
+        records = self.get_builder().to_numpy()
+        assert list(records['package']) == ['foo', 'bar', 'baz']
+        assert list(records['architecture']) == [0, 1, 0]
+        assert list(records['installed-size']) == [12, -1, -1]
+
+    @unittest.skipIf(columnar.numpy is not None, 'NumPy is installed')
+    def test_ColumnarBuilder_to_numpy_without_numpy(self):
+        try:
+            self.get_builder().to_numpy()
+            self.fail('Exception not raised')
+        except Exception as e:
+            assert str(e) == 'NumPy is required to export to a NumPy array.'
@@ -37,3 +37,11 @@ class TestContentsParse(JsonTester):
         results2 = contents.parse_contents(test_file2, has_header=False)
 
         assert results == results2
+
+    def test_parse_contents_from_file_object_gzipped_or_not(self):
+        test_file = self.get_test_loc('contents/debian_Contents-amd64.gz')
+        expected = contents.parse_contents(test_file, has_header=False)
+        for name in ('debian_Contents-amd64.gz', 'debian_Contents-amd64'):
+            with open(self.get_test_loc('contents/' + name), 'rb') as file_object:
+                results = contents.parse_contents(file_object, has_header=False)
+            assert results == expected
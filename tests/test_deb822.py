@@ -7,6 +7,7 @@
 #
 
 from os import path
+from unittest import mock
 
 from test_utils import JsonTester  # NOQA
 
@@ -131,3 +132,148 @@ License: GPL-3+
         expected_loc = 'deb822/empty_lines.copyright-expected.json'
         results = get_paras_data(test_file)
         self.check_json(results, expected_loc, regen=False)
+
+    def test_get_paragraphs_as_field_groups_from_file_object__is_same_as_from_text(self):
+        test_file = self.get_test_loc('deb822/dropbear.copyright')
+        with open(test_file) as tf:
+            expected = list(deb822.get_paragraphs_as_field_groups(tf.read()))
+
+        with open(test_file) as tf:
+            results = deb822.get_paragraphs_as_field_groups_from_file_object(tf)
+            assert not isinstance(results, list)
+            assert list(results) == expected
+
+    def test_get_paragraphs_as_field_groups_from_file__handles_latin1_files(self):
+        test_file = self.get_temp_file()
+        with open(test_file, 'wb') as tf:
+            tf.write('Files: *\nCopyright: 2003 G\xe9rard\n'.encode('latin-1') * 200)
+        results = list(deb822.get_paragraphs_as_field_groups_from_file(test_file))
+        assert results[-1][-1].text == '2003 G\xe9rard'
+        assert results[-1][-1].start_line == 400
+
+    def test_get_paragraphs_as_field_groups_from_file_object__is_same_by_blocks(self):
+        test_file = self.get_test_loc('deb822/empty_lines.copyright')
+        with open(test_file) as tf:
+            expected = list(deb822.get_paragraphs_as_field_groups(tf.read()))
+
+        for block_size in (1, 10, 100):
+            with mock.patch.object(deb822, 'BLOCK_SIZE', block_size):
+                with open(test_file) as tf:
+                    results = deb822.get_paragraphs_as_field_groups_from_file_object(tf)
+                    assert list(results) == expected
+
+    def test_NumberedLine_lines_from_iterable__splits_lines_as_lines_from_text(self):
+        lines = ['a\n', 'b\x0cc\n', '\n', ' \t\n', 'd']
+        results = list(NumberedLine.lines_from_iterable(lines))
+        assert results == NumberedLine.lines_from_text(''.join(lines))
+
+
+class TestGetParagraphsAsFieldSpans(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def check_same_as_field_groups(self, text):
+        lines = deb822.NumberedLine.lines_from_text(text)
+        expected = list(deb822.get_paragraphs_as_field_groups_from_lines(lines))
+        assert list(deb822.get_paragraphs_as_field_groups(text)) == expected
+        spans = list(deb822.get_paragraphs_as_field_spans(text))
+        assert [[s.to_field() for s in group] for group in spans] == expected
+
+        for span_group, field_group in zip(spans, expected):
+            for span, field in zip(span_group, field_group):
+                assert span.name == field.name
+                assert span.text == field.text
+                if field.lines:
+                    assert span.start_line == field.start_line
+                    assert span.end_line == field.end_line
+
+    def test_get_paragraphs_as_field_spans__is_same_as_field_groups_on_files(self):
+        for test_file in (
+            'deb822/dep5-b43-fwcutter.copyright',
+            'deb822/dep5-rpm.copyright',
+            'deb822/dropbear.copyright',
+            'deb822/empty_lines.copyright',
+            'copyright/debian-slim-gpgv.copyright',
+            'copyright/dupe-field.copyright',
+            'copyright/test-licence-license.copyright',
+        ):
+            with open(self.get_test_loc(test_file)) as tf:
+                self.check_same_as_field_groups(tf.read())
+
+    def test_get_paragraphs_as_field_spans__is_same_as_field_groups_on_edge_cases(self):
+        for text in (
+            '',
+            '\n\n',
+            'para1: test1\n\n\n\n\npara2: test2\n test3',
+            '\n\npara1: test1\n\n \t     \n          \npara2: test2',
+            'License:\n\nFiles: *\n',
+            'License: foo\n\n bar\n\n\n baz  \n\n',
+            'License: foo\n\nnot a field\n continued\nFoo: bar  \n \n',
+            'Licence: foo\r\n bar\r\n\r\nfoo:\x0c\x0c bar\x0cbaz: \n qux',
+            ' orphan continuation\nFiles: *\n  \t\n',
+        ):
+            self.check_same_as_field_groups(text)
+
+    def test_Deb822FieldSpan_does_not_keep_lines(self):
+        text = 'Files: *\nLicense: GPL\n a\n b\n c\n .\n d\n'
+        group, = deb822.get_paragraphs_as_field_spans(text)
+        files, license = group
+        assert license.start_offset == text.index('License')
+        assert license.end_offset == len(text) - 1
+        assert (license.start_line, license.end_line) == (2, 7)
+        assert license.text == 'GPL\n a\n b\n c\n .\n d'
+
+    def test_iter_line_tokens(self):
+        text = 'Foo: bar\n baz\r\n \t\nqux\x0c'
+        results = list(deb822.iter_line_tokens(text))
+        expected = [
+            (1, deb822.FIELD, 0, 8),
+            (2, deb822.CONTINUATION, 9, 13),
+            (3, deb822.BLANK, 15, 17),
+            (4, deb822.OTHER, 18, 21),
+        ]
+        assert results == expected
+        assert len(results) == len(text.splitlines())
+
+
+class TestDeb822Document(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def check_edit(self, text, start_line, end_line, replacement):
+        doc = deb822.Deb822Document.from_text(text)
+        doc.edit(start_line, end_line, replacement)
+        expected = deb822.Deb822Document.from_text(doc.text)
+        assert doc.paragraphs == expected.paragraphs
+        assert doc.get_field_groups() == list(deb822.get_paragraphs_as_field_groups(doc.text))
+        return doc.text
+
+    def test_Deb822Document_edit_replaces_lines(self):
+        text = 'Files: *\nLicense: foo\n\nLicense: bar\n baz\n'
+        assert self.check_edit(text, 2, 2, 'License: qux') == (
+            'Files: *\nLicense: qux\n\nLicense: bar\n baz\n')
+        assert self.check_edit(text, 3, 3, ' joined') == (
+            'Files: *\nLicense: foo\n joined\nLicense: bar\n baz\n')
+        assert self.check_edit(text, 1, 5, '') == ''
+
+    def test_Deb822Document_edit_inserts_lines(self):
+        text = 'Files: *\nLicense: foo'
+        assert self.check_edit(text, 1, 0, 'Format: x\n') == (
+            'Format: x\nFiles: *\nLicense: foo')
+        assert self.check_edit(text, 3, 2, '\nLicense: bar') == (
+            'Files: *\nLicense: foo\n\nLicense: bar')
+
+    def test_Deb822Document_edit_is_same_as_full_parse_for_random_edits(self):
+        import random
+        random.seed(42)
+        replacements = [
+            '', '\n', 'Files: *', ' continued', 'not a field',
+            'License: GPL\n text\n\n more text\n', '\n\nComment: x\n\n',
+        ]
+        with open(self.get_test_loc('deb822/dropbear.copyright')) as tf:
+            text = tf.read()
+
+        line_count = len(text.splitlines())
+        for _ in range(100):
+            start_line = random.randint(1, line_count + 1)
+            end_line = random.randint(start_line - 1, min(start_line + 10, line_count))
+            replacement = random.choice(replacements)
+            self.check_edit(text, start_line, end_line, replacement)
@@ -6,7 +6,13 @@
 # See https://aboutcode.org for more information about nexB OSS projects.
 #
 
+import bz2
+import gzip
+import io
+import lzma
+from concurrent.futures import ThreadPoolExecutor
 from os import path
+from unittest import mock
 
 from test_utils import JsonTester  # NOQA
 
@@ -196,6 +202,129 @@ License: GPL-3+
         results = list(debcon.get_paragraphs_data_from_file(test_file))
         self.check_json(results, expected_loc, regen=False)
 
+    def test_get_paragraphs_data_from_file__from_compressed_packages(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        expected_loc = 'debcon/packages/simple_packages-expected.json'
+        with open(test_file, 'rb') as tf:
+            content = tf.read()
+        for extension, opener in (('.gz', gzip.open), ('.xz', lzma.open), ('.bz2', bz2.open)):
+            compressed = self.get_temp_file(extension='Packages' + extension)
+            with opener(compressed, 'wb') as cf:
+                cf.write(content)
+            results = list(debcon.get_paragraphs_data_from_file(compressed))
+            self.check_json(results, expected_loc, regen=False)
+
+            with open(compressed, 'rb') as cf:
+                results = list(debcon.get_paragraphs_data_from_file(cf))
+            self.check_json(results, expected_loc, regen=False)
+
+    def test_get_paragraphs_data_from_file__from_binary_and_text_file_objects(self):
+        test_file = self.get_test_loc('debcon/sources/simple_sources')
+        expected_loc = 'debcon/sources/simple_sources-expected.json'
+        with open(test_file, 'rb') as tf:
+            results = list(debcon.get_paragraphs_data_from_file(tf))
+        self.check_json(results, expected_loc, regen=False)
+
+        with open(test_file) as tf:
+            results = list(debcon.get_paragraphs_data_from_file(tf))
+        self.check_json(results, expected_loc, regen=False)
+
+    def test_read_paragraphs_splits_as_split_in_paragraphs(self):
+        test = 'para1: test1\r\n\r\n \t  \n\rpara2: test2\r  \n test3\n\n\n  \n'
+        expected = ['para1: test1', 'para2: test2\n  \n test3']
+        for chunk_size in (1, 2, 3, 5, 1000):
+            results = list(debcon.read_paragraphs(io.StringIO(test, newline=''), chunk_size))
+            assert results == expected
+            results = list(debcon.read_paragraphs(io.BytesIO(test.encode('utf-8')), chunk_size))
+            assert results == [p.encode('utf-8') for p in expected]
+
+    def test_get_paragraphs_data_from_file__with_fields(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        fields = ['Package', 'version', 'Architecture', 'Depends', 'Filename']
+        results = list(debcon.get_paragraphs_data_from_file(test_file, fields=fields))
+        expected = [
+            {k: v for k, v in data.items() if k in set(f.lower() for f in fields)}
+            for data in debcon.get_paragraphs_data_from_file(test_file)
+        ]
+        assert results == expected
+        assert all('package' in data and 'description' not in data for data in results)
+
+    def test_get_paragraph_data__with_fields(self):
+        test = 'Package: foo\nversion: 1.0\nDescription: some\n more\nPackage: bar'
+        results = debcon.get_paragraph_data(test, fields=['Package', 'Version'])
+        assert results == {'package': 'foo\nbar', 'version': '1.0'}
+
+        results = debcon.get_paragraph_data(test.replace('\n', '\r\n'), fields=['description'])
+        assert results == {'description': 'some\r\n more'}
+
+        results = debcon.get_paragraph_data(test, fields=['Depends'])
+        assert results == {}
+
+        results = debcon.get_paragraph_data('Package: foo\n\njunk', fields=['Depends'])
+        assert results == {'unknown': 'junk'}
+
+        results = debcon.get_paragraph_data('not a paragraph', fields=['Depends'])
+        assert results == {'unknown': 'not a paragraph'}
+
+    def test_get_paragraph_data__without_requested_fields_parses_once(self):
+        test = 'Package: foo\nVersion: 1.0\n'
+        for text in (test, test.replace('\n', '\r\n')):
+            parse_paragraph = mock.Mock(wraps=debcon._parse_paragraph)
+            with mock.patch.object(debcon, '_parse_paragraph', parse_paragraph) as parse:
+                assert debcon.get_paragraph_data(text, fields=['description-md5']) == {}
+            assert parse.call_count == 1
+
+    def test_read_text_file__detects_encoding_and_caches_it(self):
+        test_file = self.get_temp_file()
+        text = 'Files: *\nCopyright: 2003 Me\n' * 5000 + 'Copyright: 2003 G\xe9rard\n'
+        with open(test_file, 'wb') as tf:
+            tf.write(text.encode('latin-1'))
+        assert debcon.get_cached_encoding(test_file) is None
+        assert debcon.read_text_file(test_file) == text
+        assert debcon.get_cached_encoding(test_file) in ('iso8859-1', 'cp1252')
+        assert debcon.read_text_file(test_file) == text
+        assert ''.join(debcon.read_text_lines(test_file)) == text
+
+    def test_cache_encoding__evicts_from_many_threads(self):
+        test_files = []
+        for i in range(64):
+            test_file = self.get_temp_file()
+            with open(test_file, 'w') as tf:
+                tf.write(str(i))
+            test_files.append(test_file)
+
+        def cache(test_file):
+            for _ in range(200):
+                debcon.cache_encoding(test_file, 'cp1252')
+
+        with mock.patch.object(debcon, '_encodings_by_file', {}) as encodings:
+            with mock.patch.object(debcon, '_ENCODINGS_CACHE_SIZE', 8):
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(cache, test_files))
+        assert len(encodings) <= 8
+
+    def test_read_text_lines__restarts_with_a_detected_encoding(self):
+        test_file = self.get_temp_file()
+        text = 'Files: *\nCopyright: 2003 Me\n' * 5000 + 'Copyright: 2003 G\xe9rard\n'
+        with open(test_file, 'wb') as tf:
+            tf.write(text.encode('latin-1'))
+        assert ''.join(debcon.read_text_lines(test_file)) == text
+        assert debcon.get_cached_encoding(test_file) in ('iso8859-1', 'cp1252')
+
+    def test_detect_encoding__reports_decoding_errors_with_location(self):
+        with mock.patch.object(debcon, 'get_encodings', return_value=['cp1252']):
+            with self.assertRaises(UnicodeDecodeError) as error:
+                debcon.detect_encoding(b'Copyright: \x81\x8d\x8f', location='some/copyright')
+        assert 'some/copyright' in str(error.exception)
+
+    def test_get_encodings__ends_with_fallback_encodings(self):
+        results = debcon.get_encodings('Copyright: G\xe9rard\n'.encode('latin-1'))
+        assert results[-2:] == ['cp1252', 'iso8859-1']
+        assert 'utf-8' not in results
+
+    def test_decode_text__uses_a_detected_encoding(self):
+        assert debcon.decode_text('G\xe9rard'.encode('latin-1')) == 'G\xe9rard'
+
     def test_get_paragraph_data__return_unknow_if_we_have_payload(self):
         # we were skipping email payloads: a payload means this is not a
         # header only file and therefore something we cannot process normally
@@ -204,6 +333,148 @@ License: GPL-3+
         expected = {'foo': 'home', 'unknown': 'Bar: baz'}
         assert results == expected
 
+    def test_parse_paragraph__simple(self):
+        test = 'Package: foo\nDescription: some\n more\n\tlines\nEmpty:\n'
+        results = debcon.parse_paragraph(test)
+        expected = (
+            [
+                ('Package', 'foo'),
+                ('Description', 'some\n more\n\tlines'),
+                ('Empty', ''),
+            ],
+            '',
+        )
+        assert results == expected
+
+    def test_parse_paragraph__with_crlf(self):
+        test = 'Package: foo\r\nDescription: some\r\n more\r\n\r\nbody'
+        results = debcon.parse_paragraph(test)
+        expected = (
+            [('Package', 'foo'), ('Description', 'some\r\n more')],
+            'body',
+        )
+        assert results == expected
+
+    def test_parse_paragraph__returns_none_on_invalid_paragraph(self):
+        assert debcon.parse_paragraph(': no name\n') is None
+        assert debcon.parse_paragraph(' continuation\nPackage: foo\n') is None
+        assert debcon.parse_paragraph('Package: foo\nno separator\n') is None
+        assert debcon.parse_paragraph('Package: foo\nFrom bar\nBaz: q\n') is None
+
+    def test_parse_paragraph__handles_envelope_lines(self):
+        assert debcon.parse_paragraph('From foo\nPackage: foo\n') == ([('Package', 'foo')], '')
+        expected = [('Package', 'foo')], 'From bar'
+        assert debcon.parse_paragraph('Package: foo\nFrom bar') == expected
+        expected = [('Package', 'foo')], 'From bar\nbaz'
+        assert debcon.parse_paragraph('Package: foo\nFrom bar\n\nbaz') == expected
+
+    def test_parse_paragraph__is_the_same_as_email_parsing(self):
+        import email
+        tests = [
+            'Package: foo\nVersion: 1.0\n',
+            'Package:foo\n  \nVersion:\t1.0',
+            'Package: foo\rVersion: 1.0\r\rbody\r',
+            'Package: foo\n\x0cVersion: 1.0\n',
+            'Package: foo\x0b\x1c bar\n',
+            'From \nFrom \nPackage: foo',
+            'Package: foo\n\n\nbody\n\n',
+            'Package: foo bar: baz\n',
+            'Package: \xe9t\xe9\n',
+            '',
+            '\n',
+        ]
+        for test in tests:
+            message = email.message_from_string(test)
+            if message.defects:
+                assert debcon.parse_paragraph(test) is None
+            else:
+                expected = list(message.items()), message.get_payload()
+                assert debcon.parse_paragraph(test) == expected
+
+
+class TestWriteParagraphs(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def test_write_paragraphs_roundtrips_sources(self):
+        test_file = self.get_test_loc('debcon/sources/simple_sources')
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        output = io.StringIO()
+        count = debcon.write_paragraphs(output, expected)
+        assert count == len(expected)
+        assert list(debcon.get_paragraphs_data(output.getvalue())) == expected
+
+    def test_write_paragraphs_with_field_order(self):
+        paragraphs = [
+            {'version': '1.0', 'description': 'foo\n bar\nbaz', 'package': 'foo'},
+            {'files': 'abc 12 foo.dsc\n def 34 foo.tar.gz', 'md5sum': 'abc', 'package': 'bar'},
+        ]
+        output = io.StringIO()
+        debcon.write_paragraphs(output, paragraphs, field_order=['Package', 'Version'])
+        expected = (
+            'Package: foo\n'
+            'Version: 1.0\n'
+            'Description: foo\n'
+            ' bar\n'
+            ' baz\n'
+            '\n'
+            'Package: bar\n'
+            'Files:\n'
+            ' abc 12 foo.dsc\n'
+            ' def 34 foo.tar.gz\n'
+            'MD5sum: abc\n'
+        )
+        assert output.getvalue() == expected
+
+    def test_write_paragraphs_with_field_order_and_capitalized_keys(self):
+        paragraphs = [{'Package': 'foo', 'Version': '1', 'Depends': 'x'}]
+        output = io.StringIO()
+        debcon.write_paragraphs(output, paragraphs, field_order=['version', 'Package'])
+        assert output.getvalue() == 'Version: 1\nPackage: foo\nDepends: x\n'
+
+    def test_write_paragraphs_with_empty_lines_in_values(self):
+        paragraphs = [{'package': 'foo', 'description': 'foo\nbar\n\n  \nbaz\n'}]
+        output = io.StringIO()
+        debcon.write_paragraphs(output, paragraphs)
+        expected = 'Package: foo\nDescription: foo\n bar\n .\n .\n baz\n'
+        assert output.getvalue() == expected
+        assert len(list(debcon.get_paragraphs_data(output.getvalue()))) == 1
+
+    def test_write_paragraphs_to_compressed_files(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        for extension in ('', '.gz', '.xz', '.bz2'):
+            location = self.get_temp_file(extension=extension)
+            debcon.write_paragraphs(location, expected)
+            assert list(debcon.get_paragraphs_data_from_file(location)) == expected
+
+    def test_write_paragraphs_to_binary_file_object(self):
+        output = io.BytesIO()
+        debcon.write_paragraphs(output, [{'package': 'foo', 'maintainer': 'J\xe9r\xf4me'}])
+        assert output.getvalue() == 'Package: foo\nMaintainer: J\xe9r\xf4me\n'.encode('utf-8')
+
+
+class TestFieldNames(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def test_get_field_name(self):
+        field_name = debcon.get_field_name('Checksums-Sha256 ')
+        assert field_name.name == 'checksums-sha256'
+        assert field_name.normalized == 'Checksums-SHA256'
+        assert field_name.attribute == 'checksums_sha256'
+        assert debcon.get_field_name('Checksums-Sha256 ') is field_name
+
+    def test_get_paragraph_data_shares_interned_field_names(self):
+        first = debcon.get_paragraph_data('PACKAGE: foo\nVersion: 1')
+        second = debcon.get_paragraph_data('package: bar\nversion: 2')
+        assert list(first) == list(second) == ['package', 'version']
+        for name1, name2 in zip(first, second):
+            assert name1 is name2
+
+    def test_normalize_control_field_name(self):
+        assert debcon.normalize_control_field_name('md5sum') == 'MD5sum'
+        assert debcon.normalize_control_field_name('pre-depends') == 'Pre-Depends'
+        assert debcon.normalize_control_field_name('CHECKSUMS-SHA512') == 'Checksums-SHA512'
+
 
 class TestDebian822(JsonTester):
     test_data_dir = path.join(path.dirname(__file__), 'data')
@@ -228,6 +499,17 @@ class TestDebian822(JsonTester):
         results = debcon.Debian822.from_string(test_file).to_dict()
         self.check_json(results, expected_loc, regen=False)
 
+    def test_Debian822_from_string__with_fields(self):
+        test = 'Package: foo\nVersion: 1.0\nDescription: some\n more\n\njunk'
+        results = debcon.Debian822.from_string(test, fields=['package', 'VERSION']).to_dict()
+        expected = {'package': 'foo', 'version': '1.0', 'unknown': 'junk'}
+        assert results == expected
+
+    def test_Debian822_from_items_list__with_fields(self):
+        test = [('Package', 'foo'), ('Version', '1.0'), ('Description', 'some')]
+        results = debcon.Debian822(test, fields=['Package']).to_dict()
+        assert results == {'package': 'foo'}
+
     def test_Debian822_from_file__signed_from_dsc(self):
         test_file = self.get_test_loc('debcon/deb822/zlib_1.2.11.dfsg-1.dsc')
         expected_loc = 'debcon/deb822/zlib_1.2.11.dfsg-1.dsc-expected-deb822.json'
@@ -255,6 +537,77 @@ class TestDebian822(JsonTester):
         assert dict(d822) == expected2
 
 
+class TestCompactDebian822(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def test_CompactDebian822_from_file_is_same_as_Debian822(self):
+        test_file = self.get_test_loc('debcon/deb822/zlib_1.2.11.dfsg-1.dsc')
+        expected = debcon.Debian822.from_file(test_file)
+        results = debcon.CompactDebian822.from_file(test_file, table=debcon.FieldTable())
+        assert results.to_dict() == expected.to_dict()
+        assert results.dumps() == expected.dumps()
+        assert results == expected
+
+    def test_CompactDebian822_is_a_mutable_mapping(self):
+        table = debcon.FieldTable()
+        d822 = debcon.CompactDebian822([('Package', 'foo'), ('Version', '1.0')], table=table)
+        assert d822['PACKAGE'] == 'foo'
+        assert 'version' in d822
+        assert 'depends' not in d822
+        d822['Depends'] = 'bar'
+        del d822['version']
+        assert list(d822) == ['package', 'depends']
+        assert len(d822) == 2
+        assert d822.get('version') is None
+        try:
+            del d822['version']
+            self.fail('KeyError not raised')
+        except KeyError:
+            pass
+        d822['Version'] = '2.0'
+        assert list(d822) == ['package', 'depends', 'version']
+        assert d822.shape.names == ('package', 'depends', 'version')
+
+    def test_CompactDebian822_shares_field_shapes(self):
+        table = debcon.FieldTable()
+        first = debcon.CompactDebian822({'Package': 'foo', 'Version': '1.0'}, table=table)
+        second = debcon.CompactDebian822({'Section': 'libs', 'Package': 'bar'}, table=table)
+        third = debcon.CompactDebian822({'package': 'baz', 'version': '2.0'}, table=table)
+        assert first.values == ['foo', '1.0']
+        assert second.values == ['libs', 'bar']
+        assert list(second) == ['section', 'package']
+        assert first.data == {'package': 'foo', 'version': '1.0'}
+        assert third.shape is first.shape
+        assert len(table) == 2
+
+    def test_CompactDebian822_keeps_the_paragraph_field_order(self):
+        debcon.CompactDebian822.from_string('Source: zlib\nVersion: 1\nPackage-List: zlib1g')
+        results = debcon.CompactDebian822.from_string('Package: zlib1g\nSource: zlib\nVersion: 1')
+        assert results.dumps() == 'Package: zlib1g\nSource: zlib\nVersion: 1\n'
+
+    def test_FieldTable_is_bounded(self):
+        table = debcon.FieldTable(max_shapes=1)
+        first = debcon.CompactDebian822({'Package': 'foo'}, table=table)
+        second = debcon.CompactDebian822({'Source': 'bar'}, table=table)
+        assert len(table) == 1
+        assert first.shape is debcon.CompactDebian822({'Package': 'baz'}, table=table).shape
+        assert second['source'] == 'bar'
+
+    def test_CompactDebian822_with_fields(self):
+        test = 'Package: foo\nVersion: 1.0\nDescription: some\n more\n\njunk'
+        results = debcon.CompactDebian822.from_string(test, fields=['package', 'VERSION'])
+        expected = {'package': 'foo', 'version': '1.0', 'unknown': 'junk'}
+        assert results.to_dict() == expected
+
+    def test_get_compact_paragraphs_from_file(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        table = debcon.FieldTable()
+        results = list(debcon.get_compact_paragraphs_from_file(test_file, table=table))
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        assert [r.to_dict() for r in results] == expected
+        assert all(r.table is table for r in results)
+
+
 class TestDebianFields(JsonTester):
     test_data_dir = path.join(path.dirname(__file__), 'data')
 
@@ -354,3 +707,16 @@ class TestDebianFields(JsonTester):
         results = debcon.LineAndSpaceSeparatedField.from_value(test)
         assert results.values == [('some', 'value'), ('some', 'value'), ('some', 'more')]
         assert results.dumps() == 'some value\n some value\n some more'
+
+    def test_iter_paragraph_lines_splits_as_split_in_paragraphs(self):
+        test = 'para1: test1\n\n \t     \n          \npara2: test2\n  \n test3\n\n\n'
+        results = [
+            (offset, line, ''.join(lines))
+            for offset, line, lines in debcon.iter_paragraph_lines(test.splitlines(True))
+        ]
+        expected = [
+            (0, 1, 'para1: test1\n'),
+            (33, 5, 'para2: test2\n  \n test3\n'),
+        ]
+        assert results == expected
+        assert [t.strip() for _, _, t in results] == list(debcon.split_in_paragraphs(test.strip()))
@@ -0,0 +1,133 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import os
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import debcon
+from debian_inspector.dpkg import DpkgDatabase
+
+
+class TestDpkgDatabase(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_dpkg_database(self):
+        location = self.get_temp_dir()
+        info = path.join(location, 'info')
+        os.makedirs(info)
+        with open(path.join(location, 'status'), 'wb') as status:
+            status.write(
+                b'Package: libfoo1\nStatus: install ok installed\nArchitecture: amd64\n'
+                b'Multi-Arch: same\nVersion: 1.0\n\n'
+                b'Package: libfoo1\nStatus: install ok installed\nArchitecture: i386\n'
+                b'Multi-Arch: same\nVersion: 1.0\n\n'
+                b'Package: foo\nStatus: install ok installed\nArchitecture: amd64\nVersion: 2.0\n\n'
+                b'Package: removed\nStatus: deinstall ok config-files\nVersion: 0.1\n\n'
+            )
+        infos = {
+            'libfoo1:amd64.list': b'/.\n/usr\n/usr/lib/x86_64-linux-gnu/libfoo.so.1\n',
+            'libfoo1:amd64.md5sums': b'aaaa  usr/lib/x86_64-linux-gnu/libfoo.so.1\n',
+            'libfoo1:i386.list': b'/.\n/usr\n/usr/lib/i386-linux-gnu/libfoo.so.1\n',
+            'foo.list': b'/.\n/usr\n/usr/bin/foo\n/usr/bin/f\xe9\n',
+            'foo.md5sums': b'bbbb  usr/bin/foo\ncccc  usr/bin/f\xe9\n',
+            'removed.list': b'/etc/removed.conf\n',
+        }
+        for name, content in infos.items():
+            with open(path.join(info, name), 'wb') as inf:
+                inf.write(content)
+        return location
+
+    def test_DpkgDatabase_keeps_only_installed_packages(self):
+        database = DpkgDatabase.from_location(self.get_dpkg_database())
+        assert sorted(database.packages) == ['foo', 'libfoo1:amd64', 'libfoo1:i386']
+        foo = database.get('foo')[0]
+        result = foo.name, foo.version, foo.architecture, foo.status
+        assert result == ('foo', '2.0', 'amd64', 'installed')
+        assert [p.architecture for p in database.get('libfoo1')] == ['amd64', 'i386']
+        assert database.get('removed') == []
+
+        database = DpkgDatabase.from_location(self.get_dpkg_database(), installed_only=False)
+        assert database.get('removed')[0].status == 'config-files'
+
+    def test_DpkgDatabase_is_same_as_full_parse(self):
+        location = self.get_temp_dir()
+        with open(self.get_test_loc('debcon/status/simple_status'), 'rb') as status:
+            with open(path.join(location, 'status'), 'wb') as out:
+                out.write(status.read())
+        database = DpkgDatabase.from_location(location)
+        expected = list(debcon.get_paragraphs_data_from_file(path.join(location, 'status')))
+        assert [p.data for p in database.packages.values()] == expected
+
+    def test_DpkgDatabase_loads_files_lazily(self):
+        database = DpkgDatabase.from_location(self.get_dpkg_database())
+        foo = database.get('foo')[0]
+        assert foo.files is None
+        assert database.get_files(foo) == ['/.', '/usr', '/usr/bin/foo', '/usr/bin/f\udce9']
+        assert foo.md5sums is None
+        assert database.get_md5sums(foo) == {'/usr/bin/foo': 'bbbb', '/usr/bin/f\udce9': 'cccc'}
+
+        libfoo_i386 = database.packages['libfoo1:i386']
+        assert database.get_md5sums(libfoo_i386) == {}
+
+    def test_DpkgDatabase_loads_files_with_threads_and_maps_owners(self):
+        database = DpkgDatabase.from_location(self.get_dpkg_database(), load_files=True)
+        for package in database.packages.values():
+            assert package.files is not None
+            assert package.md5sums is not None
+
+        owners = [p.key for p in database.get_owners('/usr')]
+        assert owners == ['libfoo1:amd64', 'libfoo1:i386', 'foo']
+        owners = [p.key for p in database.get_owners('/usr/lib/i386-linux-gnu/libfoo.so.1')]
+        assert owners == ['libfoo1:i386']
+        assert database.get_owners('/etc/removed.conf') == []
+        assert len(database.get_owners_by_path()) == 6
+
+    def test_DpkgDatabase_from_location_without_status(self):
+        database = DpkgDatabase.from_location(self.get_temp_dir())
+        assert database.packages == {}
+
+    def get_status_d_database(self):
+        location = self.get_temp_dir()
+        status_d = path.join(location, 'status.d')
+        os.makedirs(status_d)
+        files = {
+            'base-files': b'Package: base-files\nVersion: 11.1\nArchitecture: amd64\n',
+            'base-files.md5sums': b'aaaa  etc/debian_version\nbbbb  etc/host.conf\n',
+            'libssl1.1': b'Package: libssl1.1\nVersion: 1.1.1n\nArchitecture: amd64\n',
+            'tzdata': b'Package: tzdata\nStatus: deinstall ok config-files\nVersion: 2021a\n',
+        }
+        for name, content in files.items():
+            with open(path.join(status_d, name), 'wb') as out:
+                out.write(content)
+        return location
+
+    def test_DpkgDatabase_from_status_d(self):
+        for max_workers in (0, 4):
+            database = DpkgDatabase.from_location(
+                self.get_status_d_database(),
+                load_files=True,
+                max_workers=max_workers,
+            )
+            assert list(database.packages) == ['base-files', 'libssl1.1']
+            base_files = database.get('base-files')[0]
+            assert base_files.status == 'installed'
+            assert base_files.md5sums == {'/etc/debian_version': 'aaaa', '/etc/host.conf': 'bbbb'}
+            assert base_files.files == ['/etc/debian_version', '/etc/host.conf']
+            assert database.get_owners('/etc/host.conf') == [base_files]
+            assert database.get('libssl1.1')[0].files == []
+
+    def test_DpkgDatabase_merges_status_and_status_d(self):
+        location = self.get_dpkg_database()
+        status_d = path.join(location, 'status.d')
+        os.makedirs(status_d)
+        with open(path.join(status_d, 'bar'), 'wb') as out:
+            out.write(b'Package: bar\nVersion: 1.0\n')
+        database = DpkgDatabase.from_location(location)
+        assert sorted(database.packages) == ['bar', 'foo', 'libfoo1:amd64', 'libfoo1:i386']
@@ -0,0 +1,198 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import gzip
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import debcon
+from debian_inspector.indexes import PackageRecord
+from debian_inspector.indexes import PackagesIndex
+from debian_inspector.indexes import SourceRecord
+from debian_inspector.indexes import SourcesIndex
+from debian_inspector.version import Version
+
+
+class TestPackagesIndex(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_packages_with_versions(self):
+        test_file = self.get_temp_file()
+        with open(test_file, 'wb') as tf:
+            tf.write(
+                b'Package: foo\nVersion: 1.0-2\nArchitecture: amd64\nSize: 12\n'
+                b'Description: some\n description\nSHA256: abc\nMD5sum: def\n\n'
+                b'Package: bar\nVersion: 2.0\n\n'
+                b'Package: foo\nVersion: 1:0.1\n\n'
+                b'Package: foo\nVersion: 1.0~rc1\n\n'
+                b'Version: 3.0\n'
+            )
+        return test_file
+
+    def test_PackagesIndex_from_file_is_same_as_full_parse(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        index = PackagesIndex.from_file(test_file)
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        assert len(index) == len(expected) == 39
+        for data in expected:
+            record = index.get_latest(data['package'])
+            assert str(record.version) == data['version']
+            assert record.architecture == data['architecture']
+            assert record.filename == data['filename']
+            assert record.size == int(data['size'])
+            assert record.checksums == {'md5': data['md5sum'], 'sha256': data['sha256']}
+            assert index.get_paragraph_data(record) == data
+
+    def test_PackagesIndex_sorts_records_by_version(self):
+        index = PackagesIndex.from_file(self.get_packages_with_versions())
+        assert sorted(index.names()) == ['bar', 'foo']
+        results = [str(r.version) for r in index.get('foo')]
+        assert results == ['1.0~rc1', '1.0-2', '1:0.1']
+        assert str(index.get_latest('foo').version) == '1:0.1'
+        assert index.get('does-not-exist') == []
+        assert index.get_latest('does-not-exist') is None
+
+        index.add(PackageRecord(name='foo', version=Version.from_string('1.0-1')))
+        results = [str(r.version) for r in index.get('foo')]
+        assert results == ['1.0~rc1', '1.0-1', '1.0-2', '1:0.1']
+
+    def test_PackagesIndex_get_paragraph_data_from_offsets(self):
+        index = PackagesIndex.from_file(self.get_packages_with_versions())
+        record = index.get('foo')[1]
+        assert record.to_dict() == {
+            'name': 'foo',
+            'version': '1.0-2',
+            'architecture': 'amd64',
+            'filename': None,
+            'size': 12,
+            'checksums': {'md5': 'def', 'sha256': 'abc'},
+            'offset': 0,
+            'length': 112,
+        }
+        results = index.get_paragraph_data(record)
+        assert results['description'] == 'some\n description'
+
+    def test_PackagesIndex_from_compressed_file(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        compressed = self.get_temp_file(extension='.gz')
+        with open(test_file, 'rb') as tf, gzip.open(compressed, 'wb') as cf:
+            cf.write(tf.read())
+        index = PackagesIndex.from_file(compressed)
+        assert index == PackagesIndex(
+            location=compressed,
+            records_by_name=PackagesIndex.from_file(test_file).records_by_name,
+        )
+        record = index.get_latest('0ad-data')
+        assert index.get_paragraph_data(record)['package'] == '0ad-data'
+
+    def test_PackagesIndex_dump_and_load(self):
+        index = PackagesIndex.from_file(self.get_packages_with_versions())
+        saved = self.get_temp_file(extension='.json')
+        index.dump(saved)
+        loaded = PackagesIndex.load(saved)
+        assert loaded == index
+        record = loaded.get('foo')[-1]
+        assert record._version == (1, '0.1', '0')
+        assert record.version == Version.from_string('1:0.1')
+        assert record.version is record.version
+        assert record == index.get('foo')[-1]
+
+    def test_PackagesIndex_load_fails_on_invalid_file(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages-expected.json')
+        with self.assertRaises(ValueError):
+            PackagesIndex.load(test_file)
+
+
+class TestSourcesIndex(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_sources_with_versions(self):
+        test_file = self.get_temp_file()
+        with open(test_file, 'wb') as tf:
+            tf.write(
+                b'Package: foo\nBinary: foo, libfoo1,\n libfoo-dev\nVersion: 1.0-2\n'
+                b'Directory: pool/main/f/foo\n'
+                b'Files:\n 38d0 2113 foo_1.0-2.dsc\n 36b5 12077 foo_1.0.orig.tar.gz\n'
+                b'Checksums-Sha256:\n e96c 2113 foo_1.0-2.dsc\n bd34 12077 foo_1.0.orig.tar.gz\n\n'
+                b'Package: foo\nBinary: foo, libfoo0\nVersion: 0.9-1\n\n'
+                b'Package: bar\nBinary: bar, libfoo1\nVersion: 2.0\n\n'
+            )
+        return test_file
+
+    def test_SourcesIndex_from_file_is_same_as_full_parse(self):
+        test_file = self.get_test_loc('debcon/sources/simple_sources')
+        index = SourcesIndex.from_file(test_file)
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        assert len(index) == len(expected)
+        for data in expected:
+            record = index.get_latest(data['package'])
+            assert str(record.version) == data['version']
+            assert record.directory == data['directory']
+            assert record.files == debcon.collect_files(data)
+            assert index.get_paragraph_data(record) == data
+            for binary in record.binaries:
+                assert record in index.get_sources(binary)
+
+    def test_SourcesIndex_maps_binaries_to_sources(self):
+        index = SourcesIndex.from_file(self.get_sources_with_versions())
+        foo_0_9, foo_1_0 = index.get('foo')
+        assert str(foo_0_9.version) == '0.9-1'
+        assert foo_1_0.binaries == ('foo', 'libfoo1', 'libfoo-dev')
+        assert index.get_binaries('foo') == ('foo', 'libfoo0', 'libfoo1', 'libfoo-dev')
+        assert index.get_source('libfoo0') is foo_0_9
+        assert index.get_source('foo') is foo_1_0
+        assert index.get_sources('foo') == [foo_0_9, foo_1_0]
+        assert [str(r.version) for r in index.get_sources('libfoo1')] == ['1.0-2', '2.0']
+        assert index.get_source('does-not-exist') is None
+        assert index.get_binaries('does-not-exist') == ()
+
+        index.add(SourceRecord(name='baz', version=Version.from_string('2.1'), binaries=('foo',)))
+        assert index.get_source('foo').name == 'baz'
+        assert index.get_binaries('baz') == ('foo',)
+
+    def test_SourcesIndex_from_file_flags_inconsistent_files(self):
+        test_file = self.get_temp_file()
+        with open(test_file, 'wb') as tf:
+            tf.write(
+                b'Package: foo\nVersion: 1.0\n\n'
+                b'Package: bar\nVersion: 2.0\n'
+                b'Files:\n 38d0 2113 bar_2.0.dsc\n'
+                b'Checksums-Sha256:\n e96c 2114 bar_2.0.dsc\n bd34 12 g.tar.gz\n\n'
+                b'Package: baz\nVersion: 3.0\n'
+            )
+        index = SourcesIndex.from_file(test_file)
+        assert sorted(index.names()) == ['bar', 'baz', 'foo']
+        assert index.get_latest('foo').errors is None
+        bar = index.get_latest('bar')
+        assert bar.errors == {
+            'bar_2.0.dsc': ['Size 2114 in Checksums-SHA256 differs from size 2113 in Files'],
+            'g.tar.gz': ['File listed in Checksums-SHA256 but not in Files'],
+        }
+        assert bar.files['bar_2.0.dsc'].size == '2113'
+        assert bar.files['g.tar.gz'].sha256 == 'bd34'
+
+    def test_SourceRecord_to_dict(self):
+        index = SourcesIndex.from_file(self.get_sources_with_versions())
+        results = index.get_latest('foo').to_dict()
+        expected = {
+            'name': 'foo',
+            'version': '1.0-2',
+            'binaries': ['foo', 'libfoo1', 'libfoo-dev'],
+            'directory': 'pool/main/f/foo',
+            'files': [
+                {'name': 'foo_1.0-2.dsc', 'size': '2113', 'md5': '38d0',
+                 'sha1': None, 'sha256': 'e96c', 'sha512': None},
+                {'name': 'foo_1.0.orig.tar.gz', 'size': '12077', 'md5': '36b5',
+                 'sha1': None, 'sha256': 'bd34', 'sha512': None},
+            ],
+            'offset': 0,
+            'length': 228,
+            'errors': {},
+        }
+        assert results == expected
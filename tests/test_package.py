@@ -229,3 +229,37 @@ Conflicts: binfmt-support (<< 1.1.2)
             'Version': '3.4.0-1+precise1'}
 
         assert parsed_fields == expected
+
+    def test_parse_control_fields_lazy_converts_on_first_access(self):
+        unparsed_fields = debcon.Debian822([
+            ('Package', 'python-py2deb'),
+            ('Depends', 'python-deb-pkg-tools, python-pip'),
+            ('Installed-Size', '42'),
+        ])
+        parsed_fields = debcon.parse_control_fields(unparsed_fields, lazy=True)
+        assert isinstance(parsed_fields, debcon.LazyDebian822)
+        assert parsed_fields.converted == {}
+
+        assert parsed_fields['Package'] == 'python-py2deb'
+        assert parsed_fields['installed-size'] == 42
+        assert 'depends' not in parsed_fields.converted
+
+        depends = parsed_fields['Depends']
+        assert depends == deps.AndRelationships((
+            deps.Relationship(name=u'python-deb-pkg-tools'),
+            deps.Relationship(name=u'python-pip'),
+        ))
+        assert parsed_fields['Depends'] is depends
+
+        expected = debcon.parse_control_fields(unparsed_fields)
+        assert list(parsed_fields) == ['Package', 'Depends', 'Installed-Size']
+        assert dict(parsed_fields.items()) == expected
+        assert parsed_fields.to_dict() == unparsed_fields.to_dict()
+
+    def test_LazyDebian822_reconverts_updated_values(self):
+        fields = debcon.LazyDebian822.from_string('Installed-Size: 42')
+        assert fields['Installed-Size'] == 42
+        fields['Installed-Size'] = '43'
+        assert fields['Installed-Size'] == 43
+        del fields['Installed-Size']
+        assert 'Installed-Size' not in fields
@@ -0,0 +1,103 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+from os import path
+import shutil
+from unittest import mock
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import deb822
+from debian_inspector import debcon
+from debian_inspector.paraindex import ParagraphIndex
+
+
+class TestParagraphIndex(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_test_copy(self, test_path):
+        test_file = path.join(self.get_temp_dir(), path.basename(test_path))
+        shutil.copy(self.get_test_loc(test_path), test_file)
+        return test_file
+
+    def test_ParagraphIndex_get_paragraphs_data_is_same_as_full_parse(self):
+        test_file = self.get_test_loc('debcon/packages/simple_packages')
+        index = ParagraphIndex.from_file(test_file)
+        expected = list(debcon.get_paragraphs_data_from_file(test_file))
+        assert len(index.paragraphs) == len(expected) == 39
+        for data in expected:
+            assert index.get_paragraphs_data(data['package']) == [data]
+
+    def test_ParagraphIndex_get_returns_all_paragraphs_of_a_key(self):
+        test_file = self.get_temp_file()
+        with open(test_file, 'wb') as tf:
+            tf.write(
+                b'Package: foo\nVersion: 1.0\n\n  \n\t\n'
+                b'package: bar\nVersion: 2.0\n\n'
+                b'Package: foo\r\nVersion: 1.1\r\n'
+            )
+        index = ParagraphIndex.from_file(test_file)
+        results = [(p['package'], p['version']) for p in index.get_paragraphs_data('foo')]
+        assert results == [('foo', '1.0'), ('foo', '1.1')]
+        assert [p.start_line for p in index.paragraphs] == [1, 6, 9]
+        assert index.get('does-not-exist') == []
+
+    def test_ParagraphIndex_get_paragraphs_as_field_groups_tracks_file_line_numbers(self):
+        test_file = self.get_test_loc('debcon/status/simple_status')
+        index = ParagraphIndex.from_file(test_file)
+        expected = [
+            group for group in deb822.get_paragraphs_as_field_groups_from_file(test_file)
+            if group[0].text == 'libncurses5'
+        ]
+        assert expected
+        assert index.get_paragraphs_as_field_groups('libncurses5') == expected
+
+    def test_ParagraphIndex_dump_and_load_sidecar(self):
+        test_file = self.get_test_copy('debcon/packages/simple_packages')
+        index = ParagraphIndex.get_or_build(test_file)
+        assert path.exists(test_file + '.paraidx')
+
+        loaded = ParagraphIndex.load(test_file)
+        assert loaded == index
+        assert loaded.get('0ad-data') == index.get('0ad-data')
+
+    def test_ParagraphIndex_load_ignores_outdated_sidecar(self):
+        test_file = self.get_test_copy('debcon/status/simple_status')
+        ParagraphIndex.from_file(test_file).dump()
+        with open(test_file, 'a') as tf:
+            tf.write('\nPackage: foo\nVersion: 1.0\n')
+
+        assert ParagraphIndex.load(test_file) is None
+        index = ParagraphIndex.get_or_build(test_file)
+        assert index.get_paragraphs_data('foo') == [{'package': 'foo', 'version': '1.0'}]
+
+    def test_ParagraphIndex_load_ignores_unreadable_sidecar(self):
+        test_file = self.get_test_copy('debcon/status/simple_status')
+        sidecar = test_file + '.paraidx'
+        ParagraphIndex.from_file(test_file).dump()
+        with open(sidecar) as sc:
+            content = sc.read()
+        truncated = ''.join(content.splitlines(True)[:-1])
+        junks = ('', 'junk\n', content[:-1], content[:-20], truncated, '\xe9'.encode('latin-1'))
+        for junk in junks:
+            mode = 'wb' if isinstance(junk, bytes) else 'w'
+            with open(sidecar, mode) as sc:
+                sc.write(junk)
+            assert ParagraphIndex.load(test_file) is None
+
+        index = ParagraphIndex.get_or_build(test_file)
+        assert index == ParagraphIndex.load(test_file)
+
+    def test_ParagraphIndex_get_or_build_without_writable_sidecar(self):
+        test_file = self.get_test_copy('debcon/status/simple_status')
+        error = PermissionError('read-only')
+        with mock.patch.object(ParagraphIndex, 'dump', side_effect=error) as dump:
+            index = ParagraphIndex.get_or_build(test_file)
+        assert dump.called
+        assert index == ParagraphIndex.from_file(test_file)
+        assert not path.exists(test_file + '.paraidx')
@@ -0,0 +1,146 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import gzip
+import hashlib
+import lzma
+import os
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import contents
+from debian_inspector import indexes
+from debian_inspector.release import ReleaseFile
+
+
+class TestReleaseFile(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def create_repository(self, corrupted=()):
+        """
+        Return the location of an InRelease file in a new temp "dists/suite"
+        directory with compressed Packages, Sources and Contents files. The
+        digests listed for the ``corrupted`` paths are wrong.
+        """
+        with open(self.get_test_loc('debcon/packages/simple_packages'), 'rb') as inp:
+            packages = inp.read()
+        with open(self.get_test_loc('debcon/sources/simple_sources'), 'rb') as inp:
+            sources = inp.read()
+        with open(self.get_test_loc('contents/debian_Contents-amd64.gz'), 'rb') as inp:
+            contents_gz = inp.read()
+
+        files = {
+            'main/binary-amd64/Packages': packages,
+            'main/binary-amd64/Packages.gz': gzip.compress(packages),
+            'main/source/Sources.xz': lzma.compress(sources),
+            'main/Contents-amd64.gz': contents_gz,
+        }
+        suite = path.join(self.get_temp_dir(), 'dists', 'bookworm')
+        for name, content in files.items():
+            location = path.join(suite, *name.split('/'))
+            os.makedirs(path.dirname(location), exist_ok=True)
+            with open(location, 'wb') as out:
+                out.write(content)
+
+        tables = {'MD5Sum': hashlib.md5, 'SHA256': hashlib.sha256}
+        lines = [
+            '-----BEGIN PGP SIGNED MESSAGE-----',
+            'Hash: SHA256',
+            '',
+            'Origin: Debian',
+            'Suite: stable',
+            'Codename: bookworm',
+            'Architectures: all amd64',
+            'Components: main contrib',
+        ]
+        for table, hasher in tables.items():
+            lines.append(f'{table}:')
+            for name, content in files.items():
+                if name in corrupted:
+                    content += b'\n'
+                lines.append(f' {hasher(content).hexdigest()} {len(content):>16} {name}')
+        lines.extend([
+            '-----BEGIN PGP SIGNATURE-----',
+            '',
+            'iQIzBAEBCAAdFiEE',
+            '=BVVn',
+            '-----END PGP SIGNATURE-----',
+        ])
+
+        location = path.join(suite, 'InRelease')
+        with open(location, 'w') as out:
+            out.write('\n'.join(lines) + '\n')
+        return location
+
+    def test_ReleaseFile_from_file(self):
+        location = self.create_repository()
+        release = ReleaseFile.from_file(location)
+        assert release.suite == 'stable'
+        assert release.codename == 'bookworm'
+        assert release.architectures == ['all', 'amd64']
+        assert release.components == ['main', 'contrib']
+        assert 'md5sum' not in release.data
+        assert sorted(release.paths()) == [
+            'main/Contents-amd64.gz',
+            'main/binary-amd64/Packages',
+            'main/binary-amd64/Packages.gz',
+            'main/source/Sources.xz',
+        ]
+        packages = release.get('main/binary-amd64/Packages')
+        assert packages.md5 and packages.sha256
+        assert int(packages.size) > 0
+        assert not release.get('main/binary-i386/Packages')
+
+    def test_ReleaseFile_get_packages_index_verifies_while_parsing(self):
+        location = self.create_repository()
+        release = ReleaseFile.from_file(location)
+        for name in ('Packages', 'Packages.gz'):
+            packages = path.join(path.dirname(location), 'main', 'binary-amd64', name)
+            index, verification = release.get_packages_index(packages)
+            assert verification.is_valid
+            assert list(verification.digests) == ['sha256']
+            expected = indexes.PackagesIndex.from_file(packages)
+            assert index == expected
+
+    def test_ReleaseFile_get_sources_index_verifies_all_digests(self):
+        location = self.create_repository()
+        release = ReleaseFile.from_file(location)
+        sources = path.join(path.dirname(location), 'main', 'source', 'Sources.xz')
+        index, verification = release.get_sources_index(sources, all_digests=True)
+        assert verification.is_valid
+        assert sorted(verification.digests) == ['md5', 'sha256']
+        assert index.names() == indexes.SourcesIndex.from_file(sources).names()
+
+    def test_ReleaseFile_get_contents_verifies_while_parsing(self):
+        location = self.create_repository()
+        release = ReleaseFile.from_file(location)
+        contents_file = path.join(path.dirname(location), 'main', 'Contents-amd64.gz')
+        packages_by_path, paths_by_package, verification = release.get_contents(contents_file)
+        assert verification.is_valid
+        expected = contents.parse_contents(contents_file, has_header=False)
+        assert (packages_by_path, paths_by_package) == expected
+
+    def test_ReleaseFile_reports_mismatches(self):
+        location = self.create_repository(corrupted=['main/binary-amd64/Packages.gz'])
+        release = ReleaseFile.from_file(location)
+        packages = path.join(path.dirname(location), 'main', 'binary-amd64', 'Packages.gz')
+        _index, verification = release.get_packages_index(packages)
+        assert not verification.is_valid
+        assert verification.mismatches == ['size', 'sha256']
+
+    def test_ReleaseFile_verify_index_of_unlisted_file(self):
+        location = self.create_repository()
+        release = ReleaseFile.from_file(location)
+        unlisted = path.join(path.dirname(location), 'Unlisted')
+        with open(unlisted, 'wb') as out:
+            out.write(b'foo')
+        verification = release.verify_index(unlisted)
+        assert not verification.is_valid
+        assert verification.size == 3
+        assert verification.error == 'File not listed in Release file: Unlisted'
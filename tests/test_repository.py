@@ -0,0 +1,134 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+from os import path
+
+from test_utils import JsonTester  # NOQA
+from test_translation import TRANSLATION
+
+from debian_inspector import repository
+from debian_inspector.indexes import PackagesIndex
+from debian_inspector.repository import RepositorySnapshot
+
+
+class TestRepositorySnapshot(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def get_index_files(self):
+        """
+        Return a mapping of {path: content bytes} of index files listed in a
+        Release file, including compressed variants.
+        """
+        with open(self.get_test_loc('debcon/packages/simple_packages'), 'rb') as inp:
+            packages = inp.read()
+        with open(self.get_test_loc('debcon/sources/simple_sources'), 'rb') as inp:
+            sources = inp.read()
+        with open(self.get_test_loc('contents/debian_Contents-amd64.gz'), 'rb') as inp:
+            contents_gz = inp.read()
+        return {
+            'main/binary-amd64/Packages': packages,
+            'main/binary-amd64/Packages.xz': lzma.compress(packages),
+            'main/source/Sources.gz': gzip.compress(sources),
+            'main/Contents-amd64.gz': contents_gz,
+            'main/i18n/Translation-en.bz2': bz2.compress(TRANSLATION),
+        }
+
+    def create_files(self, directory, files, release_name='Release', flatten=False):
+        """
+        Create ``files`` and their Release file in ``directory``, flattening
+        their paths with a prefix like in an apt lists directory if
+        ``flatten`` is True.
+        """
+        os.makedirs(directory, exist_ok=True)
+        lines = ['Suite: stable', 'SHA256:']
+        for name, content in files.items():
+            lines.append(f' {hashlib.sha256(content).hexdigest()} {len(content)} {name}')
+            if flatten:
+                file_name = release_name.rpartition('_')[0] + '_' + name.replace('/', '_')
+                location = path.join(directory, file_name)
+            else:
+                location = path.join(directory, *name.split('/'))
+            os.makedirs(path.dirname(location), exist_ok=True)
+            with open(location, 'wb') as out:
+                out.write(content)
+        with open(path.join(directory, release_name), 'w') as out:
+            out.write('\n'.join(lines) + '\n')
+
+    def test_get_index_kind(self):
+        assert repository.get_index_kind('main/binary-amd64/Packages.xz') == 'packages'
+        assert repository.get_index_kind('main/source/Sources') == 'sources'
+        assert repository.get_index_kind('main/Contents-amd64.gz') == 'contents'
+        assert repository.get_index_kind('main/i18n/Translation-en.bz2') == 'translation'
+        assert repository.get_index_kind('main/binary-amd64/Release') is None
+        assert repository.get_index_kind('main/binary-amd64/Packages.diff/Index') is None
+
+    def test_RepositorySnapshot_from_dists_directory(self):
+        dists = self.get_temp_dir()
+        files = self.get_index_files()
+        self.create_files(path.join(dists, 'bookworm'), files)
+        self.create_files(path.join(dists, 'bullseye'), {
+            'main/binary-amd64/Packages.gz': gzip.compress(files['main/binary-amd64/Packages']),
+        })
+        for max_workers in (1, 2):
+            snapshot = RepositorySnapshot.from_location(dists, verify=True, max_workers=max_workers)
+            assert len(snapshot.release_files) == 2
+            assert sorted(i.path for i in snapshot.index_files) == [
+                'main/Contents-amd64.gz',
+                'main/binary-amd64/Packages',
+                'main/binary-amd64/Packages.gz',
+                'main/i18n/Translation-en.bz2',
+                'main/source/Sources.gz',
+            ]
+            assert len(snapshot.packages_indexes) == 2
+            assert len(snapshot.sources_indexes) == 1
+            assert len(snapshot.contents) == 1
+            assert len(snapshot.translations) == 1
+            assert len(snapshot.verifications) == 5
+            assert not snapshot.get_invalid_verifications()
+
+            expected = PackagesIndex.from_file(self.get_test_loc('debcon/packages/simple_packages'))
+            name = list(expected.names())[0]
+            records = snapshot.get_packages(name)
+            assert len(records) == 2
+            assert all(record == expected.get(name)[0] for _index, record in records)
+            assert snapshot.get_sources('node-webpack-merge')
+            assert snapshot.get_source_names('node-webpack-merge') == ['node-webpack-merge']
+            assert set(snapshot.timings) == {
+                'discover', 'parse', 'load', 'packages', 'sources', 'contents', 'translation'}
+
+            data = snapshot.get_packages(name)[0][0].get_paragraph_data(records[0][1])
+            description = snapshot.get_description(data)
+            assert description.text.endswith('architecture-independent data files.')
+            snapshot.close()
+
+    def test_RepositorySnapshot_from_apt_lists_directory(self):
+        lists = self.get_temp_dir()
+        files = self.get_index_files()
+        del files['main/Contents-amd64.gz']
+        release_name = 'deb.debian.org_debian_dists_bookworm_InRelease'
+        self.create_files(lists, files, release_name=release_name, flatten=True)
+        snapshot = RepositorySnapshot.from_location(lists, kinds=('packages',))
+        assert [i.location for i in snapshot.index_files] == [
+            path.join(lists, 'deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages'),
+        ]
+        assert len(snapshot.packages_indexes) == 1
+        assert not snapshot.sources_indexes
+
+    def test_RepositorySnapshot_get_owners_from_contents(self):
+        suite = self.get_temp_dir()
+        files = self.get_index_files()
+        self.create_files(suite, {'main/Contents-amd64.gz': files['main/Contents-amd64.gz']})
+        snapshot = RepositorySnapshot.from_location(suite, kinds=('contents',))
+        packages_by_path, _paths_by_package = list(snapshot.contents.values())[0]
+        path_name, packages = next(iter(packages_by_path.items()))
+        assert snapshot.get_owners(path_name) == sorted(set(packages))
@@ -0,0 +1,105 @@
+#
+# Copyright (c) nexB Inc. and others. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+# See http://www.apache.org/licenses/LICENSE-2.0 for the license text.
+# See https://github.com/nexB/debian-inspector for support or download.
+# See https://aboutcode.org for more information about nexB OSS projects.
+#
+
+import bz2
+import pickle
+from os import path
+
+from test_utils import JsonTester  # NOQA
+
+from debian_inspector import debcon
+from debian_inspector import translation
+from debian_inspector.translation import TranslationIndex
+
+TRANSLATION = (
+    b'Package: 0ad-data\n'
+    b'Description-md5: 26581e685027d5ae84824362a4ba59ee\n'
+    b'Description-en: Real-time strategy game of ancient warfare (data files)\n'
+    b' 0 A.D. (pronounced "zero ey-dee") is a free, open-source, cross-platform\n'
+    b' real-time strategy (RTS) game of ancient warfare.\n'
+    b' .\n'
+    b' This package provides the architecture-independent data files.\n'
+    b'\n'
+    b'Package: 0ad-data-common\n'
+    b'Description-md5: 8d014b839c4c4e9b6f82c7512d7e3496\n'
+    b'Description-en: Real-time strategy game of ancient warfare (common data files)\n'
+    b' This package provides the common data files.\n'
+)
+
+
+class TestTranslationIndex(JsonTester):
+    test_data_dir = path.join(path.dirname(__file__), 'data')
+
+    def create_translation(self, name='Translation-en', content=TRANSLATION):
+        location = path.join(self.get_temp_dir(), name)
+        if name.endswith('.bz2'):
+            content = bz2.compress(content)
+        with open(location, 'wb') as out:
+            out.write(content)
+        return location
+
+    def test_get_language(self):
+        assert translation.get_language('main/i18n/Translation-en') == 'en'
+        assert translation.get_language('main/i18n/Translation-pt_BR.bz2') == 'pt_BR'
+        assert translation.get_language('main/i18n/Index') is None
+
+    def test_get_offsets_by_md5(self):
+        results = translation.get_offsets_by_md5(TRANSLATION)
+        assert list(results) == [
+            '26581e685027d5ae84824362a4ba59ee',
+            '8d014b839c4c4e9b6f82c7512d7e3496',
+        ]
+        offset, length = results['8d014b839c4c4e9b6f82c7512d7e3496']
+        assert TRANSLATION[offset:offset + length].startswith(b'Package: 0ad-data-common\n')
+        assert offset + length == len(TRANSLATION)
+
+    def test_get_offsets_by_md5_with_extra_empty_lines(self):
+        content = TRANSLATION.replace(b'files.\n\n', b'files.\n\n\n\n')
+        results = translation.get_offsets_by_md5(content)
+        for offset, length in results.values():
+            paragraph = content[offset:offset + length]
+            assert paragraph.startswith(b'Package: ')
+            assert paragraph.endswith(b'files.\n')
+
+    def test_TranslationIndex_from_file_plain_or_compressed(self):
+        for name in ('Translation-en', 'Translation-en.bz2'):
+            location = self.create_translation(name)
+            with TranslationIndex.from_file(location) as index:
+                assert index.language == 'en'
+                assert len(index) == 2
+                description = index.get('26581e685027d5ae84824362a4ba59ee')
+                expected = 'Real-time strategy game of ancient warfare (data files)\n'
+                assert description.startswith(expected)
+                assert description.endswith('architecture-independent data files.')
+                assert index.get('00000000000000000000000000000000') is None
+
+    def test_TranslationIndex_get_description_joins_packages(self):
+        index = TranslationIndex.from_file(self.create_translation())
+        packages = self.get_test_loc('debcon/packages/simple_packages')
+        paragraphs = list(debcon.get_paragraphs_data_from_file(packages))
+        description = index.get_description(paragraphs[1])
+        expected = 'Real-time strategy game of ancient warfare (common data files)'
+        assert description.synopsis == expected
+        assert description.text == 'This package provides the common data files.'
+        # no translation: use the Packages description
+        description = index.get_description(paragraphs[2])
+        assert description.synopsis == 'Ping utility to determine directional packet loss'
+        index.close()
+
+    def test_TranslationIndex_of_empty_file(self):
+        index = TranslationIndex.from_file(self.create_translation(content=b''))
+        assert len(index) == 0
+        assert index.get_description({'description': 'foo'}).synopsis == 'foo'
+
+    def test_TranslationIndex_can_be_pickled(self):
+        index = TranslationIndex.from_file(self.create_translation('Translation-en.bz2'))
+        loaded = pickle.loads(pickle.dumps(index))
+        index.close()
+        assert loaded == index
+        assert loaded.get('8d014b839c4c4e9b6f82c7512d7e3496')
+        loaded.close()